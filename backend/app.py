@@ -1,12 +1,22 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager, jwt_required, create_access_token, get_jwt_identity
 from datetime import timedelta
+import os
+import hmac
+import atexit
 import threading
 import time
 from system_monitor import SystemMonitor
+from sampler_service import RemoteSystemMonitor
+from snapshot_encoding import choose_encoding
+import openmetrics
 from auth import UserAuth
+from password_hasher import AuthBusyError, attempt_limiter
 from database import db_config
+from health_prober import HealthProber
+from stream_tickets import StreamTickets
+from monitors.process_registry import PROCESS_COLUMNS
 
 app = Flask(__name__)
 # 在第12行后添加
@@ -46,15 +56,50 @@ def missing_token_callback(error):
         'error': 'token_missing'
     }), 401
 
-# 初始化系统监控器
-system_monitor = SystemMonitor()
+# MONITOR_MODE=embedded（默认）时在本进程内采集；remote 时从独立的采样进程读取快照（见 gunicorn.conf.py）
+MONITOR_MODE = os.getenv('MONITOR_MODE', 'embedded')
 
-# 启动后台监控线程
-def start_monitoring():
-    system_monitor.start_monitoring()
+if MONITOR_MODE == 'remote':
+    system_monitor = RemoteSystemMonitor()
+    # 健康探测在采样进程中只运行一份，所有工作进程读取同一份结果，数据库探测负载不随工作进程数增加
+    get_health = system_monitor.get_health
+    deep_health_check = system_monitor.deep_health_check
+    # 推送票据的使用登记在采样进程中，同一张票据不能在每个工作进程各用一次
+    claim_stream_ticket = system_monitor.claim_stream_ticket
+else:
+    # 初始化系统监控器
+    system_monitor = SystemMonitor()
 
-monitoring_thread = threading.Thread(target=start_monitoring, daemon=True)
-monitoring_thread.start()
+    # 启动后台监控线程
+    def start_monitoring():
+        system_monitor.start_monitoring()
+
+    monitoring_thread = threading.Thread(target=start_monitoring, daemon=True)
+    monitoring_thread.start()
+    # 退出时停止监控并写入尚未持久化的历史采样
+    atexit.register(system_monitor.stop_monitoring)
+
+    # 后台健康探测，/api/health 只返回缓存结果
+    health_prober = HealthProber.from_env(db_config, system_monitor, monitoring_thread.is_alive)
+    health_prober.start()
+    get_health = health_prober.get
+    deep_health_check = health_prober.deep_check
+    # 单进程运行，推送票据在本进程内登记
+    claim_stream_ticket = None
+
+# EventSource 无法设置请求头，推送接口使用一次性的短时票据，不在URL中传递JWT
+stream_tickets = StreamTickets.from_env(app.config['JWT_SECRET_KEY'], claim_stream_ticket)
+
+def auth_busy_response(error: AuthBusyError):
+    """认证繁忙时返回 429"""
+    response = jsonify({
+        'success': False,
+        'message': str(error),
+        'error': 'auth_busy'
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
 
 @app.route('/api/login', methods=['POST'])
 def login():
@@ -63,7 +108,10 @@ def login():
     username = data.get('username')
     password = data.get('password')
     
-    user = UserAuth.authenticate_user(username, password)
+    try:
+        user = UserAuth.authenticate_attempt(username, password, request.remote_addr)
+    except AuthBusyError as e:
+        return auth_busy_response(e)
     if user:
         access_token = create_access_token(
             identity=str(user['id']),  # 将整数转换为字符串
@@ -126,7 +174,13 @@ def change_password():
             'message': '用户不存在'
         }), 404
     
-    if UserAuth.update_password(user['username'], old_password, new_password):
+    try:
+        with attempt_limiter.attempt(user['username'], request.remote_addr):
+            updated = UserAuth.update_password(user['username'], old_password, new_password)
+    except AuthBusyError as e:
+        return auth_busy_response(e)
+    
+    if updated:
         return jsonify({
             'success': True,
             'message': '密码修改成功'
@@ -139,23 +193,60 @@ def change_password():
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    """健康检查接口"""
-    db_status = db_config.test_connection()
-    return jsonify({
-        'status': 'healthy' if db_status else 'unhealthy',
-        'database': 'connected' if db_status else 'disconnected',
-        'timestamp': time.time()
-    })
+    """健康检查接口，返回后台探测的缓存结果；deep=1 时同步探测一次（限频）"""
+    try:
+        if request.args.get('deep') in ('1', 'true'):
+            return jsonify(deep_health_check())
+        return jsonify(get_health())
+    except Exception as e:
+        # 采样进程不可达时无法取得探测结果
+        return jsonify({
+            'status': 'unhealthy',
+            'database': 'unknown',
+            'checks': {
+                'monitor': {'status': 'unreachable', 'error': str(e)}
+            },
+            'timestamp': time.time()
+        })
+
+def status_body_response(fields=None, exclude=None):
+    """返回预先序列化的全量快照，If-None-Match 与当前版本一致时返回 304"""
+    headers = {
+        'Cache-Control': 'no-cache',
+        'Vary': 'Accept-Encoding'
+    }
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+    # ETag 比较和响应体在同一次调用中完成，远程模式下只需一次往返
+    version, etag, body = system_monitor.get_status_body(encoding, fields, exclude,
+                                                         request.headers.get('If-None-Match'))
+    headers['ETag'] = etag
+    if body is None:
+        return Response(status=304, headers=headers)
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return Response(body, mimetype='application/json', headers=headers)
 
 @app.route('/api/system-status', methods=['GET'])
 @jwt_required()
 def get_system_status():
-    """获取系统状态信息"""
+    """获取系统状态信息，传入 since=<版本号> 时只返回此后变化的字段；fields/exclude 选择返回的字段（如 cpu.percent,memory）
+
+    版本号形如 <实例ID>-<序号>，服务重启后旧的版本号不再匹配，返回全量快照。
+    """
     try:
-        status = system_monitor.get_current_status()
+        since = request.args.get('since') or None
+        fields = request.args.get('fields')
+        exclude = request.args.get('exclude')
+        if since is None:
+            return status_body_response(fields, exclude)
+        delta = system_monitor.get_delta(since, fields, exclude)
+        if delta['full']:
+            return status_body_response(fields, exclude)
         return jsonify({
             'success': True,
-            'data': status
+            'version': delta['version'],
+            'full': False,
+            'ops': delta['ops']
         })
     except Exception as e:
         return jsonify({
@@ -163,12 +254,165 @@ def get_system_status():
             'message': f'获取系统状态失败: {str(e)}'
         }), 500
 
+@app.route('/api/system-stream/ticket', methods=['POST'])
+@jwt_required()
+def issue_stream_ticket():
+    """用JWT换取推送接口的一次性连接票据"""
+    return jsonify({
+        'success': True,
+        'data': {
+            'ticket': stream_tickets.issue(get_jwt_identity()),
+            'expires_in': stream_tickets.ttl
+        }
+    })
+
+@app.route('/api/system-stream', methods=['GET'])
+def system_stream():
+    """以Server-Sent Events推送系统状态，连接只在订阅时用 ?ticket= 认证一次"""
+    if stream_tickets.redeem(request.args.get('ticket')) is None:
+        return jsonify({
+            'success': False,
+            'message': '推送票据无效、已过期或已使用',
+            'error': 'invalid_ticket'
+        }), 401
+    
+    def generate():
+        version = None
+        while True:
+            frame = system_monitor.get_stream_frame(version)
+            if frame is None:
+                # 定期发送注释行保持连接，同时能及时发现客户端断开
+                yield b': keep-alive\n\n'
+                continue
+            version, payload = frame
+            yield payload
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # 禁止nginx缓冲推送数据
+        }
+    )
+
+@app.route('/api/host-info', methods=['GET'])
+@jwt_required()
+def get_host_info():
+    """获取主机静态信息（CPU型号、核心数、平台信息），refresh=1 时强制重新采集"""
+    try:
+        refresh = request.args.get('refresh', '0') in ('1', 'true')
+        facts = system_monitor.get_host_facts(refresh=refresh)
+        return jsonify({
+            'success': True,
+            'data': facts
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'获取主机信息失败: {str(e)}'
+        }), 500
+
+@app.route('/api/network/interfaces', methods=['GET'])
+@jwt_required()
+def get_network_interfaces():
+    """获取网络接口清单（地址、MAC、是否虚拟设备），只在接口变化时更新；带版本号 ETag，未变化时返回 304"""
+    try:
+        inventory = system_monitor.get_network_inventory()
+        headers = {'Cache-Control': 'no-cache'}
+        if inventory.get('version') is not None:
+            # 带上更新时间，区分重启前后相同的版本号
+            etag = f'W/"nic-{inventory["version"]}-{int((inventory.get("updated_at") or 0) * 1000):x}"'
+            headers['ETag'] = etag
+            if etag in request.headers.get('If-None-Match', ''):
+                return Response(status=304, headers=headers)
+        response = jsonify({
+            'success': True,
+            'data': inventory
+        })
+        response.headers.update(headers)
+        return response
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'获取网络接口清单失败: {str(e)}'
+        }), 500
+
+def _split_arg(name):
+    """解析逗号分隔的查询参数"""
+    return [item for item in request.args.get(name, '').split(',') if item] or None
+
+@app.route('/api/processes', methods=['GET'])
+@jwt_required()
+def get_processes():
+    """进程列表：按 sort（任一列）和 order（asc/desc）排序，按 user、status（逗号分隔）和 name（子串）过滤，
+    offset/limit 分页；由采样端每轮维护的进程表直接返回，不重新扫描 /proc"""
+    sort = request.args.get('sort', 'cpu_percent')
+    if sort not in PROCESS_COLUMNS:
+        return jsonify({
+            'success': False,
+            'message': f'不支持的排序列: {sort}，可选: {", ".join(PROCESS_COLUMNS)}'
+        }), 400
+    try:
+        processes = system_monitor.query_processes(
+            sort=sort,
+            descending=request.args.get('order', 'desc') != 'asc',
+            users=_split_arg('user'),
+            name=request.args.get('name') or None,
+            statuses=_split_arg('status'),
+            offset=max(0, request.args.get('offset', 0, type=int)),
+            limit=min(500, max(1, request.args.get('limit', 50, type=int)))
+        )
+        return jsonify({
+            'success': True,
+            'data': processes
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'获取进程列表失败: {str(e)}'
+        }), 500
+
+@app.route('/api/processes/<int:pid>', methods=['GET'])
+@jwt_required()
+def get_process_detail(pid):
+    """单个进程的详情：线程数、文件描述符数、IO计数和命令行"""
+    try:
+        process = system_monitor.get_process(pid)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'获取进程详情失败: {str(e)}'
+        }), 500
+    if process is None:
+        return jsonify({
+            'success': False,
+            'message': f'进程 {pid} 不存在'
+        }), 404
+    return jsonify({
+        'success': True,
+        'data': process
+    })
+
 @app.route('/api/system-history', methods=['GET'])
 @jwt_required()
 def get_system_history():
-    """获取系统历史数据"""
+    """获取系统历史数据
+
+    支持 from/to（Unix时间戳，秒）和 step（秒）参数，按步长自动选择原始数据或10秒/1分钟/10分钟汇总；
+    不带这些参数时返回最近 limit 个原始样本。fields/exclude 按列名（如 cpu_percent,per_cpu）选择返回的列。
+    """
     try:
-        history = system_monitor.get_history_data()
+        start_time = request.args.get('from', type=float)
+        end_time = request.args.get('to', type=float)
+        step = request.args.get('step', type=float)
+        fields = request.args.get('fields')
+        exclude = request.args.get('exclude')
+        if start_time is None and end_time is None and step is None:
+            limit = request.args.get('limit', 50, type=int)
+            history = system_monitor.get_history_data(limit=limit, fields=fields, exclude=exclude)
+        else:
+            history = system_monitor.query_history(start_time, end_time, step, fields, exclude)
         return jsonify({
             'success': True,
             'data': history
@@ -179,5 +423,53 @@ def get_system_history():
             'message': f'获取历史数据失败: {str(e)}'
         }), 500
 
+@app.route('/api/monitor/self', methods=['GET'])
+@jwt_required()
+def get_monitor_self_metrics():
+    """获取监控程序自身的运行指标：采样端的各采集项耗时直方图、错误数、循环漂移、快照大小、锁等待，
+    以及当前Web进程的数据库连接池、用户缓存和密码计算线程池统计"""
+    try:
+        return jsonify({
+            'success': True,
+            'data': {
+                'sampler': system_monitor.get_self_metrics(),
+                'web': {
+                    'pid': os.getpid(),
+                    'db_pool': db_config.get_pool_stats(),
+                    'user_cache': UserAuth.get_cache_stats(),
+                    'password_hasher': UserAuth.get_hasher_stats(),
+                    'stream_tickets': stream_tickets.get_stats()
+                }
+            }
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'获取自身运行指标失败: {str(e)}'
+        }), 500
+
+@app.route('/metrics', methods=['GET'])
+def get_openmetrics():
+    """以 OpenMetrics 文本格式导出最新快照，供 Prometheus 等抓取
+
+    快照中含进程名、用户名、网卡地址和挂载点，默认不公开：设置 METRICS_TOKEN 后需要 Bearer 认证，
+    只有显式设置 METRICS_PUBLIC=1 时才允许匿名访问。
+    """
+    token = os.getenv('METRICS_TOKEN')
+    if token:
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return Response('unauthorized\n', status=401, mimetype='text/plain',
+                            headers={'WWW-Authenticate': 'Bearer'})
+    elif os.getenv('METRICS_PUBLIC') != '1':
+        return Response('metrics endpoint disabled: set METRICS_TOKEN or METRICS_PUBLIC=1\n', status=403,
+                        mimetype='text/plain')
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+    version, text = system_monitor.get_metrics_text(encoding)
+    headers = {'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return Response(text, content_type=openmetrics.CONTENT_TYPE, headers=headers)
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
+    # 开发服务器；生产环境使用 gunicorn -c gunicorn.conf.py wsgi:app
+    app.run(host='0.0.0.0', port=5001, debug=os.getenv('FLASK_DEBUG', '1') == '1')
\ No newline at end of file
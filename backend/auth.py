@@ -1,21 +1,124 @@
-import bcrypt
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
 from database import db_config
 from mysql.connector import Error
+from password_hasher import password_hasher, attempt_limiter
+
+
+class UserCache:
+    """按用户ID缓存用户信息的 LRU+TTL 缓存
+
+    JWT 认证的接口每次请求都要按ID查询用户，缓存后同一用户的重复查询不再访问数据库。
+    用户ID统一转换为字符串（JWT 中的 identity 是字符串）。写操作后按用户名失效。
+    每次失效都会递增 generation，查询数据库前记下的 generation 已变化时不再写入缓存，
+    避免在失效之前开始的查询把旧数据重新放回缓存。
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries: OrderedDict = OrderedDict()  # 用户ID -> (过期时间, 用户信息)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.generation = 0
+        self.stale_puts = 0
+
+    def current_generation(self) -> int:
+        """当前失效代数，查询数据库前记录，写入缓存时传给 put"""
+        with self.lock:
+            return self.generation
+
+    def get(self, user_id) -> Optional[Dict[str, Any]]:
+        """获取缓存的用户信息，未命中或已过期时返回 None"""
+        key = str(user_id)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, user_id, user: Dict[str, Any], generation: Optional[int] = None) -> bool:
+        """缓存用户信息，超出容量时淘汰最久未使用的条目
+
+        generation 与当前失效代数不一致时说明读取期间发生过失效，丢弃这次写入。
+        """
+        if self.max_size <= 0 or self.ttl <= 0:
+            return False
+        key = str(user_id)
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                self.stale_puts += 1
+                return False
+            self.entries[key] = (time.monotonic() + self.ttl, dict(user))
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, user_id):
+        """使某个用户ID的缓存失效"""
+        with self.lock:
+            self.generation += 1
+            self.entries.pop(str(user_id), None)
+
+    def invalidate_username(self, username: str):
+        """使某个用户名对应的缓存失效"""
+        with self.lock:
+            self.generation += 1
+            for key in [k for k, (_, user) in self.entries.items() if user.get('username') == username]:
+                del self.entries[key]
+
+    def clear(self):
+        """清空缓存"""
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """缓存统计信息"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'stale_puts': self.stale_puts
+            }
+
+
+# 全局用户缓存实例
+user_cache = UserCache(
+    max_size=int(os.getenv('USER_CACHE_SIZE', 1024)),
+    ttl=float(os.getenv('USER_CACHE_TTL', 60))
+)
 
 class UserAuth:
     """用户认证类"""
     
     @staticmethod
     def hash_password(password: str) -> str:
-        """加密密码"""
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-        return hashed.decode('utf-8')
+        """加密密码（在 bcrypt 线程池中计算，队列已满时抛出 AuthBusyError）"""
+        return password_hasher.hash(password)
     
     @staticmethod
     def verify_password(password: str, hashed: str) -> bool:
-        """验证密码"""
-        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+        """验证密码（在 bcrypt 线程池中计算，队列已满时抛出 AuthBusyError）"""
+        return password_hasher.verify(password, hashed)
     
     @staticmethod
     def create_user(username: str, password: str, email: str = None, role: str = 'user') -> bool:
@@ -31,40 +134,55 @@ class UserAuth:
                 """
                 cursor.execute(query, (username, hashed_password, email, role))
                 conn.commit()
-                return True
+            user_cache.invalidate_username(username)
+            return True
                 
         except Error as e:
             print(f"创建用户失败: {e}")
             return False
     
+    @staticmethod
+    def _get_user_with_hash(username: str) -> Optional[Dict[str, Any]]:
+        """按用户名查询用户信息及密码哈希"""
+        with db_config.get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            query = """
+                SELECT id, username, password_hash, email, role, is_active 
+                FROM users 
+                WHERE username = %s AND is_active = TRUE
+            """
+            cursor.execute(query, (username,))
+            return cursor.fetchone()
+    
     @staticmethod
     def authenticate_user(username: str, password: str) -> dict:
-        """验证用户凭据"""
+        """验证用户凭据，认证繁忙时抛出 AuthBusyError"""
         try:
-            with db_config.get_connection() as conn:
-                cursor = conn.cursor(dictionary=True)
-                query = """
-                    SELECT id, username, password_hash, email, role, is_active 
-                    FROM users 
-                    WHERE username = %s AND is_active = TRUE
-                """
-                cursor.execute(query, (username,))
-                user = cursor.fetchone()
-                
-                if user and UserAuth.verify_password(password, user['password_hash']):
-                    # 移除密码哈希，返回安全的用户信息
-                    del user['password_hash']
-                    return user
-                    
-                return None
-                
+            user = UserAuth._get_user_with_hash(username)
         except Error as e:
             print(f"用户认证失败: {e}")
             return None
+        
+        # bcrypt 在归还数据库连接之后计算，不占用连接池
+        if user and UserAuth.verify_password(password, user['password_hash']):
+            # 移除密码哈希，返回安全的用户信息
+            del user['password_hash']
+            return user
+        return None
+    
+    @staticmethod
+    def authenticate_attempt(username: str, password: str, ip: str) -> dict:
+        """带并发限制的用户认证，同一用户或IP同时进行的尝试过多时抛出 AuthBusyError"""
+        with attempt_limiter.attempt(username, ip):
+            return UserAuth.authenticate_user(username, password)
     
     @staticmethod
-    def get_user_by_id(user_id: int) -> dict:
-        """根据ID获取用户信息"""
+    def get_user_by_id(user_id) -> dict:
+        """根据ID获取用户信息（优先读取缓存）"""
+        user = user_cache.get(user_id)
+        if user is not None:
+            return user
+        generation = user_cache.current_generation()
         try:
             with db_config.get_connection() as conn:
                 cursor = conn.cursor(dictionary=True)
@@ -73,8 +191,11 @@ class UserAuth:
                     FROM users 
                     WHERE id = %s AND is_active = TRUE
                 """
-                cursor.execute(query, (user_id,))
-                return cursor.fetchone()
+                cursor.execute(query, (str(user_id),))
+                user = cursor.fetchone()
+            if user:
+                user_cache.put(user_id, user, generation)
+            return user
                 
         except Error as e:
             print(f"获取用户信息失败: {e}")
@@ -82,9 +203,9 @@ class UserAuth:
     
     @staticmethod
     def update_password(username: str, old_password: str, new_password: str) -> bool:
-        """更新用户密码"""
+        """更新用户密码，认证繁忙时抛出 AuthBusyError"""
         try:
-            # 先验证旧密码
+            # 先验证旧密码，再计算新密码的哈希，两次 bcrypt 都在数据库连接之外进行
             user = UserAuth.authenticate_user(username, old_password)
             if not user:
                 return False
@@ -97,12 +218,24 @@ class UserAuth:
                 query = "UPDATE users SET password_hash = %s WHERE username = %s"
                 cursor.execute(query, (hashed_password, username))
                 conn.commit()
-                return cursor.rowcount > 0
+                updated = cursor.rowcount > 0
+            user_cache.invalidate_username(username)
+            return updated
                 
         except Error as e:
             print(f"更新密码失败: {e}")
             return False
 
+    @staticmethod
+    def get_cache_stats() -> Dict[str, Any]:
+        """获取用户缓存统计信息"""
+        return user_cache.get_stats()
+
+    @staticmethod
+    def get_hasher_stats() -> Dict[str, Any]:
+        """获取密码计算线程池和登录限流的统计信息"""
+        return dict(password_hasher.get_stats(), attempts=attempt_limiter.get_stats())
+
 # 保持向后兼容的函数
 def authenticate_user(username: str, password: str) -> bool:
     """验证用户凭据（向后兼容）"""
@@ -0,0 +1,296 @@
+import os
+import functools
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, Any, Callable, Optional, Tuple
+from monitors.base_monitor import BaseSystemMonitor
+
+logger = logging.getLogger(__name__)
+
+# 各采集项的默认采集周期（秒）：廉价的指标高频采集，昂贵的进程扫描和分区枚举低频采集
+DEFAULT_INTERVALS = {
+    'cpu': 1.0,
+    'memory': 1.0,
+    'load': 1.0,
+    'network': 2.0,
+    'disk_io': 2.0,
+    'disk': 15.0,
+    'temperatures': 10.0,
+    'processes': 15.0,
+    'disk_usage': 60.0
+}
+
+# 各采集项的单次耗时预算（秒），超出预算时自动拉长该采集项的周期
+DEFAULT_BUDGETS = {
+    'cpu': 0.05,
+    'memory': 0.05,
+    'load': 0.05,
+    'network': 0.1,
+    'disk_io': 0.1,
+    'disk': 1.0,
+    'temperatures': 0.5,
+    'processes': 1.0,
+    'disk_usage': 1.0
+}
+
+# 并行模式下各采集项的超时时间（秒），超时的采集项沿用上一次的结果并标记为过期
+DEFAULT_TIMEOUTS = {
+    'disk': 10.0,
+    'processes': 10.0,
+    'disk_usage': 5.0,
+    'temperatures': 5.0
+}
+DEFAULT_TIMEOUT = 2.0
+
+# 超出预算时周期最多放大的倍数
+MAX_BACKOFF = 8
+
+# 核心指标的采集项不放大周期，超出预算时只记录次数，避免首页指标悄悄降级
+PINNED_COLLECTORS = ('cpu',)
+
+# 执行模式：sequential 依次执行，parallel 在线程池中并发执行
+EXECUTION_MODES = ('sequential', 'parallel')
+
+
+def parse_overrides(value: Optional[str]) -> Dict[str, float]:
+    """解析形如 "processes=15,disk_usage=60" 的配置字符串"""
+    overrides = {}
+    if not value:
+        return overrides
+    for item in value.split(','):
+        if '=' not in item:
+            continue
+        name, seconds = item.split('=', 1)
+        try:
+            overrides[name.strip()] = float(seconds)
+        except ValueError:
+            logger.warning(f"忽略无效的采集配置: {item}")
+    return overrides
+
+
+class CollectorTask:
+    """单个采集项的调度状态"""
+
+    def __init__(self, name: str, collect: Callable[[], Any], interval: float, budget: float,
+                 timeout: float = DEFAULT_TIMEOUT, max_backoff: int = MAX_BACKOFF):
+        self.name = name
+        self.collect = collect
+        self.interval = interval
+        self.budget = budget
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.effective_interval = interval
+        self.next_due = 0.0
+        self.last_run = None
+        self.last_success = None
+        self.last_duration = 0.0
+        self.over_budget_count = 0
+        self.error_count = 0
+        self.timeout_count = 0
+        # 并行模式下尚未完成的采集任务
+        self.future = None
+        self.stale = False
+
+    def run(self) -> Tuple[Any, float, Optional[Exception]]:
+        """执行采集，返回 (结果, 耗时, 异常)"""
+        started = time.monotonic()
+        try:
+            return self.collect(), time.monotonic() - started, None
+        except Exception as e:
+            return None, time.monotonic() - started, e
+
+    def adjust_interval(self):
+        """根据本次耗时调整采集周期：超出预算时加倍，恢复后逐步回落"""
+        if self.last_duration > self.budget:
+            self.over_budget_count += 1
+            backed_off = min(self.effective_interval * 2, self.interval * self.max_backoff)
+            if backed_off != self.effective_interval:
+                logger.warning(
+                    f"采集项 {self.name} 耗时 {self.last_duration:.3f}s 超出预算 {self.budget:.3f}s，"
+                    f"周期调整为 {backed_off:.1f}s"
+                )
+            self.effective_interval = backed_off
+        elif self.last_duration <= self.budget / 2 and self.effective_interval > self.interval:
+            self.effective_interval = max(self.interval, self.effective_interval / 2)
+
+    @property
+    def degraded(self) -> bool:
+        """周期是否因超出预算被放大"""
+        return self.effective_interval > self.interval
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取调度统计信息"""
+        return {
+            'interval': self.interval,
+            'effective_interval': self.effective_interval,
+            'degraded': self.degraded,
+            'budget': self.budget,
+            'timeout': self.timeout,
+            'last_run': self.last_run,
+            'last_success': self.last_success,
+            'last_duration': self.last_duration,
+            'over_budget_count': self.over_budget_count,
+            'error_count': self.error_count,
+            'timeout_count': self.timeout_count,
+            'stale': self.stale
+        }
+
+
+class CollectionScheduler:
+    """分层采集调度器
+
+    每个采集项（cpu、memory、disk_usage、disk_io、network、processes、load、temperatures）
+    拥有独立的采集周期和耗时预算，每次只运行到期的采集项，其余采集项沿用上一次的结果。
+    耗时预算依次取默认值、监控器按平台给出的预算（collector_budgets）、环境变量和参数；
+    周期被放大的采集项在快照的 degraded 中列出，核心指标（PINNED_COLLECTORS）不放大周期。
+    并行模式下到期的采集项在有界线程池中并发执行，超过各自期限的采集项不会阻塞快照，
+    而是沿用上一次成功的结果并标记为过期，直到后台任务完成。
+    """
+
+    def __init__(self, monitor: BaseSystemMonitor,
+                 intervals: Optional[Dict[str, float]] = None,
+                 budgets: Optional[Dict[str, float]] = None,
+                 timeouts: Optional[Dict[str, float]] = None,
+                 default_interval: float = 5.0,
+                 execution_mode: Optional[str] = None,
+                 max_workers: Optional[int] = None):
+        self.monitor = monitor
+        self.sections: Dict[str, Any] = {}
+
+        intervals = {**DEFAULT_INTERVALS, **parse_overrides(os.getenv('MONITOR_INTERVALS')), **(intervals or {})}
+        budgets = {
+            **DEFAULT_BUDGETS,
+            **monitor.collector_budgets,
+            **parse_overrides(os.getenv('MONITOR_BUDGETS')),
+            **(budgets or {})
+        }
+        timeouts = {**DEFAULT_TIMEOUTS, **parse_overrides(os.getenv('MONITOR_TIMEOUTS')), **(timeouts or {})}
+
+        self.tasks = {
+            name: CollectorTask(
+                name,
+                functools.partial(monitor.profile, name, collect),
+                intervals.get(name, default_interval),
+                budgets.get(name, 1.0),
+                timeouts.get(name, DEFAULT_TIMEOUT),
+                1 if name in PINNED_COLLECTORS else MAX_BACKOFF
+            )
+            for name, collect in monitor.get_collectors().items()
+        }
+
+        self.execution_mode = execution_mode or os.getenv('MONITOR_EXECUTION_MODE', 'parallel')
+        if self.execution_mode not in EXECUTION_MODES:
+            logger.warning(f"未知的执行模式 {self.execution_mode}，使用 parallel")
+            self.execution_mode = 'parallel'
+        self.max_workers = max_workers or int(os.getenv('MONITOR_WORKERS', min(4, max(1, len(self.tasks)))))
+        self.executor: Optional[ThreadPoolExecutor] = None
+
+    def _apply(self, task: CollectorTask, outcome: Tuple[Any, float, Optional[Exception]]):
+        """记录采集结果，失败时保留上一次成功的结果"""
+        result, duration, error = outcome
+        task.last_duration = duration
+        task.last_run = time.time()
+        if error is not None:
+            task.error_count += 1
+            logger.error(f"采集项 {task.name} 出错: {error}")
+        else:
+            self.sections[task.name] = result
+            task.last_success = task.last_run
+            task.stale = False
+
+    def _reschedule(self, task: CollectorTask, now: float):
+        """根据耗时调整周期并计算下一次到期时间"""
+        task.adjust_interval()
+        task.next_due = now + task.effective_interval
+
+    def _harvest(self) -> bool:
+        """收集之前超时、现已在后台完成的采集结果"""
+        harvested = False
+        for task in self.tasks.values():
+            if task.future is not None and task.future.done():
+                self._apply(task, task.future.result())
+                task.future = None
+                harvested = True
+        return harvested
+
+    def _run_parallel(self, due: list, now: float):
+        """在线程池中并发执行到期的采集项，每个采集项有独立的期限"""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='collector')
+
+        # 期限从提交时刻计算：now 是节拍的计划时刻，采集循环落后时已经过去
+        started = time.monotonic()
+        submitted = []
+        for task in due:
+            if task.future is not None:
+                # 上一次的采集仍未返回（例如挂起的网络挂载），不重复提交
+                task.stale = True
+                task.next_due = now + task.effective_interval
+                continue
+            task.future = self.executor.submit(task.run)
+            submitted.append(task)
+
+        for task in submitted:
+            remaining = started + task.timeout - time.monotonic()
+            try:
+                outcome = task.future.result(timeout=max(0.0, remaining))
+            except FutureTimeout:
+                task.timeout_count += 1
+                if self.monitor.profiler is not None:
+                    self.monitor.profiler.increment(f"collector.{task.name}.timeouts")
+                task.stale = True
+                task.last_duration = task.timeout
+                logger.warning(f"采集项 {task.name} 超过 {task.timeout:.1f}s 未返回，沿用上一次的结果")
+                self._reschedule(task, now)
+                continue
+            task.future = None
+            self._apply(task, outcome)
+            self._reschedule(task, now)
+
+    def run_due(self, now: Optional[float] = None) -> bool:
+        """运行所有到期的采集项，返回是否有采集结果更新"""
+        now = time.monotonic() if now is None else now
+        harvested = self._harvest()
+        due = [task for task in self.tasks.values() if task.next_due <= now]
+        if self.execution_mode == 'parallel':
+            self._run_parallel(due, now)
+        else:
+            for task in due:
+                self._apply(task, task.run())
+                self._reschedule(task, now)
+        return bool(due) or harvested
+
+    def next_due_in(self, now: Optional[float] = None) -> float:
+        """距离下一个采集项到期的秒数"""
+        now = time.monotonic() if now is None else now
+        if not self.tasks:
+            return 1.0
+        return max(0.0, min(task.next_due for task in self.tasks.values()) - now)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """将各采集项的最新结果合并为快照
+
+        过期的采集项在 stale 中列出其数据的时长（秒），周期被放大的采集项在 degraded 中列出当前周期（秒）
+        """
+        data = self.monitor.compose_snapshot(dict(self.sections))
+        stale = {
+            task.name: round(time.time() - task.last_success, 1) if task.last_success else None
+            for task in self.tasks.values() if task.stale
+        }
+        if stale:
+            data['stale'] = stale
+        degraded = {task.name: task.effective_interval for task in self.tasks.values() if task.degraded}
+        if degraded:
+            data['degraded'] = degraded
+        return data
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取所有采集项的调度统计信息"""
+        return {name: task.get_stats() for name, task in self.tasks.items()}
+
+    def shutdown(self):
+        """关闭线程池，不等待挂起的采集任务"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
@@ -1,12 +1,178 @@
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector.errors import PoolError, InterfaceError, OperationalError
 import os
+import time
+import threading
+from collections import deque
 from contextlib import contextmanager
+from typing import Dict, Any
 from dotenv import load_dotenv
 
 # 加载 .env 文件
 load_dotenv()
 
+
+class ConnectionPool:
+    """有界的数据库连接池
+
+    空闲连接按后进先出复用，借出时对空闲较久的连接做一次 ping 健康检查，
+    空闲超过 max_idle 秒的连接会被关闭；连接数达到上限时等待归还，超时抛出 PoolError。
+    """
+
+    def __init__(self, config: Dict[str, Any], size: int = 10, checkout_timeout: float = 5.0,
+                 max_idle: float = 300.0, ping_interval: float = 30.0):
+        self.config = config
+        self.size = max(1, size)
+        self.checkout_timeout = checkout_timeout
+        self.max_idle = max_idle
+        self.ping_interval = ping_interval
+        self.condition = threading.Condition()
+        self.idle = deque()  # (连接, 最近归还时间)
+        self.open_count = 0
+
+        # 统计信息
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.exhausted = 0
+        self.created = 0
+        self.evicted = 0
+        self.health_check_failures = 0
+
+    def _evict_idle(self, now: float) -> list:
+        """取出空闲过久的连接（需持有锁），返回待关闭的连接"""
+        expired = []
+        while self.idle and now - self.idle[0][1] > self.max_idle:
+            expired.append(self.idle.popleft()[0])
+            self.open_count -= 1
+            self.evicted += 1
+        return expired
+
+    @staticmethod
+    def _close(connections):
+        """关闭连接，忽略错误"""
+        for connection in connections:
+            try:
+                connection.close()
+            except Error:
+                pass
+
+    def _healthy(self, connection, idle_since: float) -> bool:
+        """借出前的健康检查：空闲超过 ping_interval 时 ping 一次"""
+        if time.monotonic() - idle_since < self.ping_interval:
+            return True
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Error:
+            self.health_check_failures += 1
+            return False
+
+    def acquire(self):
+        """借出一个连接"""
+        start = time.monotonic()
+        deadline = start + self.checkout_timeout
+        waited = False
+        while True:
+            with self.condition:
+                expired = self._evict_idle(time.monotonic())
+                entry = None
+                create = False
+                while True:
+                    if self.idle:
+                        entry = self.idle.pop()
+                        break
+                    if self.open_count < self.size:
+                        self.open_count += 1
+                        create = True
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.exhausted += 1
+                        self._close(expired)
+                        raise PoolError(f"连接池已耗尽（{self.size} 个连接均在使用中）")
+                    waited = True
+                    self.condition.wait(remaining)
+
+            self._close(expired)
+            if create:
+                try:
+                    connection = mysql.connector.connect(**self.config)
+                except Error:
+                    with self.condition:
+                        self.open_count -= 1
+                        self.condition.notify()
+                    raise
+                self.created += 1
+            else:
+                connection, idle_since = entry
+                if not self._healthy(connection, idle_since):
+                    self._discard(connection)
+                    continue
+
+            wait_time = time.monotonic() - start
+            with self.condition:
+                self.checkouts += 1
+                if waited:
+                    self.waits += 1
+                self.wait_time_total += wait_time
+                self.wait_time_max = max(self.wait_time_max, wait_time)
+            return connection
+
+    def _discard(self, connection):
+        """关闭并移除一个连接"""
+        self._close([connection])
+        with self.condition:
+            self.open_count -= 1
+            self.condition.notify()
+
+    def release(self, connection, broken: bool = False):
+        """归还连接；连接已损坏时直接关闭"""
+        if not broken:
+            try:
+                if connection.unread_result:
+                    connection.consume_results()
+                if connection.in_transaction:
+                    connection.rollback()
+            except Error:
+                broken = True
+        if broken:
+            self._discard(connection)
+            return
+        with self.condition:
+            self.idle.append((connection, time.monotonic()))
+            self.condition.notify()
+
+    def close_all(self):
+        """关闭所有空闲连接"""
+        with self.condition:
+            connections = [connection for connection, _ in self.idle]
+            self.idle.clear()
+            self.open_count -= len(connections)
+        self._close(connections)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """连接池统计信息"""
+        with self.condition:
+            idle = len(self.idle)
+            return {
+                'size': self.size,
+                'open': self.open_count,
+                'idle': idle,
+                'in_use': self.open_count - idle,
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'wait_time_avg_ms': round(self.wait_time_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'wait_time_max_ms': round(self.wait_time_max * 1000, 3),
+                'exhausted': self.exhausted,
+                'created': self.created,
+                'evicted': self.evicted,
+                'health_check_failures': self.health_check_failures
+            }
+
+
 class DatabaseConfig:
     """数据库配置类"""
     
@@ -18,24 +184,33 @@ class DatabaseConfig:
             'user': os.getenv('DB_USER', 'pv_app'),
             'password': os.getenv('DB_PASSWORD', 'your_secure_password'),
             'charset': 'utf8mb4',
-            'autocommit': True
+            'autocommit': True,
+            'connection_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 5))
         }
+        self.pool = ConnectionPool(
+            self.config,
+            size=int(os.getenv('DB_POOL_SIZE', 10)),
+            checkout_timeout=float(os.getenv('DB_POOL_TIMEOUT', 5)),
+            max_idle=float(os.getenv('DB_POOL_MAX_IDLE', 300)),
+            ping_interval=float(os.getenv('DB_POOL_PING_INTERVAL', 30))
+        )
     
     @contextmanager
     def get_connection(self):
-        """获取数据库连接的上下文管理器"""
-        connection = None
+        """从连接池借出数据库连接的上下文管理器"""
+        connection = self.pool.acquire()
+        broken = False
         try:
-            connection = mysql.connector.connect(**self.config)
             yield connection
-        except Error as e:
+        except (InterfaceError, OperationalError) as e:
             print(f"数据库连接错误: {e}")
-            if connection:
-                connection.rollback()
+            broken = True
+            raise
+        except Error as e:
+            print(f"数据库错误: {e}")
             raise
         finally:
-            if connection and connection.is_connected():
-                connection.close()
+            self.pool.release(connection, broken)
     
     def test_connection(self):
         """测试数据库连接"""
@@ -48,5 +223,9 @@ class DatabaseConfig:
         except Error:
             return False
 
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """获取连接池统计信息"""
+        return self.pool.get_stats()
+
 # 全局数据库配置实例
-db_config = DatabaseConfig()
\ No newline at end of file
+db_config = DatabaseConfig()
@@ -0,0 +1,67 @@
+# gunicorn 生产环境配置：gunicorn -c gunicorn.conf.py wsgi:app
+#
+# 主进程在派生工作进程之前启动唯一的采样进程，工作进程通过本地套接字读取快照，
+# 请求吞吐随工作进程数增加，而采集开销保持不变。
+import os
+import re
+import sys
+import secrets
+import subprocess
+import multiprocessing
+from gunicorn.glogging import Logger
+
+# 访问日志中需要隐去的查询参数（推送接口的连接票据，以及旧版客户端仍可能携带的JWT）
+SECRET_QUERY_PARAMS = re.compile(r'((?:^|[?&])(?:ticket|token)=)[^&\s]*')
+
+
+class ScrubbingLogger(Logger):
+    """写访问日志前隐去URL中的认证参数"""
+
+    def atoms(self, resp, req, environ, request_time):
+        atoms = super().atoms(resp, req, environ, request_time)
+        for key in ('r', 'q'):
+            if atoms.get(key):
+                atoms[key] = SECRET_QUERY_PARAMS.sub(r'\1***', atoms[key])
+        return atoms
+
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5001')
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+# 推送接口（SSE）每个连接占用一个线程，使用多线程工作进程
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 16))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 10
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+logger_class = ScrubbingLogger
+preload_app = False
+
+_sampler = None
+
+
+def on_starting(server):
+    """启动采样进程，并通过环境变量把监控模式和连接密钥传给工作进程"""
+    global _sampler
+    # 工作进程不各自采集，统一从采样进程读取快照；只在 gunicorn 下设置，导入 wsgi 本身没有副作用
+    os.environ['MONITOR_MODE'] = 'remote'
+    os.environ.setdefault('MONITOR_AUTHKEY', secrets.token_hex(16))
+    if os.getenv('MONITOR_EXTERNAL_SAMPLER') == '1':
+        # 采样进程由外部单独运行（python sampler_service.py）
+        return
+
+    # 以独立的解释器运行采样进程，不继承主进程的状态，也不会被工作进程在退出时误回收
+    _sampler = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sampler_service.py')],
+        env=os.environ.copy()
+    )
+    server.log.info(f"采样进程已启动 (pid: {_sampler.pid})")
+
+
+def on_exit(server):
+    """停止采样进程"""
+    if _sampler is not None and _sampler.poll() is None:
+        _sampler.terminate()
+        try:
+            _sampler.wait(10)
+        except subprocess.TimeoutExpired:
+            _sampler.kill()
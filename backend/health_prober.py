@@ -0,0 +1,132 @@
+import os
+import time
+import threading
+from typing import Dict, Any, Callable, Optional
+from database import DatabaseConfig
+from system_monitor import SystemMonitor
+
+
+class HealthProber:
+    """后台健康探测
+
+    按固定周期在后台线程中检查数据库可达性和采集线程存活情况，/api/health 只读取缓存的结果，
+    探测请求再多，数据库的开销也保持不变。深度检查会同步探测一次，但两次深度检查之间至少间隔
+    deep_min_interval 秒，期间返回缓存结果。
+    """
+
+    def __init__(self, database: DatabaseConfig, monitor: SystemMonitor,
+                 monitor_alive: Callable[[], bool], interval: float = 10.0,
+                 deep_min_interval: float = 5.0, stale_after: float = 30.0):
+        self.database = database
+        self.monitor = monitor
+        self.monitor_alive = monitor_alive
+        self.interval = interval
+        self.deep_min_interval = deep_min_interval
+        self.stale_after = stale_after
+        self.lock = threading.Lock()
+        self.probe_lock = threading.Lock()  # 同一时间只进行一次探测
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self._result: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0  # 单调时钟
+
+    @classmethod
+    def from_env(cls, database: DatabaseConfig, monitor: SystemMonitor,
+                 monitor_alive: Callable[[], bool]) -> 'HealthProber':
+        """根据环境变量创建"""
+        return cls(
+            database, monitor, monitor_alive,
+            interval=float(os.getenv('HEALTH_PROBE_INTERVAL', 10)),
+            deep_min_interval=float(os.getenv('HEALTH_DEEP_MIN_INTERVAL', 5)),
+            stale_after=float(os.getenv('HEALTH_MONITOR_STALE_AFTER', 30))
+        )
+
+    def _check_database(self) -> Dict[str, Any]:
+        """检查数据库可达性"""
+        start = time.perf_counter()
+        try:
+            connected = self.database.test_connection()
+            error = None if connected else '连接测试失败'
+        except Exception as e:
+            connected = False
+            error = str(e)
+        result = {
+            'status': 'connected' if connected else 'disconnected',
+            'latency_ms': round((time.perf_counter() - start) * 1000, 3)
+        }
+        if error:
+            result['error'] = error
+        return result
+
+    def _check_monitor(self) -> Dict[str, Any]:
+        """检查采集线程是否存活且仍在循环"""
+        liveness = self.monitor.get_liveness()
+        age = liveness['last_cycle_age']
+        alive = self.monitor_alive() and liveness['running'] and age is not None and age <= self.stale_after
+        return dict(liveness, thread_alive=self.monitor_alive(), status='alive' if alive else 'stalled')
+
+    def _probe(self) -> Dict[str, Any]:
+        """执行一次探测并更新缓存（需持有探测锁）"""
+        database = self._check_database()
+        monitor = self._check_monitor()
+        healthy = database['status'] == 'connected' and monitor['status'] == 'alive'
+        result = {
+            'status': 'healthy' if healthy else 'unhealthy',
+            'database': database['status'],
+            'checks': {
+                'database': database,
+                'monitor': monitor
+            },
+            'pool': self.database.get_pool_stats(),
+            'checked_at': time.time()
+        }
+        with self.lock:
+            self._result = result
+            self._checked_at = time.monotonic()
+        return result
+
+    def probe(self) -> Dict[str, Any]:
+        """执行一次探测并更新缓存"""
+        with self.probe_lock:
+            return self._probe()
+
+    def get(self) -> Dict[str, Any]:
+        """获取缓存的探测结果及其时长"""
+        with self.lock:
+            result, checked_at = self._result, self._checked_at
+        if result is None:
+            return {'status': 'starting', 'database': 'unknown', 'age': None, 'timestamp': time.time()}
+        return dict(result, age=round(time.monotonic() - checked_at, 3), timestamp=time.time())
+
+    def deep_check(self) -> Dict[str, Any]:
+        """同步探测一次；距上次探测不足 deep_min_interval 秒时返回缓存结果"""
+        with self.lock:
+            recent = self._result is not None and time.monotonic() - self._checked_at < self.deep_min_interval
+        # 已有探测正在进行时同样返回缓存结果，不叠加数据库请求
+        if recent or not self.probe_lock.acquire(blocking=False):
+            return dict(self.get(), deep=False, rate_limited=True)
+        try:
+            self._probe()
+        finally:
+            self.probe_lock.release()
+        return dict(self.get(), deep=True)
+
+    def _run(self):
+        """后台探测循环"""
+        while not self.stop_event.is_set():
+            try:
+                self.probe()
+            except Exception as e:
+                print(f"健康探测出错: {e}")
+            self.stop_event.wait(self.interval)
+
+    def start(self):
+        """启动后台探测线程"""
+        if self.thread is None or not self.thread.is_alive():
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, name='health-prober', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """停止后台探测"""
+        self.stop_event.set()
@@ -0,0 +1,52 @@
+import time
+import threading
+from typing import Dict, Any, Optional
+from system_detector import SystemDetector
+from monitors.base_monitor import BaseSystemMonitor
+
+
+class HostFactsCache:
+    """主机静态信息缓存
+
+    CPU型号、厂商、核心/线程数以及平台信息在运行期间基本不变，只采集一次并缓存，
+    在显式失效或检测到CPU热插拔（在线CPU数量变化）时重新采集。在线CPU数量由监控器提供，
+    容器中读取的是宿主机的数量。
+    """
+
+    def __init__(self, monitor: BaseSystemMonitor):
+        self.monitor = monitor
+        self.lock = threading.Lock()
+        self._facts: Optional[Dict[str, Any]] = None
+        self._online_cpus = self.monitor.online_cpu_count()
+
+    def _collect(self) -> Dict[str, Any]:
+        """采集主机静态信息"""
+        return {
+            'cpu': self.monitor.get_static_cpu_info(),
+            'platform': SystemDetector.detect_system(),
+            'monitor_class': self.monitor.__class__.__name__,
+            'collected_at': time.time()
+        }
+
+    def get(self) -> Dict[str, Any]:
+        """获取主机静态信息，未缓存时采集"""
+        with self.lock:
+            if self._facts is None:
+                self._facts = self._collect()
+                self._online_cpus = self.monitor.online_cpu_count()
+            return self._facts
+
+    def invalidate(self):
+        """使缓存失效，下次访问时重新采集"""
+        with self.lock:
+            self._facts = None
+
+    def check_hotplug(self) -> bool:
+        """检测在线CPU数量是否变化，变化时使缓存失效"""
+        online_cpus = self.monitor.online_cpu_count()
+        if online_cpus != self._online_cpus:
+            print(f"检测到CPU数量变化: {self._online_cpus} -> {online_cpus}")
+            self._online_cpus = online_cpus
+            self.invalidate()
+            return True
+        return False
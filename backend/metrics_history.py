@@ -0,0 +1,197 @@
+import math
+from array import array
+from typing import Dict, Any, List, Optional, Iterable
+
+# 历史数据中保存的定宽数值列
+HISTORY_COLUMNS = (
+    'timestamp',
+    'timestamp_monotonic',
+    'cpu_percent',
+    'memory_percent',
+    'swap_percent',
+    'disk_read_bytes',
+    'disk_write_bytes',
+    'net_bytes_sent',
+    'net_bytes_recv',
+    'disk_read_bytes_per_sec',
+    'disk_write_bytes_per_sec',
+    'net_bytes_sent_per_sec',
+    'net_bytes_recv_per_sec',
+    'load_1min',
+    'load_5min',
+    'load_15min',
+    'catchup'
+)
+
+NAN = float('nan')
+
+
+def _number(value) -> float:
+    """转换为浮点数，缺失或无效时返回 NaN"""
+    try:
+        return float(value) if value is not None else NAN
+    except (TypeError, ValueError):
+        return NAN
+
+
+def extract_metrics(snapshot: Dict[str, Any], timestamp: float) -> Dict[str, float]:
+    """从快照中提取历史数据各列的数值"""
+    cpu = snapshot.get('cpu') or {}
+    memory = snapshot.get('memory') or {}
+    virtual = memory.get('virtual') or memory  # macOS监控器的内存数据没有 virtual 层级
+    swap = memory.get('swap') or {}
+    disk_io = (snapshot.get('disk') or {}).get('io') or {}
+    net_io = (snapshot.get('network') or {}).get('io') or {}
+    load_avg = (snapshot.get('load') or {}).get('load_avg') or {}
+
+    return {
+        'timestamp': timestamp,
+        'timestamp_monotonic': _number(snapshot.get('timestamp_monotonic')),
+        'cpu_percent': _number(cpu.get('percent')),
+        'memory_percent': _number(virtual.get('percent')),
+        'swap_percent': _number(swap.get('percent')),
+        'disk_read_bytes': _number(disk_io.get('read_bytes')),
+        'disk_write_bytes': _number(disk_io.get('write_bytes')),
+        'net_bytes_sent': _number(net_io.get('bytes_sent')),
+        'net_bytes_recv': _number(net_io.get('bytes_recv')),
+        'disk_read_bytes_per_sec': _number(disk_io.get('read_bytes_per_sec')),
+        'disk_write_bytes_per_sec': _number(disk_io.get('write_bytes_per_sec')),
+        'net_bytes_sent_per_sec': _number(net_io.get('bytes_sent_per_sec')),
+        'net_bytes_recv_per_sec': _number(net_io.get('bytes_recv_per_sec')),
+        'load_1min': _number(load_avg.get('1min')),
+        'load_5min': _number(load_avg.get('5min')),
+        'load_15min': _number(load_avg.get('15min')),
+        # 超时后用下一次真实采样补齐的行由 SystemMonitor.record_catchup 标记为1
+        'catchup': 0.0
+    }
+
+
+def select_columns(names: Iterable[str], fields: Optional[str] = None,
+                   exclude: Optional[str] = None) -> List[str]:
+    """按逗号分隔的 fields/exclude 选择列；汇总列（如 cpu_percent_avg、net_bytes_sent_last）按指标名匹配，时间戳和样本数始终保留"""
+    wanted = {name.strip() for name in fields.split(',') if name.strip()} if fields else None
+    unwanted = {name.strip() for name in exclude.split(',') if name.strip()} if exclude else set()
+    selected = []
+    for name in names:
+        base = name.rsplit('_', 1)[0] if name.endswith(('_min', '_avg', '_max', '_last')) else name
+        if name in ('timestamp', 'count'):
+            selected.append(name)
+        elif (wanted is None or name in wanted or base in wanted) and \
+                name not in unwanted and base not in unwanted:
+            selected.append(name)
+    return selected
+
+
+def _to_list(values: Iterable[float]) -> List[Optional[float]]:
+    """转换为列表，NaN 转为 None 以便序列化为合法JSON"""
+    return [None if math.isnan(v) else v for v in values]
+
+
+class MetricsRingBuffer:
+    """列式环形缓冲区
+
+    每个指标一列，预先分配定长的 array('d')；每核心使用率按 array('f') 以 容量×核心数 平铺存储。
+    追加只写入固定位置，读取按时间切片，不再保存完整的嵌套快照字典。
+    """
+
+    def __init__(self, capacity: int, columns: Iterable[str] = HISTORY_COLUMNS):
+        self.capacity = max(1, int(capacity))
+        self.column_names = tuple(columns)
+        self.columns = {name: array('d', [NAN]) * self.capacity for name in self.column_names}
+        self.core_count = 0
+        self.per_cpu = array('f')
+        self.head = 0  # 下一次写入的位置
+        self.size = 0
+
+    def _resize_cores(self, core_count: int):
+        """核心数变化（如CPU热插拔）时重新分配每核心存储，已有的每核心历史作废"""
+        self.core_count = core_count
+        self.per_cpu = array('f', [NAN]) * (self.capacity * core_count)
+
+    def append(self, row: Dict[str, float], per_cpu: Optional[List[float]] = None):
+        """追加一行数据"""
+        position = self.head
+        for name in self.column_names:
+            self.columns[name][position] = row.get(name, NAN)
+
+        per_cpu = per_cpu or []
+        if len(per_cpu) != self.core_count:
+            self._resize_cores(len(per_cpu))
+        if self.core_count:
+            offset = position * self.core_count
+            self.per_cpu[offset:offset + self.core_count] = array('f', per_cpu)
+
+        self.head = (position + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _physical(self, index: int) -> int:
+        """逻辑下标（0为最早的一行）转换为物理位置"""
+        return (self.head - self.size + index) % self.capacity
+
+    def _segments(self, start: int, stop: int) -> List[tuple]:
+        """将逻辑区间 [start, stop) 转换为最多两段物理区间"""
+        if stop <= start:
+            return []
+        first = self._physical(start)
+        count = stop - start
+        if first + count <= self.capacity:
+            return [(first, first + count)]
+        return [(first, self.capacity), (0, first + count - self.capacity)]
+
+    def _bisect(self, timestamp: float) -> int:
+        """二分查找第一个时间戳不小于 timestamp 的逻辑下标"""
+        times = self.columns['timestamp']
+        low, high = 0, self.size
+        while low < high:
+            mid = (low + high) // 2
+            if times[self._physical(mid)] < timestamp:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def slice(self, start: int, stop: int, columns: Optional[Iterable[str]] = None,
+              include_per_cpu: bool = True) -> Dict[str, Any]:
+        """按逻辑下标切片，返回 列名 -> 数值列表"""
+        segments = self._segments(max(0, start), min(stop, self.size))
+        result = {}
+        for name in (columns or self.column_names):
+            column = self.columns[name]
+            values = []
+            for begin, end in segments:
+                values.extend(_to_list(column[begin:end]))
+            result[name] = values
+        if include_per_cpu:
+            cores = self.core_count
+            per_cpu = []
+            for begin, end in segments:
+                if not cores:
+                    per_cpu.extend([] for _ in range(begin, end))
+                    continue
+                flat = _to_list(self.per_cpu[begin * cores:end * cores])
+                per_cpu.extend(flat[i:i + cores] for i in range(0, len(flat), cores))
+            result['per_cpu'] = per_cpu
+        return result
+
+    def tail(self, limit: int, **kwargs) -> Dict[str, Any]:
+        """获取最近 limit 行"""
+        return self.slice(self.size - max(0, limit), self.size, **kwargs)
+
+    def range(self, start_time: Optional[float] = None, end_time: Optional[float] = None,
+              **kwargs) -> Dict[str, Any]:
+        """获取时间区间 [start_time, end_time] 内的数据"""
+        start = self._bisect(start_time) if start_time is not None else 0
+        stop = self._bisect(math.nextafter(end_time, math.inf)) if end_time is not None else self.size
+        return self.slice(start, stop, **kwargs)
+
+    def oldest_timestamp(self) -> Optional[float]:
+        """最早一行的时间戳，缓冲区为空时返回 None"""
+        return self.columns['timestamp'][self._physical(0)] if self.size else None
+
+    def memory_bytes(self) -> int:
+        """缓冲区占用的字节数"""
+        return sum(col.itemsize * len(col) for col in self.columns.values()) + \
+            self.per_cpu.itemsize * len(self.per_cpu)
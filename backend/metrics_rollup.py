@@ -0,0 +1,212 @@
+import math
+from typing import Dict, Any, List, Optional, Tuple
+from metrics_history import MetricsRingBuffer, HISTORY_COLUMNS, NAN
+
+# 累计计数器（磁盘/网络字节总数）：min/avg/max 对其没有意义，汇总时只取桶内最后一个值，速率由 *_per_sec 列汇总
+COUNTER_METRICS = ('disk_read_bytes', 'disk_write_bytes', 'net_bytes_sent', 'net_bytes_recv')
+# 按 min/avg/max 汇总的瞬时值和速率指标（不含时间戳和计数器）
+ROLLUP_METRICS = tuple(
+    name for name in HISTORY_COLUMNS
+    if name not in ('timestamp', 'timestamp_monotonic', 'catchup') + COUNTER_METRICS
+)
+
+# 汇总层级：(名称, 分辨率秒数, 保留的桶数)
+DEFAULT_TIERS = (
+    ('10s', 10, 8640),     # 1天
+    ('1min', 60, 10080),   # 7天
+    ('10min', 600, 4320)   # 30天
+)
+
+AGGREGATES = ('min', 'avg', 'max')
+
+
+def rollup_columns() -> Tuple[str, ...]:
+    """汇总层级的列：桶起始时间、样本数、每个指标的 min/avg/max 以及每个计数器的最后一个值"""
+    columns = ['timestamp', 'count']
+    for metric in ROLLUP_METRICS:
+        columns.extend(f"{metric}_{agg}" for agg in AGGREGATES)
+    columns.extend(f"{metric}_last" for metric in COUNTER_METRICS)
+    return tuple(columns)
+
+
+class _Bucket:
+    """正在累积的时间桶"""
+
+    __slots__ = ('start', 'count', 'mins', 'maxs', 'sums', 'counts', 'lasts')
+
+    def __init__(self, start: float):
+        self.start = start
+        self.count = 0
+        self.mins = {}
+        self.maxs = {}
+        self.sums = {}
+        self.counts = {}
+        self.lasts = {}
+
+    def add(self, row: Dict[str, float]):
+        """按时间顺序累加一行数据，NaN 不参与统计"""
+        self.count += 1
+        for metric in COUNTER_METRICS:
+            value = row.get(metric, NAN)
+            if not math.isnan(value):
+                self.lasts[metric] = value
+        for metric in ROLLUP_METRICS:
+            value = row.get(metric, NAN)
+            if math.isnan(value):
+                continue
+            if metric in self.sums:
+                self.mins[metric] = min(self.mins[metric], value)
+                self.maxs[metric] = max(self.maxs[metric], value)
+                self.sums[metric] += value
+                self.counts[metric] += 1
+            else:
+                self.mins[metric] = self.maxs[metric] = self.sums[metric] = value
+                self.counts[metric] = 1
+
+    def to_row(self) -> Dict[str, float]:
+        """转换为汇总层级中的一行"""
+        row = {'timestamp': self.start, 'count': float(self.count)}
+        for metric in ROLLUP_METRICS:
+            if metric in self.sums:
+                row[f"{metric}_min"] = self.mins[metric]
+                row[f"{metric}_avg"] = self.sums[metric] / self.counts[metric]
+                row[f"{metric}_max"] = self.maxs[metric]
+        for metric, value in self.lasts.items():
+            row[f"{metric}_last"] = value
+        return row
+
+
+class RollupTier:
+    """单个汇总层级：按固定分辨率增量累积，桶结束时写入列式环形缓冲区"""
+
+    def __init__(self, name: str, resolution: int, capacity: int):
+        self.name = name
+        self.resolution = resolution
+        self.buffer = MetricsRingBuffer(capacity, rollup_columns())
+        self.bucket: Optional[_Bucket] = None
+
+    def add(self, row: Dict[str, float]):
+        """加入一个原始样本"""
+        start = math.floor(row['timestamp'] / self.resolution) * self.resolution
+        if self.bucket is not None and start != self.bucket.start:
+            self.buffer.append(self.bucket.to_row())
+            self.bucket = None
+        if self.bucket is None:
+            self.bucket = _Bucket(start)
+        self.bucket.add(row)
+
+    def oldest_timestamp(self) -> Optional[float]:
+        """该层级在内存中覆盖的最早时间"""
+        oldest = self.buffer.oldest_timestamp()
+        if oldest is None and self.bucket is not None:
+            return self.bucket.start
+        return oldest
+
+    def query(self, start_time: Optional[float], end_time: Optional[float]) -> Dict[str, List]:
+        """获取时间区间内的已完成桶，以及尚未结束的当前桶"""
+        begin = None if start_time is None else math.floor(start_time / self.resolution) * self.resolution
+        data = self.buffer.range(begin, end_time, include_per_cpu=False)
+        bucket = self.bucket
+        if bucket is not None and (begin is None or bucket.start >= begin) and \
+                (end_time is None or bucket.start <= end_time):
+            row = bucket.to_row()
+            for name in data:
+                data[name].append(row.get(name))
+        return data
+
+
+def rollup_raw(data: Dict[str, List], step: float) -> Dict[str, List]:
+    """将按列返回的原始样本按 step 汇总为与汇总层级相同的列，用于比最细的层级更细的步长"""
+    columns = {name: [] for name in rollup_columns()}
+    bucket: Optional[_Bucket] = None
+
+    def flush():
+        row = bucket.to_row()
+        for name, values in columns.items():
+            values.append(row.get(name))
+
+    names = [name for name in data if name != 'per_cpu']
+    for i, timestamp in enumerate(data.get('timestamp', [])):
+        start = math.floor(timestamp / step) * step
+        if bucket is not None and start != bucket.start:
+            flush()
+            bucket = None
+        if bucket is None:
+            bucket = _Bucket(start)
+        bucket.add({name: NAN if data[name][i] is None else data[name][i] for name in names})
+    if bucket is not None:
+        flush()
+    return columns
+
+
+def _rebucket(data: Dict[str, List], resolution: int, step: int) -> Dict[str, List]:
+    """将某一层级的数据按更粗的 step 重新合并（min取最小、max取最大、avg按样本数加权、计数器取最后一个值）"""
+    if step <= resolution or not data.get('timestamp'):
+        return data
+
+    merged = {name: [] for name in data}
+    group_start = None
+    group_rows: List[int] = []
+
+    def flush():
+        if not group_rows:
+            return
+        merged['timestamp'].append(group_start)
+        counts = [data['count'][i] or 0 for i in group_rows]
+        merged['count'].append(sum(counts))
+        for metric in ROLLUP_METRICS:
+            mins = [data[f"{metric}_min"][i] for i in group_rows if data[f"{metric}_min"][i] is not None]
+            maxs = [data[f"{metric}_max"][i] for i in group_rows if data[f"{metric}_max"][i] is not None]
+            weighted = [(data[f"{metric}_avg"][i], counts[n]) for n, i in enumerate(group_rows)
+                        if data[f"{metric}_avg"][i] is not None]
+            total = sum(count for _, count in weighted)
+            merged[f"{metric}_min"].append(min(mins) if mins else None)
+            merged[f"{metric}_max"].append(max(maxs) if maxs else None)
+            merged[f"{metric}_avg"].append(sum(v * c for v, c in weighted) / total if total else None)
+        for metric in COUNTER_METRICS:
+            lasts = [data[f"{metric}_last"][i] for i in group_rows if data[f"{metric}_last"][i] is not None]
+            merged[f"{metric}_last"].append(lasts[-1] if lasts else None)
+
+    for i, timestamp in enumerate(data['timestamp']):
+        start = math.floor(timestamp / step) * step
+        if start != group_start:
+            flush()
+            group_start = start
+            group_rows = []
+        group_rows.append(i)
+    flush()
+    return merged
+
+
+class MetricsRollups:
+    """多分辨率汇总
+
+    原始样本（1秒级）保存在 SystemMonitor 的环形缓冲区中，这里在样本到达时增量维护
+    10秒、1分钟、10分钟三个层级的 min/avg/max（计数器取最后一个值），查询时选择满足 step 的最粗层级；
+    step 小于最细的层级时由调用方用 rollup_raw 从原始样本汇总。
+    """
+
+    def __init__(self, tiers=DEFAULT_TIERS):
+        self.tiers = [RollupTier(name, resolution, capacity) for name, resolution, capacity in tiers]
+
+    def add(self, row: Dict[str, float]):
+        """加入一个原始样本"""
+        for tier in self.tiers:
+            tier.add(row)
+
+    def select_tier(self, step: float) -> Optional[RollupTier]:
+        """选择分辨率不超过 step 的最粗层级（越粗的层级保留时间越长、点数越少），都不满足时返回 None（由原始样本汇总）"""
+        candidates = [tier for tier in self.tiers if tier.resolution <= step]
+        return max(candidates, key=lambda t: t.resolution) if candidates else None
+
+    def query(self, tier: RollupTier, start_time: Optional[float], end_time: Optional[float],
+              step: Optional[float] = None) -> Dict[str, Any]:
+        """查询某一层级，必要时按 step 再次合并"""
+        data = tier.query(start_time, end_time)
+        if step:
+            data = _rebucket(data, tier.resolution, int(step))
+        return {
+            'tier': tier.name,
+            'resolution': max(tier.resolution, int(step or 0)),
+            'columns': data
+        }
@@ -0,0 +1,318 @@
+import os
+import math
+import time
+import sqlite3
+import threading
+import logging
+from urllib.parse import quote
+from array import array
+from typing import Dict, Any, List, Optional
+from metrics_history import HISTORY_COLUMNS, NAN
+from metrics_rollup import ROLLUP_METRICS, COUNTER_METRICS, rollup_columns
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'metrics.db')
+
+
+class MetricsStore:
+    """本地持久化的指标存储
+
+    使用 SQLite（WAL模式），按时间分段：每个分段（默认一天）一张只追加的表，
+    过期数据按分段整表删除，不需要逐行 DELETE。采样先在内存中缓冲，达到批量大小或
+    刷新间隔后在一个事务中批量写入，使持久化对每次采集几乎没有额外开销。
+    缓冲区由单独的短锁保护；查询使用各线程自己的只读连接，不持有写锁，也不为查询刷新缓冲，
+    长时间的区间查询不会阻塞采样线程的写入，查询耗时也不受批量写入的影响。
+    每次查询最多返回 max_points 个点。
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, batch_size: int = 60, flush_interval: float = 10.0,
+                 retention_days: float = 14, segment_seconds: int = 86400, max_points: int = 10000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_points = max_points
+        self.retention = retention_days * 86400
+        self.segment_seconds = segment_seconds
+        # 写连接和分段列表
+        self.lock = threading.Lock()
+        # 内存中的待写入缓冲
+        self.pending_lock = threading.Lock()
+        self.pending: List[tuple] = []
+        self.last_flush = time.monotonic()
+        self.last_compaction = 0.0
+        self.local = threading.local()
+        self.readers: List[sqlite3.Connection] = []
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.segments = sorted(
+            int(name[len('samples_'):])
+            for (name,) in self.conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'samples_%'"
+            )
+        )
+        self._migrate()
+
+    def _migrate(self):
+        """为旧版本创建的分段表补上新增的列"""
+        for segment in self.segments:
+            existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info(samples_{segment})")}
+            for name in HISTORY_COLUMNS:
+                if name not in existing:
+                    self.conn.execute(f"ALTER TABLE samples_{segment} ADD COLUMN {name} REAL")
+
+    @classmethod
+    def from_env(cls) -> Optional['MetricsStore']:
+        """根据环境变量创建存储，METRICS_DB_PATH 设为空字符串时禁用持久化"""
+        path = os.getenv('METRICS_DB_PATH', DEFAULT_DB_PATH)
+        if not path:
+            return None
+        try:
+            return cls(
+                path,
+                batch_size=int(os.getenv('METRICS_BATCH_SIZE', 60)),
+                flush_interval=float(os.getenv('METRICS_FLUSH_INTERVAL', 10)),
+                retention_days=float(os.getenv('METRICS_RETENTION_DAYS', 14)),
+                max_points=int(os.getenv('METRICS_MAX_POINTS', 10000))
+            )
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"初始化指标存储失败，历史数据将不会持久化: {e}")
+            return None
+
+    def _segment_of(self, timestamp: float) -> int:
+        """时间戳所属分段的起始时间"""
+        return int(timestamp // self.segment_seconds) * self.segment_seconds
+
+    def _ensure_segment(self, segment: int):
+        """创建分段表（需持有锁）"""
+        if segment in self.segments:
+            return
+        columns = ', '.join(f"{name} REAL" for name in HISTORY_COLUMNS)
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS samples_{segment} ({columns}, per_cpu BLOB)")
+        self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_samples_{segment} ON samples_{segment} (timestamp)")
+        self.segments.append(segment)
+        self.segments.sort()
+
+    def append(self, row: Dict[str, float], per_cpu: Optional[List[float]] = None):
+        """缓冲一行采样，达到批量大小或刷新间隔时批量写入"""
+        values = tuple(row.get(name, NAN) for name in HISTORY_COLUMNS)
+        blob = array('f', per_cpu or []).tobytes()
+        with self.pending_lock:
+            self.pending.append(values + (blob,))
+            due = len(self.pending) >= self.batch_size or \
+                time.monotonic() - self.last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        """将缓冲的采样在一个事务中写入"""
+        with self.lock:
+            with self.pending_lock:
+                rows, self.pending = self.pending, []
+                self.last_flush = time.monotonic()
+            if not rows:
+                return
+            try:
+                by_segment: Dict[int, List[tuple]] = {}
+                for values in rows:
+                    by_segment.setdefault(self._segment_of(values[0]), []).append(values)
+                placeholders = ', '.join('?' * (len(HISTORY_COLUMNS) + 1))
+                # 显式列出列名：迁移补上的列位于 per_cpu 之后
+                self.conn.execute('BEGIN')
+                for segment, segment_rows in by_segment.items():
+                    self._ensure_segment(segment)
+                    self.conn.executemany(f"INSERT INTO samples_{segment} ({', '.join(HISTORY_COLUMNS)}, per_cpu) "
+                                            f"VALUES ({placeholders})", segment_rows)
+                self.conn.execute('COMMIT')
+            except sqlite3.Error as e:
+                logger.error(f"写入指标存储失败，丢弃 {len(rows)} 条采样: {e}")
+                if self.conn.in_transaction:
+                    self.conn.execute('ROLLBACK')
+                return
+        if time.time() - self.last_compaction >= 3600:
+            self.compact()
+
+    def compact(self, now: Optional[float] = None):
+        """删除整体超出保留期限的分段"""
+        now = time.time() if now is None else now
+        cutoff = now - self.retention
+        with self.lock:
+            self.last_compaction = now
+            expired = [segment for segment in self.segments if segment + self.segment_seconds <= cutoff]
+            for segment in expired:
+                try:
+                    self.conn.execute(f"DROP TABLE IF EXISTS samples_{segment}")
+                    self.segments.remove(segment)
+                except sqlite3.Error as e:
+                    logger.error(f"删除过期分段 samples_{segment} 失败: {e}")
+        if expired:
+            logger.info(f"已删除 {len(expired)} 个过期的指标分段")
+
+    def _reader(self) -> sqlite3.Connection:
+        """当前线程的只读连接（WAL模式下读取不阻塞写入，也不需要持有写锁）"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{quote(self.path)}?mode=ro", uri=True, check_same_thread=False)
+            with self.lock:
+                self.readers.append(conn)
+            self.local.conn = conn
+        return conn
+
+    def _read(self, segment: int, sql: str, params) -> List[tuple]:
+        """在只读连接上查询一个分段，分段在查询期间被过期删除时返回空结果"""
+        try:
+            return self._reader().execute(sql, params).fetchall()
+        except sqlite3.OperationalError:
+            if segment not in self.segments:
+                return []
+            raise
+
+    def _segments_in(self, start_time: Optional[float], end_time: Optional[float]) -> List[int]:
+        """与时间区间相交的分段"""
+        with self.lock:
+            segments = list(self.segments)
+        return [
+            segment for segment in segments
+            if (start_time is None or segment + self.segment_seconds > start_time)
+            and (end_time is None or segment <= end_time)
+        ]
+
+    @staticmethod
+    def _where(start_time: Optional[float], end_time: Optional[float]) -> tuple:
+        """构造时间条件"""
+        clauses, params = [], []
+        if start_time is not None:
+            clauses.append('timestamp >= ?')
+            params.append(start_time)
+        if end_time is not None:
+            clauses.append('timestamp <= ?')
+            params.append(end_time)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def query(self, start_time: Optional[float] = None, end_time: Optional[float] = None,
+              step: Optional[float] = None) -> Dict[str, Any]:
+        """按时间区间查询；指定 step（>1秒）时由SQLite按步长聚合出 min/avg/max
+
+        只返回已提交的数据，最近不超过 flush_interval 秒、仍在缓冲中的采样不在结果中。
+        区间按 step 计算超过 max_points 个点时自动加大步长，返回的 resolution 为实际使用的步长；
+        没有起点的原始查询最多返回 max_points 行，截断时 truncated 为 True。
+        """
+        if start_time is not None:
+            end = time.time() if end_time is None else end_time
+            minimum_step = math.ceil((end - start_time) / self.max_points)
+            if minimum_step > 1 and (not step or step < minimum_step):
+                step = minimum_step
+        where, params = self._where(start_time, end_time)
+        segments = self._segments_in(start_time, end_time)
+        truncated = False
+        if step and step > 1:
+            aggregates = ', '.join(
+                f"MIN({m}), AVG({m}), MAX({m})" for m in ROLLUP_METRICS
+            )
+            names = list(rollup_columns())
+            rows = []
+            lasts: Dict[float, list] = {}
+            for segment in segments:
+                rows.extend(self._read(
+                    segment,
+                    f"SELECT CAST(timestamp / ? AS INTEGER) * ? AS bucket, COUNT(*), {aggregates} "
+                    f"FROM samples_{segment}{where} GROUP BY bucket ORDER BY bucket",
+                    [step, step] + params
+                ))
+                # 计数器取桶内最后一个值：只有一个 MAX() 聚合时，SQLite 返回的其他列来自取得最大值的那一行；
+                # 跨越分段的桶以后一个分段的值为准
+                for bucket, _, *values in self._read(
+                    segment,
+                    f"SELECT CAST(timestamp / ? AS INTEGER) * ? AS bucket, MAX(timestamp), "
+                    f"{', '.join(COUNTER_METRICS)} FROM samples_{segment}{where} GROUP BY bucket",
+                    [step, step] + params
+                ):
+                    lasts[bucket] = values
+        else:
+            names = list(HISTORY_COLUMNS)
+            rows = []
+            for segment in segments:
+                remaining = self.max_points + 1 - len(rows)
+                if remaining <= 0:
+                    break
+                rows.extend(self._read(
+                    segment,
+                    f"SELECT {', '.join(HISTORY_COLUMNS)} FROM samples_{segment}{where} "
+                    f"ORDER BY timestamp LIMIT ?",
+                    params + [remaining]
+                ))
+            # 多读一行用于判断是否截断
+            truncated = len(rows) > self.max_points
+            del rows[self.max_points:]
+
+        if step and step > 1:
+            missing = [None] * len(COUNTER_METRICS)
+            rows = [row + tuple(lasts.get(row[0], missing)) for row in self._merge_buckets(rows)]
+        columns = {name: [] for name in names}
+        for row in rows:
+            for name, value in zip(names, row):
+                columns[name].append(None if value != value else value)
+        result = {
+            'tier': 'disk',
+            'resolution': step if step and step > 1 else 1,
+            'columns': columns
+        }
+        if truncated:
+            result['truncated'] = True
+        return result
+
+    @staticmethod
+    def _merge_buckets(rows: List[tuple]) -> List[tuple]:
+        """合并跨越分段边界的同一个桶（分段长度不是 step 的整数倍时出现）"""
+        merged: List[list] = []
+        for row in rows:
+            if not merged or merged[-1][0] != row[0]:
+                merged.append(list(row))
+                continue
+            last = merged[-1]
+            count_a, count_b = last[1], row[1]
+            last[1] = count_a + count_b
+            for i in range(2, len(row), 3):
+                mins = [v for v in (last[i], row[i]) if v is not None]
+                maxs = [v for v in (last[i + 2], row[i + 2]) if v is not None]
+                avgs = [(v, c) for v, c in ((last[i + 1], count_a), (row[i + 1], count_b)) if v is not None]
+                last[i] = min(mins) if mins else None
+                last[i + 2] = max(maxs) if maxs else None
+                last[i + 1] = sum(v * c for v, c in avgs) / sum(c for _, c in avgs) if avgs else None
+        return [tuple(row) for row in merged]
+
+    def load_recent(self, limit: int) -> List[tuple]:
+        """读取最近 limit 条已提交的原始采样，按时间升序返回 (列值字典, 每核心使用率)"""
+        rows = []
+        for segment in reversed(self._segments_in(None, None)):
+            remaining = limit - len(rows)
+            if remaining <= 0:
+                break
+            rows.extend(self._read(
+                segment,
+                f"SELECT {', '.join(HISTORY_COLUMNS)}, per_cpu FROM samples_{segment} "
+                f"ORDER BY timestamp DESC LIMIT ?",
+                (remaining,)
+            ))
+        rows.reverse()
+        return [
+            (
+                {name: (NAN if value is None else value) for name, value in zip(HISTORY_COLUMNS, row)},
+                array('f', row[-1] or b'').tolist()
+            )
+            for row in rows
+        ]
+
+    def close(self):
+        """写入剩余的采样并关闭数据库"""
+        self.flush()
+        with self.lock:
+            for reader in self.readers:
+                reader.close()
+            self.readers = []
+            self.conn.close()
@@ -1,9 +1,28 @@
+import time
+import psutil
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Optional
+from .nic_inventory import collect_addresses
 
 class BaseSystemMonitor(ABC):
     """系统监控器基类"""
     
+    # 可选的性能剖析器（提供 observe/increment 方法），由 SystemMonitor 设置
+    profiler = None
+    # 各采集项在本平台上的耗时预算（秒），覆盖调度器的默认值
+    collector_budgets: Dict[str, float] = {}
+    
+    def online_cpu_count(self) -> Optional[int]:
+        """在线CPU数量，主机信息缓存据此检测CPU热插拔"""
+        return psutil.cpu_count(logical=True)
+    
+    def get_static_cpu_info(self) -> Dict[str, Any]:
+        """获取不随时间变化的CPU信息（型号、核心数等），由主机信息缓存调用，子类可以扩展"""
+        return {
+            'count_logical': psutil.cpu_count(logical=True),
+            'count_physical': psutil.cpu_count(logical=False)
+        }
+    
     @abstractmethod
     def get_cpu_info(self) -> Dict[str, Any]:
         """获取CPU信息"""
@@ -34,13 +53,47 @@ class BaseSystemMonitor(ABC):
         """获取系统负载"""
         pass
     
-    def get_all_info(self) -> Dict[str, Any]:
-        """获取所有系统信息，子类可以重写此方法来自定义数据格式"""
+    def get_network_inventory(self) -> Dict[str, Any]:
+        """获取网络接口清单（地址等），默认每次重新读取，子类可以缓存并维护版本号"""
         return {
-            'cpu': self.get_cpu_info(),
-            'memory': self.get_memory_info(),
-            'disk': self.get_disk_info(),
-            'network': self.get_network_info(),
-            'processes': self.get_process_info(),
-            'load': self.get_system_load()
-        }
\ No newline at end of file
+            'version': None,
+            'updated_at': time.time(),
+            'interfaces': {
+                interface: {'addresses': addresses} for interface, addresses in collect_addresses().items()
+            }
+        }
+    
+    def get_collectors(self) -> Dict[str, Callable[[], Any]]:
+        """获取各采集项，键为采集项名称，子类可以拆分出更细粒度的采集项"""
+        return {
+            'cpu': self.get_cpu_info,
+            'memory': self.get_memory_info,
+            'disk': self.get_disk_info,
+            'network': self.get_network_info,
+            'processes': self.get_process_info,
+            'load': self.get_system_load
+        }
+    
+    def compose_snapshot(self, sections: Dict[str, Any]) -> Dict[str, Any]:
+        """将各采集项的结果合并为一个快照，子类可以重写此方法来自定义数据格式"""
+        return dict(sections)
+    
+    def profile(self, name: str, collect: Callable[[], Any]) -> Any:
+        """执行一个采集项，设置了剖析器时记录其耗时和出错次数"""
+        profiler = self.profiler
+        if profiler is None:
+            return collect()
+        started = time.perf_counter()
+        try:
+            return collect()
+        except Exception:
+            profiler.increment(f"collector.{name}.errors")
+            raise
+        finally:
+            profiler.observe(f"collector.{name}", time.perf_counter() - started)
+    
+    def get_all_info(self) -> Dict[str, Any]:
+        """获取所有系统信息"""
+        return self.compose_snapshot({
+            name: self.profile(name, collect) for name, collect in self.get_collectors().items()
+        })
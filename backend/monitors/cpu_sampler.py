@@ -0,0 +1,89 @@
+import threading
+import psutil
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+# guest/guest_nice 已经计入 user/nice，计算总时间时需要排除，避免重复计数
+_GUEST_FIELDS = ('guest', 'guest_nice')
+# 这些状态不计入CPU繁忙时间
+_IDLE_FIELDS = ('idle', 'iowait')
+
+
+class CpuTimesSampler:
+    """基于CPU时间计数差值的非阻塞CPU采样器
+
+    每次采样读取一次 cpu_times（Linux下即 /proc/stat），与上一次快照做差值计算使用率，
+    不需要像 psutil.cpu_percent(interval=1) 那样阻塞等待。首次采样以开机以来的累计值计算。
+    times_reader 可以替换读取方式，返回 (总体, 每个CPU) 的CPU时间，默认使用 psutil。
+    """
+
+    def __init__(self, times_reader: Optional[Callable[[], Tuple[Any, List[Any]]]] = None):
+        self._lock = threading.Lock()
+        self._times_reader = times_reader or self._read_psutil
+        self._last_total = None
+        self._last_per_cpu: Optional[List] = None
+
+    @staticmethod
+    def _read_psutil() -> Tuple[Any, List[Any]]:
+        """通过 psutil 读取CPU时间"""
+        return psutil.cpu_times(), psutil.cpu_times(percpu=True)
+
+    @staticmethod
+    def _fields(times) -> List[str]:
+        """获取参与计算的时间字段"""
+        return [f for f in times._fields if f not in _GUEST_FIELDS]
+
+    @classmethod
+    def _compute(cls, current, previous) -> Dict[str, Any]:
+        """根据两次快照计算总使用率和各模式使用率"""
+        fields = cls._fields(current)
+        deltas = {}
+        for field in fields:
+            delta = getattr(current, field) - (getattr(previous, field) if previous is not None else 0)
+            # 计数器可能因为精度或CPU热插拔出现回退，按0处理
+            deltas[field] = delta if delta > 0 else 0.0
+
+        total_delta = sum(deltas.values())
+        if total_delta <= 0:
+            return {'percent': 0.0, 'modes': {field: 0.0 for field in fields}}
+
+        busy_delta = total_delta - sum(deltas.get(f, 0.0) for f in _IDLE_FIELDS)
+        return {
+            'percent': round(max(0.0, min(100.0, busy_delta / total_delta * 100)), 1),
+            'modes': {
+                field: round(deltas[field] / total_delta * 100, 1)
+                for field in fields
+            }
+        }
+
+    def sample(self) -> Dict[str, Any]:
+        """采样一次CPU使用率，返回总体、每核心和各模式（user/system/iowait/steal等）的百分比"""
+        total_times, per_cpu_times = self._times_reader()
+
+        with self._lock:
+            last_total = self._last_total
+            last_per_cpu = self._last_per_cpu
+            self._last_total = total_times
+            self._last_per_cpu = per_cpu_times
+
+        # CPU数量变化（热插拔）时重新以累计值为基准
+        if last_per_cpu is None or len(last_per_cpu) != len(per_cpu_times):
+            last_per_cpu = [None] * len(per_cpu_times)
+
+        total = self._compute(total_times, last_total)
+        per_cpu = [
+            self._compute(current, previous)
+            for current, previous in zip(per_cpu_times, last_per_cpu)
+        ]
+
+        return {
+            'percent': total['percent'],
+            'modes': total['modes'],
+            'per_cpu': [core['percent'] for core in per_cpu],
+            'per_cpu_modes': [core['modes'] for core in per_cpu]
+        }
+
+    def reset(self):
+        """丢弃上一次快照，下次采样重新以累计值为基准"""
+        with self._lock:
+            self._last_total = None
+            self._last_per_cpu = None
@@ -0,0 +1,173 @@
+import os
+import threading
+import logging
+import psutil
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class HostPaths:
+    """宿主机文件系统根路径
+
+    容器中运行时，docker-compose.yml 将宿主机的 /proc、/sys 和 / 挂载到 /host/* 下，
+    并通过 HOST_PROC、HOST_SYS、HOST_ROOT 指明位置。所有 Linux 采集项通过本类构造路径，
+    使采集到的是宿主机而不是容器自身的数据；未设置时即为当前系统的 /proc、/sys 和 /。
+    """
+
+    def __init__(self, proc: str = '/proc', sys: str = '/sys', root: str = '/'):
+        self.proc = proc.rstrip('/') or '/'
+        self.sys = sys.rstrip('/') or '/'
+        self.root = root.rstrip('/') or '/'
+        self.lock = threading.Lock()
+        self._passwd_mtime: Optional[float] = None
+        self._users: Dict[int, str] = {}
+        self._nodev: Optional[set] = None
+        self._whole_disks: Dict[str, bool] = {}
+        self._host_netns: Optional[bool] = None
+
+    @classmethod
+    def from_env(cls) -> 'HostPaths':
+        """根据环境变量 HOST_PROC、HOST_SYS、HOST_ROOT 创建"""
+        return cls(
+            proc=os.getenv('HOST_PROC', '/proc'),
+            sys=os.getenv('HOST_SYS', '/sys'),
+            root=os.getenv('HOST_ROOT', '/')
+        )
+
+    @property
+    def is_host_proc(self) -> bool:
+        """/proc 是否指向另外挂载的宿主机 procfs"""
+        return self.proc != '/proc'
+
+    @property
+    def is_host_sys(self) -> bool:
+        """/sys 是否指向另外挂载的宿主机 sysfs"""
+        return self.sys != '/sys'
+
+    @property
+    def is_host_root(self) -> bool:
+        """根目录是否指向另外挂载的宿主机根文件系统"""
+        return self.root != '/'
+
+    def proc_path(self, *parts: str) -> str:
+        """宿主机 procfs 下的路径"""
+        return os.path.join(self.proc, *parts)
+
+    def sys_path(self, *parts: str) -> str:
+        """宿主机 sysfs 下的路径"""
+        return os.path.join(self.sys, *parts)
+
+    def root_path(self, path: str) -> str:
+        """宿主机上的绝对路径（如挂载点）在本进程中对应的路径"""
+        if not self.is_host_root:
+            return path
+        return os.path.join(self.root, path.lstrip('/'))
+
+    def is_whole_disk(self, name: str) -> bool:
+        """是否为整块磁盘（在 /sys/block 下有对应目录），分区不计入总量，结果缓存"""
+        known = self._whole_disks.get(name)
+        if known is None:
+            known = os.path.exists(self.sys_path('block', name.replace('/', '!')))
+            self._whole_disks[name] = known
+        return known
+
+    def online_cpu_count(self) -> Optional[int]:
+        """宿主机在线CPU数量：解析 /sys/devices/system/cpu/online（如 0-3,6），不可用时统计 /proc/stat 中的 cpuN 行"""
+        try:
+            with open(self.sys_path('devices', 'system', 'cpu', 'online'), 'r') as f:
+                count = 0
+                for part in f.read().strip().split(','):
+                    if part:
+                        first, _, last = part.partition('-')
+                        count += int(last or first) - int(first) + 1
+                return count or None
+        except (OSError, ValueError):
+            pass
+        try:
+            with open(self.proc_path('stat'), 'r') as f:
+                count = sum(1 for line in f if line.startswith('cpu') and line[3:4].isdigit())
+                return count or None
+        except OSError as e:
+            logger.warning(f"读取宿主机在线CPU数量失败: {e}")
+            return None
+
+    def apply_to_psutil(self):
+        """让 psutil 读取宿主机的 procfs（进程列表、CPU频率回退等）"""
+        if psutil.LINUX and self.is_host_proc:
+            psutil.PROCFS_PATH = self.proc
+
+    def mountinfo_path(self) -> str:
+        """挂载表路径：宿主机 procfs 中 self 指向本进程（容器的挂载命名空间），因此读取1号进程的挂载表"""
+        return self.proc_path('1', 'mountinfo') if self.is_host_proc else self.proc_path('self', 'mountinfo')
+
+    def net_path(self, name: str) -> str:
+        """网络统计文件路径：/proc/net 指向本进程的网络命名空间，宿主机 procfs 中读取1号进程的 /proc/1/net"""
+        return self.proc_path('1', 'net', name) if self.is_host_proc else self.proc_path('net', name)
+
+    def in_host_netns(self) -> bool:
+        """本进程是否位于宿主机的网络命名空间（未挂载宿主机 procfs，或容器使用 network_mode: host），结果缓存"""
+        if not self.is_host_proc:
+            return True
+        if self._host_netns is None:
+            try:
+                self._host_netns = os.readlink('/proc/self/ns/net') == os.readlink(self.proc_path('1', 'ns', 'net'))
+            except OSError as e:
+                logger.warning(f"无法比较网络命名空间，按容器自身的网络命名空间处理: {e}")
+                self._host_netns = False
+        return self._host_netns
+
+    @property
+    def network_scope(self) -> str:
+        """通过本进程的网络命名空间取得的信息（接口地址、netlink 事件）属于宿主机（host）还是容器自身（container）"""
+        return 'host' if self.in_host_netns() else 'container'
+
+    def nodev_filesystems(self) -> set:
+        """不对应块设备的文件系统类型（/proc/filesystems 中标记为 nodev 的类型）"""
+        if self._nodev is None:
+            nodev = set()
+            try:
+                with open(self.proc_path('filesystems'), 'r') as f:
+                    for line in f:
+                        fields = line.split()
+                        if len(fields) == 2 and fields[0] == 'nodev':
+                            nodev.add(fields[1])
+            except OSError as e:
+                logger.error(f"读取 filesystems 失败: {e}")
+            # zfs 虽然标记为 nodev，但其数据集与块设备上的文件系统类似
+            nodev.discard('zfs')
+            self._nodev = nodev
+        return self._nodev
+
+    def disk_usage(self, mountpoint: str) -> Dict[str, Any]:
+        """对宿主机挂载点执行 statvfs，按 psutil.disk_usage() 的口径返回容量（字节）"""
+        st = os.statvfs(self.root_path(mountpoint))
+        total = st.f_blocks * st.f_frsize
+        free = st.f_bavail * st.f_frsize
+        used = (st.f_blocks - st.f_bfree) * st.f_frsize
+        return {'total': total, 'used': used, 'free': free}
+
+    def username(self, uid: int) -> Optional[str]:
+        """按宿主机的 /etc/passwd 解析用户名，未挂载宿主机根目录时返回 None（由调用方使用本机的用户数据库）"""
+        if not self.is_host_root:
+            return None
+        path = self.root_path('/etc/passwd')
+        with self.lock:
+            try:
+                mtime = os.stat(path).st_mtime
+                if mtime != self._passwd_mtime:
+                    users = {}
+                    with open(path, 'r', errors='replace') as f:
+                        for line in f:
+                            fields = line.split(':')
+                            if len(fields) > 2 and fields[2].isdigit():
+                                users.setdefault(int(fields[2]), fields[0])
+                    self._users = users
+                    self._passwd_mtime = mtime
+            except OSError as e:
+                logger.warning(f"读取宿主机用户列表失败: {e}")
+            return self._users.get(uid)
+
+
+# 全局宿主机路径配置
+host_paths = HostPaths.from_env()
@@ -0,0 +1,101 @@
+import time
+import threading
+from typing import Dict, Any, Optional, Sequence, Tuple
+
+# 计数器回绕的判断：上一次的值小于 2^32 时按32位计数器回绕处理，否则按64位
+WRAP_32 = 2 ** 32
+WRAP_64 = 2 ** 64
+
+# /proc/diskstats 各列（见 ProcFsReader.diskstats）
+DISK_FIELDS = ('read_count', 'write_count', 'read_bytes', 'write_bytes', 'read_time', 'write_time', 'busy_time')
+# /proc/net/dev 各列（见 ProcFsReader.net_dev）
+NIC_FIELDS = ('bytes_recv', 'packets_recv', 'errin', 'dropin', 'bytes_sent', 'packets_sent', 'errout', 'dropout')
+
+
+def counter_delta(current: int, previous: int) -> Optional[int]:
+    """计算计数器的增量，处理回绕；差值不合理（设备重置）时返回 None"""
+    delta = current - previous
+    if delta >= 0:
+        return delta
+    wrap = WRAP_32 if previous < WRAP_32 else WRAP_64
+    delta += wrap
+    # 回绕后的增量仍应小于回绕范围的一半，否则视为计数器被重置（如设备移除后重新加入）
+    return delta if 0 <= delta < wrap // 2 else None
+
+
+class CounterRates:
+    """按设备名保存上一次的累计计数器，计算每秒速率
+
+    新出现的设备（热插拔）第一次只建立基准，不输出速率；消失的设备随之丢弃；
+    计数器回绕按32/64位处理，检测到重置时重新建立基准。
+    """
+
+    def __init__(self, fields: Tuple[str, ...]):
+        self.fields = fields
+        self.lock = threading.Lock()
+        self._previous: Dict[str, Tuple[float, Sequence[int]]] = {}
+
+    def update(self, counters: Dict[str, Sequence[int]], now: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """输入 设备名 -> 累计计数器，返回 设备名 -> 各字段的 (增量, 间隔秒数)，新设备和重置的设备不在结果中"""
+        now = time.monotonic() if now is None else now
+        deltas = {}
+        with self.lock:
+            previous = self._previous
+            self._previous = {name: (now, values) for name, values in counters.items()}
+        for name, values in counters.items():
+            last = previous.get(name)
+            if last is None or now <= last[0]:
+                continue
+            changes = {}
+            for field, current, before in zip(self.fields, values, last[1]):
+                delta = counter_delta(current, before)
+                if delta is None:
+                    break
+                changes[field] = delta
+            else:
+                changes['interval'] = now - last[0]
+                deltas[name] = changes
+        return deltas
+
+    def reset(self):
+        """丢弃所有基准"""
+        with self.lock:
+            self._previous = {}
+
+
+def _rate(delta: float, interval: float) -> float:
+    return round(delta / interval, 2)
+
+
+def disk_rates(delta: Dict[str, float]) -> Dict[str, Any]:
+    """由 /proc/diskstats 的增量计算吞吐量、IOPS、繁忙度和平均等待时间"""
+    interval = delta['interval']
+    ios = delta['read_count'] + delta['write_count']
+    return {
+        'read_bytes_per_sec': _rate(delta['read_bytes'], interval),
+        'write_bytes_per_sec': _rate(delta['write_bytes'], interval),
+        'read_iops': _rate(delta['read_count'], interval),
+        'write_iops': _rate(delta['write_count'], interval),
+        'busy_percent': round(min(100.0, delta['busy_time'] / (interval * 1000) * 100), 1),
+        'await_ms': round((delta['read_time'] + delta['write_time']) / ios, 2) if ios else 0.0
+    }
+
+
+def nic_rates(delta: Dict[str, float]) -> Dict[str, Any]:
+    """由 /proc/net/dev 的增量计算吞吐量、包速率和错误/丢包速率"""
+    interval = delta['interval']
+    return {
+        'bytes_sent_per_sec': _rate(delta['bytes_sent'], interval),
+        'bytes_recv_per_sec': _rate(delta['bytes_recv'], interval),
+        'packets_sent_per_sec': _rate(delta['packets_sent'], interval),
+        'packets_recv_per_sec': _rate(delta['packets_recv'], interval),
+        'errin_per_sec': _rate(delta['errin'], interval),
+        'errout_per_sec': _rate(delta['errout'], interval),
+        'dropin_per_sec': _rate(delta['dropin'], interval),
+        'dropout_per_sec': _rate(delta['dropout'], interval)
+    }
+
+
+def sum_rates(per_device: Dict[str, Dict[str, Any]], keys: Tuple[str, ...]) -> Dict[str, float]:
+    """各设备速率之和"""
+    return {key: round(sum(rates.get(key, 0.0) for rates in per_device.values()), 2) for key in keys}
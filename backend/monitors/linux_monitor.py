@@ -1,8 +1,15 @@
 import psutil
 import subprocess
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Optional
 from .base_monitor import BaseSystemMonitor
+from .process_registry import ProcessRegistry, proc_stat_start_time
+from .cpu_sampler import CpuTimesSampler
+from .procfs import ProcFsReader, parse_net_dev
+from .host_paths import host_paths
+from .partitions import PartitionManager
+from .nic_inventory import NicInventory, collect_host_link_state, link_state_scope
+from .io_rates import CounterRates, DISK_FIELDS, NIC_FIELDS, disk_rates, nic_rates, sum_rates
 import logging  # 新增：用于错误日志
 
 logger = logging.getLogger(__name__)  # 配置日志
@@ -10,52 +17,68 @@ logger = logging.getLogger(__name__)  # 配置日志
 class LinuxSystemMonitor(BaseSystemMonitor):
     """Linux系统监控器"""
     
-    def get_cpu_info(self) -> Dict[str, Any]:
-        """获取CPU信息"""
-        # 获取每个核心的使用率
-        per_cpu_percent = psutil.cpu_percent(interval=1, percpu=True)
-        
-        cpu_info = {
-            'percent': psutil.cpu_percent(interval=0),  # 总体使用率
-            'count_logical': psutil.cpu_count(logical=True),
-            'count_physical': psutil.cpu_count(logical=False),
-            'per_cpu': per_cpu_percent,
-            'cores_detail': [  # 新增：每个核心的详细信息
-                {
-                    'core_id': i,
-                    'name': f'CPU Core {i}',
-                    'percent': percent
-                } for i, percent in enumerate(per_cpu_percent)
-            ]
-        }
-        
-        # 获取CPU频率
+    def __init__(self):
+        # 容器中通过 HOST_PROC/HOST_SYS/HOST_ROOT 采集宿主机的数据，psutil 也改为读取宿主机的 procfs
+        self.paths = host_paths
+        self.paths.apply_to_psutil()
+        # 高频采集项直接读取持久打开的/proc文件，不可用时（MONITOR_FAST_PROC=0 或读取失败）回退到psutil
+        self.procfs: Optional[ProcFsReader] = ProcFsReader.create()
+        # 基于/proc/stat差值的CPU采样器，避免每次采集阻塞1秒
+        self.cpu_sampler = CpuTimesSampler(self._read_cpu_times)
+        # 挂载表只在变化时重新读取，statvfs 在线程池中执行并设置期限
+        self.partitions = PartitionManager.from_env()
+        # 网络接口清单只在接口变化时重新读取
+        self.nic_inventory = NicInventory.from_env()
+        # 每块磁盘、每个网络接口的速率由相邻两次采集的计数器差值计算
+        self.disk_rates = CounterRates(DISK_FIELDS)
+        self.nic_rates = CounterRates(NIC_FIELDS)
+        # 增量维护的进程表，复用Process对象
+        self.process_registry = ProcessRegistry(
+            user_lookup=self.paths.username,
+            start_time_reader=proc_stat_start_time(self.paths.proc)
+        )
+    
+    def _fast(self, read: Callable[[ProcFsReader], Any]) -> Any:
+        """通过/proc快速读取层读取，不可用时返回 None；读取失败后停用快速读取层"""
+        procfs = self.procfs
+        if procfs is None:
+            return None
         try:
-            cpu_freq = psutil.cpu_freq()
-            if cpu_freq:
-                cpu_info['frequency'] = {
-                    'current': cpu_freq.current,
-                    'min': cpu_freq.min,
-                    'max': cpu_freq.max
-                }
-        except Exception as e:
-            logger.error(f"获取CPU频率失败: {e}")
+            return read(procfs)
+        except (OSError, ValueError, IndexError, KeyError) as e:
+            logger.warning(f"/proc快速读取失败，回退到psutil: {e}")
+            self.procfs = None
+            procfs.close()
+            return None
+    
+    def _read_cpu_times(self):
+        """读取 (总体, 每个CPU) 的CPU时间"""
+        times = self._fast(ProcFsReader.cpu_times)
+        if times is not None:
+            return times
+        return psutil.cpu_times(), psutil.cpu_times(percpu=True)
+    
+    def online_cpu_count(self) -> Optional[int]:
+        """宿主机的在线CPU数量（容器中 os.cpu_count() 返回的是容器自身可见的数量）"""
+        return self.paths.online_cpu_count() or super().online_cpu_count()
+    
+    def get_static_cpu_info(self) -> Dict[str, Any]:
+        """获取静态CPU信息（解析宿主机的/proc/cpuinfo）"""
+        cpu_info = super().get_static_cpu_info()
         
         # 解析 /proc/cpuinfo 获取详细CPU信息
         try:
-            with open('/proc/cpuinfo', 'r') as f:
-                cpuinfo = f.read()
-            
-            # 解析CPU信息
             cpu_model = 'Unknown'
             cpu_cores = 0
             siblings = 0
             vendor_id = 'Unknown'
             cpu_family = 'Unknown'
             
-            lines = cpuinfo.split('\n')
-            for line in lines:
-                if line.strip():
+            with open(self.paths.proc_path('cpuinfo'), 'r') as f:
+                for line in f:
+                    # 只需要第一个处理器的信息，遇到空行即结束
+                    if not line.strip():
+                        break
                     if line.startswith('model name'):
                         cpu_model = line.split(':', 1)[1].strip()
                     elif line.startswith('cpu cores'):
@@ -73,16 +96,12 @@ class LinuxSystemMonitor(BaseSystemMonitor):
                     elif line.startswith('cpu family'):
                         cpu_family = line.split(':', 1)[1].strip()
             
-            # 更新CPU信息
             cpu_info['model'] = cpu_model
             cpu_info['brand'] = cpu_model  # 为了兼容前端显示
             cpu_info['cores'] = cpu_cores
             cpu_info['threads'] = siblings
             cpu_info['vendor'] = vendor_id
             cpu_info['family'] = cpu_family
-            
-            # print(f"解析到的CPU信息: 型号={cpu_model}, 核心数={cpu_cores}, 线程数={siblings}")
-            
         except Exception as e:
             logger.error(f"解析/proc/cpuinfo失败: {e}")
             cpu_info['model'] = 'Unknown'
@@ -90,18 +109,60 @@ class LinuxSystemMonitor(BaseSystemMonitor):
             cpu_info['cores'] = 0
             cpu_info['threads'] = 0
         
-        # 获取CPU温度（Linux特有）
+        return cpu_info
+    
+    def get_cpu_info(self) -> Dict[str, Any]:
+        """获取CPU信息"""
+        # 获取总体、每个核心以及各模式的使用率（非阻塞）
+        cpu_sample = self.cpu_sampler.sample()
+        per_cpu_percent = cpu_sample['per_cpu']
+        per_cpu_modes = cpu_sample['per_cpu_modes']
+        
+        cpu_info = {
+            'percent': cpu_sample['percent'],  # 总体使用率
+            'times_percent': cpu_sample['modes'],  # 各模式使用率(user/system/iowait/steal等)
+            'count_logical': len(per_cpu_percent),
+            'per_cpu': per_cpu_percent,
+            'cores_detail': [  # 新增：每个核心的详细信息
+                {
+                    'core_id': i,
+                    'name': f'CPU Core {i}',
+                    'percent': percent,
+                    'user': per_cpu_modes[i].get('user', 0.0),
+                    'system': per_cpu_modes[i].get('system', 0.0),
+                    'iowait': per_cpu_modes[i].get('iowait', 0.0),
+                    'steal': per_cpu_modes[i].get('steal', 0.0)
+                } for i, percent in enumerate(per_cpu_percent)
+            ]
+        }
+        
+        # 获取CPU频率
         try:
-            temps = psutil.sensors_temperatures()
-            if temps:
-                cpu_info['temperature'] = temps
+            cpu_freq = psutil.cpu_freq()
+            if cpu_freq:
+                cpu_info['frequency'] = {
+                    'current': cpu_freq.current,
+                    'min': cpu_freq.min,
+                    'max': cpu_freq.max
+                }
         except Exception as e:
-            logger.error(f"获取CPU温度失败: {e}")
-    
+            logger.error(f"获取CPU频率失败: {e}")
+        
         return cpu_info
     
+    def get_temperature_info(self) -> Dict[str, Any]:
+        """获取CPU温度（Linux特有）"""
+        try:
+            return psutil.sensors_temperatures() or {}
+        except Exception as e:
+            logger.error(f"获取CPU温度失败: {e}")
+            return {}
+    
     def get_memory_info(self):
         """获取内存信息"""
+        fast = self._fast(ProcFsReader.memory)
+        if fast is not None:
+            return {'virtual': fast[0], 'swap': fast[1]}
         try:
             memory = psutil.virtual_memory()
             swap = psutil.swap_memory()
@@ -132,140 +193,120 @@ class LinuxSystemMonitor(BaseSystemMonitor):
             logger.error(f"获取内存信息失败: {e}")
             return {'virtual': {}, 'swap': {}}
     
-    def get_disk_info(self) -> Dict[str, Any]:
-        """获取磁盘信息"""
-        disk_info = {'partitions': [], 'io': {}}
-        
-        # 获取分区信息
-        for partition in psutil.disk_partitions():
-            try:
-                usage = psutil.disk_usage(partition.mountpoint)
-                disk_info['partitions'].append({
-                    'device': partition.device,
-                    'mountpoint': partition.mountpoint,
-                    'fstype': partition.fstype,
-                    'total': usage.total,
-                    'used': usage.used,
-                    'free': usage.free,
-                    'percent': (usage.used / usage.total) * 100 if usage.total > 0 else 0
-                })
-            except PermissionError as e:
-                logger.warning(f"权限错误，无法访问分区 {partition.mountpoint}: {e}")
-            except Exception as e:
-                logger.error(f"获取分区信息失败: {e}")
-        
-        # 获取磁盘IO信息
+    def get_disk_usage_info(self) -> list:
+        """获取分区使用情况（缓存的宿主机挂载表，按配置过滤，statvfs 有超时保护）"""
         try:
-            disk_io = psutil.disk_io_counters()
-            if disk_io:
-                disk_info['io'] = {
-                    'read_bytes': disk_io.read_bytes,
-                    'write_bytes': disk_io.write_bytes,
-                    'read_count': disk_io.read_count,
-                    'write_count': disk_io.write_count
-                }
+            return self.partitions.get_partitions()
+        except OSError as e:
+            logger.error(f"读取挂载表失败: {e}")
+            return []
+    
+    def _read_disk_counters(self) -> Dict[str, tuple]:
+        """读取每块磁盘的累计计数器，各列见 io_rates.DISK_FIELDS"""
+        fast = self._fast(ProcFsReader.diskstats)
+        if fast is None:
+            fast = {
+                name: (c.read_count, c.write_count, c.read_bytes, c.write_bytes,
+                       c.read_time, c.write_time, getattr(c, 'busy_time', 0))
+                for name, c in (psutil.disk_io_counters(perdisk=True) or {}).items()
+            }
+        # 分区的IO已计入所在磁盘，只保留整块磁盘
+        return {name: values for name, values in fast.items() if self.paths.is_whole_disk(name)}
+    
+    def get_disk_io_info(self) -> Dict[str, Any]:
+        """获取磁盘IO信息：累计值、每块磁盘的速率（吞吐量、IOPS、繁忙度、平均等待）及其合计"""
+        try:
+            counters = self._read_disk_counters()
         except Exception as e:
             logger.error(f"获取磁盘IO信息失败: {e}")
-        
-        return disk_info
+            return {}
+        per_disk = {name: disk_rates(delta) for name, delta in self.disk_rates.update(counters).items()}
+        disk_io = {
+            'read_bytes': sum(values[2] for values in counters.values()),
+            'write_bytes': sum(values[3] for values in counters.values()),
+            'read_count': sum(values[0] for values in counters.values()),
+            'write_count': sum(values[1] for values in counters.values())
+        }
+        disk_io.update(sum_rates(per_disk, ('read_bytes_per_sec', 'write_bytes_per_sec', 'read_iops', 'write_iops')))
+        disk_io['per_disk'] = per_disk
+        return disk_io
+    
+    def get_disk_info(self) -> Dict[str, Any]:
+        """获取磁盘信息"""
+        return {
+            'partitions': self.get_disk_usage_info(),
+            'io': self.get_disk_io_info()
+        }
     
     def get_network_info(self) -> Dict[str, Any]:
-        """获取网络信息"""
-        network_info = {'interfaces': {}, 'io': {}}
+        """获取网络信息：各接口的链路状态、IO累计值和速率"""
+        # 各部分数据属于宿主机还是容器自身的网络命名空间
+        network_info = {'io': {}, 'link': {}, 'scope': {
+            'io': 'host',
+            'link': link_state_scope(self.paths),
+            'inventory': self.paths.network_scope
+        }}
         
-        # 获取网络接口信息
+        # 接口清单（地址、MAC等）单独缓存，快照中只带版本号，变化时客户端从 /api/network/interfaces 拉取
         try:
-            for interface, addrs in psutil.net_if_addrs().items():
-                network_info['interfaces'][interface] = []
-                for addr in addrs:
-                    network_info['interfaces'][interface].append({
-                        'family': str(addr.family),
-                        'address': addr.address,
-                        'netmask': addr.netmask,
-                        'broadcast': addr.broadcast
-                    })
+            network_info['inventory_version'] = self.nic_inventory.refresh()
         except Exception as e:
             logger.error(f"获取网络接口信息失败: {e}")
         
-        # 获取网络IO信息
+        # 各接口的链路状态
         try:
-            net_io = psutil.net_io_counters()
-            if net_io:
-                network_info['io'] = {
-                    'bytes_sent': net_io.bytes_sent,
-                    'bytes_recv': net_io.bytes_recv,
-                    'packets_sent': net_io.packets_sent,
-                    'packets_recv': net_io.packets_recv
-                }
+            network_info['link'] = collect_host_link_state(self.paths)
         except Exception as e:
-            logger.error(f"获取网络IO信息失败: {e}")
+            logger.error(f"获取网络链路状态失败: {e}")
         
-        return network_info
-    
-    def get_process_info(self) -> Dict[str, Any]:
-        """获取进程信息"""
-        processes = []
+        # 获取网络IO信息：累计值、每个网络接口的速率及其合计
         try:
-            for proc in psutil.process_iter([
-                'pid', 'name', 'cpu_percent', 'memory_percent', 
-                'memory_info', 'create_time', 'status', 'username'
-            ]):
-                try:
-                    proc_info = proc.info
-                    
-                    if proc_info.get('cpu_percent') is None:
-                        proc_info['cpu_percent'] = 0.0
-                    if proc_info.get('memory_percent') is None:
-                        proc_info['memory_percent'] = 0.0
-                    
-                    memory_info = proc_info.get('memory_info')
-                    if memory_info:
-                        proc_info['memory_mb'] = memory_info.rss / 1024 / 1024
-                    else:
-                        proc_info['memory_mb'] = 0.0
-                    
-                    create_time = proc_info.get('create_time')
-                    if create_time:
-                        import datetime
-                        proc_info['create_time_str'] = datetime.datetime.fromtimestamp(create_time).strftime('%H:%M:%S')
-                    else:
-                        proc_info['create_time_str'] = 'N/A'
-                    
-                    if not proc_info.get('username'):
-                        proc_info['username'] = 'N/A'
-                    
-                    processes.append(proc_info)
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    pass
+            counters = self._read_nic_counters()
         except Exception as e:
-            print(f"获取进程信息时出错: {e}")
-            pass
-        
-        try:
-            top_cpu = sorted(processes, 
-                           key=lambda x: x.get('cpu_percent') or 0, 
-                           reverse=True)[:5]
-            top_memory = sorted(processes, 
-                          key=lambda x: x.get('memory_percent') or 0, 
-                          reverse=True)[:5]
-        except Exception as e:
-            print(f"排序进程信息时出错: {e}")
-            top_cpu = []
-            top_memory = []
-        
+            logger.error(f"获取网络IO信息失败: {e}")
+            return network_info
+        per_nic = {name: nic_rates(delta) for name, delta in self.nic_rates.update(counters).items()}
+        network_info['io'] = {
+            'bytes_sent': sum(values[4] for values in counters.values()),
+            'bytes_recv': sum(values[0] for values in counters.values()),
+            'packets_sent': sum(values[5] for values in counters.values()),
+            'packets_recv': sum(values[1] for values in counters.values())
+        }
+        network_info['io'].update(sum_rates(per_nic, ('bytes_sent_per_sec', 'bytes_recv_per_sec',
+                                                      'packets_sent_per_sec', 'packets_recv_per_sec')))
+        network_info['io']['per_nic'] = per_nic
+        return network_info
+    
+    def _read_nic_counters(self) -> Dict[str, tuple]:
+        """读取每个网络接口的累计计数器，各列见 io_rates.NIC_FIELDS"""
+        fast = self._fast(ProcFsReader.net_dev)
+        if fast is not None:
+            return fast
+        if self.paths.is_host_proc:
+            # psutil 读取的 PROCFS_PATH/net/dev 指向容器自身的网络命名空间
+            with open(self.paths.net_path('dev'), 'rb') as f:
+                return parse_net_dev(f.read())
         return {
-            'count': len(processes),
-            'top_cpu': top_cpu,
-            'top_memory': top_memory
+            name: (c.bytes_recv, c.packets_recv, c.errin, c.dropin,
+                   c.bytes_sent, c.packets_sent, c.errout, c.dropout)
+            for name, c in (psutil.net_io_counters(pernic=True) or {}).items()
         }
     
+    def get_network_inventory(self) -> Dict[str, Any]:
+        """获取缓存的网络接口清单"""
+        return self.nic_inventory.get()
+    
+    def get_process_info(self) -> Dict[str, Any]:
+        """获取进程信息"""
+        return self.process_registry.get_process_info()
+    
     def get_system_load(self) -> Dict[str, Any]:
         """获取系统负载"""
         load_info = {}
         
         # 获取系统负载
         try:
-            load_avg = os.getloadavg()
+            load_avg = self._fast(ProcFsReader.loadavg) or os.getloadavg()
             load_info['load_avg'] = {
                 '1min': load_avg[0],
                 '5min': load_avg[1],
@@ -275,11 +316,47 @@ class LinuxSystemMonitor(BaseSystemMonitor):
             pass
         
         # 获取系统运行时间
+        uptime_seconds = self._fast(ProcFsReader.uptime)
+        if uptime_seconds is not None:
+            load_info['uptime'] = uptime_seconds
+            return load_info
         try:
-            with open('/proc/uptime', 'r') as f:
+            with open(self.paths.proc_path('uptime'), 'r') as f:
                 uptime_seconds = float(f.readline().split()[0])
                 load_info['uptime'] = uptime_seconds
         except:
             pass
         
-        return load_info
\ No newline at end of file
+        return load_info
+    
+    def get_collectors(self) -> Dict[str, Callable[[], Any]]:
+        """获取各采集项，磁盘使用率/IO和温度拆分为独立采集项，以便分别设置采集周期"""
+        return {
+            'cpu': self.get_cpu_info,
+            'memory': self.get_memory_info,
+            'disk_usage': self.get_disk_usage_info,
+            'disk_io': self.get_disk_io_info,
+            'network': self.get_network_info,
+            'processes': self.get_process_info,
+            'load': self.get_system_load,
+            'temperatures': self.get_temperature_info
+        }
+    
+    def compose_snapshot(self, sections: Dict[str, Any]) -> Dict[str, Any]:
+        """合并各采集项结果，保持原有的数据结构"""
+        cpu_info = dict(sections.get('cpu', {}))
+        temps = sections.get('temperatures')
+        if temps:
+            cpu_info['temperature'] = temps
+        
+        return {
+            'cpu': cpu_info,
+            'memory': sections.get('memory', {'virtual': {}, 'swap': {}}),
+            'disk': {
+                'partitions': sections.get('disk_usage', []),
+                'io': sections.get('disk_io', {})
+            },
+            'network': sections.get('network', {'io': {}, 'link': {}}),
+            'processes': sections.get('processes', {}),
+            'load': sections.get('load', {})
+        }
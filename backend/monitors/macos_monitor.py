@@ -2,19 +2,37 @@ import psutil
 import subprocess
 from typing import Dict, Any
 from .base_monitor import BaseSystemMonitor
+from .process_registry import ProcessRegistry
+from .cpu_sampler import CpuTimesSampler
 
 class MacOSSystemMonitor(BaseSystemMonitor):
     """macOS系统监控器"""
 
+    # 内存和负载采集项需要启动 memory_pressure、uptime 子进程，耗时远超默认预算
+    collector_budgets = {'memory': 0.5, 'load': 0.2}
+
+    def __init__(self):
+        # 增量维护的进程表，复用Process对象
+        self.process_registry = ProcessRegistry()
+        # 基于CPU时间差值的非阻塞采样，避免 cpu_percent(interval=1) 阻塞采集线程
+        self.cpu_sampler = CpuTimesSampler()
+
     def get_cpu_info(self) -> Dict[str, Any]:
         """获取CPU信息"""
+        cpu_sample = self.cpu_sampler.sample()
         cpu_info = {
-            'percent': psutil.cpu_percent(interval=1),
+            'percent': cpu_sample['percent'],
             'count_logical': psutil.cpu_count(logical=True),
             'count_physical': psutil.cpu_count(logical=False),
-            'per_cpu': psutil.cpu_percent(interval=1, percpu=True)
+            'per_cpu': cpu_sample['per_cpu']
         }
         
+        return cpu_info
+
+    def get_static_cpu_info(self) -> Dict[str, Any]:
+        """获取静态CPU信息"""
+        cpu_info = super().get_static_cpu_info()
+        
         # macOS特有的CPU信息
         try:
             result = subprocess.run(['sysctl', '-n', 'machdep.cpu.brand_string'], 
@@ -140,67 +158,8 @@ class MacOSSystemMonitor(BaseSystemMonitor):
 
     def get_process_info(self) -> Dict[str, Any]:
         """获取进程信息"""
-        processes = []
-        try:
-            # 获取更详细的进程信息
-            for proc in psutil.process_iter([
-                'pid', 'name', 'cpu_percent', 'memory_percent', 
-                'memory_info', 'create_time', 'status', 'username'
-            ]):
-                try:
-                    proc_info = proc.info
-                    
-                    # 确保cpu_percent和memory_percent不为None
-                    if proc_info.get('cpu_percent') is None:
-                        proc_info['cpu_percent'] = 0.0
-                    if proc_info.get('memory_percent') is None:
-                        proc_info['memory_percent'] = 0.0
-                    
-                    # 添加内存使用量（MB）
-                    memory_info = proc_info.get('memory_info')
-                    if memory_info:
-                        proc_info['memory_mb'] = memory_info.rss / 1024 / 1024
-                    else:
-                        proc_info['memory_mb'] = 0.0
-                    
-                    # 格式化创建时间
-                    create_time = proc_info.get('create_time')
-                    if create_time:
-                        import datetime
-                        proc_info['create_time_str'] = datetime.datetime.fromtimestamp(create_time).strftime('%H:%M:%S')
-                    else:
-                        proc_info['create_time_str'] = 'N/A'
-                    
-                    # 处理用户名
-                    if not proc_info.get('username'):
-                        proc_info['username'] = 'N/A'
-                    
-                    processes.append(proc_info)
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    pass
-        except Exception as e:
-            print(f"获取进程信息时出错: {e}")
-            pass
-        
-        # 安全的排序，获取前5个
-        try:
-            top_cpu = sorted(processes, 
-                           key=lambda x: x.get('cpu_percent') or 0, 
-                           reverse=True)[:5]
-            top_memory = sorted(processes, 
-                          key=lambda x: x.get('memory_percent') or 0, 
-                          reverse=True)[:5]
-        except Exception as e:
-            print(f"排序进程信息时出错: {e}")
-            top_cpu = []
-            top_memory = []
-        
-        return {
-            'count': len(processes),
-            'top_cpu': top_cpu,
-            'top_memory': top_memory
-        }
-
+        return self.process_registry.get_process_info()
+    
     def get_system_load(self) -> Dict[str, Any]:
         """获取系统负载"""
         load_info = {}
@@ -226,14 +185,14 @@ class MacOSSystemMonitor(BaseSystemMonitor):
         
         return load_info
 
-    def get_all_info(self) -> Dict[str, Any]:
-        """获取所有系统信息，格式化为前端期望的结构"""
-        cpu_info = self.get_cpu_info()
-        memory_info = self.get_memory_info()
-        disk_info = self.get_disk_info()
-        network_info = self.get_network_info()
-        process_info = self.get_process_info()
-        load_info = self.get_system_load()
+    def compose_snapshot(self, sections: Dict[str, Any]) -> Dict[str, Any]:
+        """合并各采集项结果，格式化为前端期望的结构"""
+        cpu_info = sections.get('cpu', {})
+        memory_info = sections.get('memory', {'virtual': {}})
+        disk_info = sections.get('disk', {'partitions': []})
+        network_info = sections.get('network', {})
+        process_info = sections.get('processes', {})
+        load_info = sections.get('load', {})
         
         # 计算主磁盘使用率（通常是根分区）
         main_disk_percent = 0
@@ -247,8 +206,7 @@ class MacOSSystemMonitor(BaseSystemMonitor):
             'cpu': {
                 'percent': cpu_info.get('percent', 0),
                 'count_logical': cpu_info.get('count_logical', 0),
-                'count_physical': cpu_info.get('count_physical', 0),
-                'brand': cpu_info.get('brand', 'Unknown')
+                'count_physical': cpu_info.get('count_physical', 0)
             },
             'memory': {
                 'percent': memory_info['virtual'].get('percent', 0),
@@ -0,0 +1,222 @@
+import os
+import time
+import socket
+import threading
+import logging
+import psutil
+from typing import Dict, Any, List, Optional
+from .host_paths import HostPaths, host_paths
+
+logger = logging.getLogger(__name__)
+
+# rtnetlink 组播组：链路、IPv4/IPv6 地址的变化
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV6_IFADDR = 0x100
+# 接口标志位（/sys/class/net/*/flags）
+IFF_UP = 0x1
+
+
+def collect_addresses() -> Dict[str, List[Dict[str, Any]]]:
+    """读取所有网络接口的地址"""
+    return {
+        interface: [
+            {
+                'family': str(addr.family),
+                'address': addr.address,
+                'netmask': addr.netmask,
+                'broadcast': addr.broadcast
+            } for addr in addrs
+        ]
+        for interface, addrs in psutil.net_if_addrs().items()
+    }
+
+
+def collect_link_state() -> Dict[str, Dict[str, Any]]:
+    """读取各网络接口的链路状态（是否启用、速率Mb/s、双工、MTU）"""
+    return {
+        interface: {
+            'isup': stats.isup,
+            'speed': stats.speed,
+            'duplex': getattr(stats.duplex, 'name', str(stats.duplex)).replace('NIC_DUPLEX_', '').lower(),
+            'mtu': stats.mtu
+        }
+        for interface, stats in psutil.net_if_stats().items()
+    }
+
+
+def _read_sysfs(path: str) -> Optional[str]:
+    """读取 sysfs 属性，接口不支持该属性（如回环设备的速率）时返回 None"""
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def collect_sysfs_link_state(paths: HostPaths = host_paths) -> Dict[str, Dict[str, Any]]:
+    """从（宿主机的）/sys/class/net 读取各接口的链路状态，字段与 collect_link_state 相同
+
+    sysfs 显示的是挂载它的网络命名空间中的接口，容器中挂载的宿主机 /sys 因此给出宿主机的接口。
+    """
+    root = paths.sys_path('class', 'net')
+    links = {}
+    for interface in os.listdir(root):
+        directory = os.path.join(root, interface)
+        flags = _read_sysfs(os.path.join(directory, 'flags'))
+        operstate = _read_sysfs(os.path.join(directory, 'operstate'))
+        speed = _read_sysfs(os.path.join(directory, 'speed'))
+        mtu = _read_sysfs(os.path.join(directory, 'mtu'))
+        links[interface] = {
+            'isup': bool(flags and int(flags, 16) & IFF_UP) and operstate in ('up', 'unknown'),
+            'speed': max(0, int(speed)) if speed and speed.lstrip('-').isdigit() else 0,
+            'duplex': _read_sysfs(os.path.join(directory, 'duplex')) or 'unknown',
+            'mtu': int(mtu) if mtu and mtu.isdigit() else 0
+        }
+    return links
+
+
+def link_state_scope(paths: HostPaths = host_paths) -> str:
+    """链路状态的来源范围：本进程不在宿主机网络命名空间时，挂载了宿主机 /sys 即可读取宿主机的链路状态"""
+    if paths.in_host_netns() or paths.is_host_sys:
+        return 'host'
+    return 'container'
+
+
+def collect_host_link_state(paths: HostPaths = host_paths) -> Dict[str, Dict[str, Any]]:
+    """读取宿主机各接口的链路状态，无法取得时为容器自身的（见 link_state_scope）"""
+    if not paths.in_host_netns() and paths.is_host_sys:
+        return collect_sysfs_link_state(paths)
+    return collect_link_state()
+
+
+class NicInventory:
+    """网络接口清单缓存
+
+    接口的地址、MAC、是否为虚拟设备等信息很少变化，却在接口众多（如 Kubernetes 节点上的
+    大量 veth）时占据快照的大部分体积。清单只在接口变化时重新读取：优先订阅 rtnetlink 的
+    链路/地址变化消息（每次检查只是一次非阻塞 recv），同时检查 /sys/class/net 的修改时间，
+    并至少每 max_age 秒重读一次。清单内容变化时版本号加一，客户端据此按需拉取。
+
+    地址和 netlink 事件来自本进程的网络命名空间：容器未使用 network_mode: host 时是容器自身的接口，
+    清单中的 scope 为 container。
+    """
+
+    def __init__(self, paths: HostPaths = host_paths, max_age: float = 300.0, use_netlink: bool = True):
+        self.paths = paths
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.version = 0
+        self.reloads = 0
+        self._interfaces: Optional[Dict[str, Dict[str, Any]]] = None
+        self._read_at = 0.0
+        self._updated_at: Optional[float] = None
+        self._sysfs_mtime: Optional[int] = None
+        self._netlink: Optional[socket.socket] = self._open_netlink() if use_netlink else None
+
+    @classmethod
+    def from_env(cls) -> 'NicInventory':
+        """根据环境变量创建：NIC_INVENTORY_MAX_AGE、NIC_INVENTORY_NETLINK"""
+        return cls(
+            max_age=float(os.getenv('NIC_INVENTORY_MAX_AGE', 300)),
+            use_netlink=os.getenv('NIC_INVENTORY_NETLINK', '1') != '0'
+        )
+
+    @staticmethod
+    def _open_netlink() -> Optional[socket.socket]:
+        """订阅 rtnetlink 的链路和地址变化，不支持时返回 None"""
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW | socket.SOCK_NONBLOCK | socket.SOCK_CLOEXEC,
+                                 socket.NETLINK_ROUTE)
+            sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV6_IFADDR))
+            return sock
+        except (OSError, AttributeError) as e:
+            logger.warning(f"无法订阅 netlink，网络接口清单改为按 sysfs 修改时间检测变化: {e}")
+            return None
+
+    def _netlink_events(self) -> bool:
+        """读空 netlink 套接字，返回期间是否有变化消息（需持有锁）"""
+        changed = False
+        while True:
+            try:
+                if not self._netlink.recv(65536):
+                    break
+                changed = True
+            except BlockingIOError:
+                break
+            except OSError:
+                # 接收缓冲区溢出（ENOBUFS）说明丢了消息，按已变化处理
+                changed = True
+                break
+        return changed
+
+    def _sysfs_changed(self) -> bool:
+        """/sys/class/net 的修改时间是否变化（接口增删时变化，需持有锁）"""
+        try:
+            mtime = os.stat(self.paths.sys_path('class', 'net')).st_mtime_ns
+        except OSError:
+            return False
+        changed = mtime != self._sysfs_mtime
+        self._sysfs_mtime = mtime
+        return changed
+
+    def _changed(self) -> bool:
+        """清单是否可能已变化（需持有锁）"""
+        netlink = self._netlink is not None and self._netlink_events()
+        sysfs = self._sysfs_changed()
+        return netlink or sysfs or self._interfaces is None or time.monotonic() - self._read_at >= self.max_age
+
+    def _is_virtual(self, interface: str) -> bool:
+        """是否为虚拟设备（veth、网桥、回环等在 /sys/devices/virtual/net 下）"""
+        return os.path.exists(self.paths.sys_path('devices', 'virtual', 'net', interface))
+
+    def _collect(self) -> Dict[str, Dict[str, Any]]:
+        """读取完整的接口清单"""
+        interfaces = {}
+        for interface, addresses in collect_addresses().items():
+            mac = next((a['address'] for a in addresses if a['family'] == str(psutil.AF_LINK)), None)
+            interfaces[interface] = {
+                'addresses': [a for a in addresses if a['family'] != str(psutil.AF_LINK)],
+                'mac': mac,
+                'virtual': self._is_virtual(interface)
+            }
+        return interfaces
+
+    def refresh(self) -> int:
+        """接口可能变化时重新读取清单，返回当前版本号"""
+        with self.lock:
+            if self._changed():
+                interfaces = self._collect()
+                self._read_at = time.monotonic()
+                self.reloads += 1
+                if interfaces != self._interfaces:
+                    self._interfaces = interfaces
+                    self._updated_at = time.time()
+                    self.version += 1
+            return self.version
+
+    def get(self) -> Dict[str, Any]:
+        """获取接口清单及其版本号"""
+        self.refresh()
+        with self.lock:
+            return {
+                'version': self.version,
+                'updated_at': self._updated_at,
+                'scope': self.paths.network_scope,
+                'interfaces': self._interfaces
+            }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """清单缓存统计信息"""
+        return {
+            'version': self.version,
+            'interfaces': len(self._interfaces or {}),
+            'reloads': self.reloads,
+            'netlink': self._netlink is not None
+        }
+
+    def close(self):
+        """关闭 netlink 套接字"""
+        if self._netlink is not None:
+            self._netlink.close()
+            self._netlink = None
@@ -0,0 +1,254 @@
+import os
+import re
+import time
+import select
+import fnmatch
+import threading
+import logging
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Dict, Any, List, Optional, Tuple
+from .host_paths import HostPaths, host_paths
+
+logger = logging.getLogger(__name__)
+
+# 默认排除的文件系统类型和挂载点：只读镜像、容器运行时和 kubelet 为每个容器/Pod 创建的挂载
+DEFAULT_EXCLUDE_FSTYPES = ('squashfs', 'iso9660')
+DEFAULT_EXCLUDE_MOUNTS = ('/snap/*', '/var/lib/docker/*', '/var/lib/containerd/*', '/run/containerd/*',
+                          '/var/lib/kubelet/pods/*', '/run/k3s/*')
+
+
+def _unescape(value: str) -> str:
+    """还原挂载表中的八进制转义（如空格写作 \\040）"""
+    if '\\' not in value:
+        return value
+    return re.sub(r'\\([0-7]{3})', lambda m: chr(int(m.group(1), 8)), value)
+
+
+def _split(value: Optional[str]) -> Tuple[str, ...]:
+    """解析逗号分隔的列表"""
+    return tuple(item.strip() for item in (value or '').split(',') if item.strip())
+
+
+def parse_mountinfo(text: str) -> List[Dict[str, str]]:
+    """解析 mountinfo：挂载ID 父ID 主:次设备号 根 挂载点 选项 [可选字段...] - 类型 来源 超级块选项"""
+    mounts = []
+    for line in text.splitlines():
+        fields = line.split()
+        try:
+            separator = fields.index('-', 6)
+        except ValueError:
+            continue
+        if len(fields) < separator + 3:
+            continue
+        mounts.append({
+            'dev': fields[2],
+            'root': _unescape(fields[3]),
+            'mountpoint': _unescape(fields[4]),
+            'opts': fields[5],
+            'fstype': fields[separator + 1],
+            'device': _unescape(fields[separator + 2])
+        })
+    return mounts
+
+
+class PartitionManager:
+    """分区枚举和容量采集
+
+    挂载表只在变化时重新读取：内核在挂载/卸载时让 mountinfo 文件描述符产生 POLLPRI 事件，
+    不支持时退回按 max_age 定期重读。枚举结果按文件系统类型和挂载点（通配符）过滤，
+    同一设备（主:次设备号）的绑定挂载只保留一个。statvfs 在守护线程中执行并设置期限，
+    挂起的网络挂载超时后沿用上一次的容量并标记为 stale，在其返回前不会重复提交，
+    也不会阻止进程退出。
+    """
+
+    def __init__(self, paths: HostPaths = host_paths,
+                 include_fstypes: Tuple[str, ...] = (), exclude_fstypes: Tuple[str, ...] = DEFAULT_EXCLUDE_FSTYPES,
+                 include_mounts: Tuple[str, ...] = (), exclude_mounts: Tuple[str, ...] = DEFAULT_EXCLUDE_MOUNTS,
+                 statvfs_timeout: float = 2.0, max_age: float = 300.0):
+        self.paths = paths
+        self.include_fstypes = set(include_fstypes)
+        self.exclude_fstypes = set(exclude_fstypes)
+        self.include_mounts = include_mounts
+        self.exclude_mounts = exclude_mounts
+        self.statvfs_timeout = statvfs_timeout
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.usage_lock = threading.Lock()
+        self._mounts: Optional[List[Dict[str, str]]] = None
+        self._read_at = 0.0
+        self._poller = None
+        self._fd: Optional[int] = None
+        self._watched = False
+        # 挂载点 -> 尚未返回的 statvfs 任务 / 上一次成功的容量
+        self._pending: Dict[str, Any] = {}
+        self._last_usage: Dict[str, Dict[str, Any]] = {}
+        self.reloads = 0
+        self.timeouts = 0
+
+    @classmethod
+    def from_env(cls) -> 'PartitionManager':
+        """根据环境变量创建：DISK_FSTYPES_INCLUDE/DISK_FSTYPES_EXCLUDE、DISK_MOUNTS_INCLUDE/DISK_MOUNTS_EXCLUDE、
+        DISK_STATVFS_TIMEOUT、DISK_MOUNTS_MAX_AGE"""
+        return cls(
+            include_fstypes=_split(os.getenv('DISK_FSTYPES_INCLUDE')),
+            exclude_fstypes=_split(os.getenv('DISK_FSTYPES_EXCLUDE', ','.join(DEFAULT_EXCLUDE_FSTYPES))),
+            include_mounts=_split(os.getenv('DISK_MOUNTS_INCLUDE')),
+            exclude_mounts=_split(os.getenv('DISK_MOUNTS_EXCLUDE', ','.join(DEFAULT_EXCLUDE_MOUNTS))),
+            statvfs_timeout=float(os.getenv('DISK_STATVFS_TIMEOUT', 2.0)),
+            max_age=float(os.getenv('DISK_MOUNTS_MAX_AGE', 300))
+        )
+
+    def _watch(self):
+        """打开 mountinfo 并注册 POLLPRI 事件（需持有锁）"""
+        self._watched = True
+        try:
+            self._fd = os.open(self.paths.mountinfo_path(), os.O_RDONLY | getattr(os, 'O_CLOEXEC', 0))
+            self._poller = select.poll()
+            self._poller.register(self._fd, select.POLLPRI | select.POLLERR)
+        except (OSError, AttributeError) as e:
+            logger.warning(f"无法监视挂载表变化，改为每 {self.max_age:.0f}s 重新读取: {e}")
+            self._poller = None
+
+    def _changed(self) -> bool:
+        """挂载表是否可能已变化（需持有锁）"""
+        if self._mounts is None or time.monotonic() - self._read_at >= self.max_age:
+            return True
+        if self._poller is None:
+            return False
+        # 每次 poll 返回事件后内核即清除该事件
+        return bool(self._poller.poll(0))
+
+    def _wanted(self, mount: Dict[str, str], nodev: set) -> bool:
+        """按文件系统类型和挂载点过滤"""
+        fstype = mount['fstype']
+        if self.include_fstypes:
+            if fstype not in self.include_fstypes:
+                return False
+        elif fstype in nodev or mount['device'] == 'none':
+            # 未指定包含的类型时，与 psutil.disk_partitions() 一样只保留对应物理设备的文件系统
+            return False
+        if fstype in self.exclude_fstypes:
+            return False
+        mountpoint = mount['mountpoint']
+        if self.include_mounts and not any(fnmatch.fnmatch(mountpoint, p) for p in self.include_mounts):
+            return False
+        return not any(fnmatch.fnmatch(mountpoint, p) for p in self.exclude_mounts)
+
+    def _load(self) -> List[Dict[str, str]]:
+        """读取、过滤并去重挂载表"""
+        with open(self.paths.mountinfo_path(), 'r') as f:
+            mounts = parse_mountinfo(f.read())
+        nodev = self.paths.nodev_filesystems()
+        by_dev: Dict[str, Dict[str, str]] = {}
+        for mount in mounts:
+            if not self._wanted(mount, nodev):
+                continue
+            # 绑定挂载与原挂载的设备号相同，优先保留挂载文件系统根目录的那一个，其次是路径最短的
+            current = by_dev.get(mount['dev'])
+            if current is None or (mount['root'] == '/', -len(mount['mountpoint'])) > \
+                    (current['root'] == '/', -len(current['mountpoint'])):
+                by_dev[mount['dev']] = mount
+        return sorted(by_dev.values(), key=lambda m: m['mountpoint'])
+
+    def get_mounts(self) -> List[Dict[str, str]]:
+        """获取过滤后的挂载表，只在变化时重新读取"""
+        with self.lock:
+            if not self._watched:
+                self._watch()
+            if self._changed():
+                self._mounts = self._load()
+                self._read_at = time.monotonic()
+                self.reloads += 1
+            return self._mounts
+
+    def _submit(self, mountpoint: str) -> Future:
+        """在守护线程中执行 statvfs"""
+        future = Future()
+
+        def run():
+            try:
+                future.set_result(self.paths.disk_usage(mountpoint))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name=f"statvfs {mountpoint}", daemon=True).start()
+        return future
+
+    def _statvfs(self, mounts: List[Dict[str, str]]) -> Dict[str, Tuple[Optional[Dict[str, Any]], bool]]:
+        """并发执行 statvfs，所有挂载点共用一个期限，返回 挂载点 -> (容量, 是否过期)"""
+        futures = {}
+        for mount in mounts:
+            mountpoint = mount['mountpoint']
+            future = self._pending.get(mountpoint)
+            if future is None:
+                future = self._pending[mountpoint] = self._submit(mountpoint)
+            futures[mountpoint] = future
+
+        deadline = time.monotonic() + self.statvfs_timeout
+        results = {}
+        for mountpoint, future in futures.items():
+            try:
+                usage = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeout:
+                # 上一次的任务仍挂起，下次不再重复提交
+                self.timeouts += 1
+                logger.warning(f"分区 {mountpoint} 的 statvfs 超过 {self.statvfs_timeout:.1f}s 未返回")
+                results[mountpoint] = (self._last_usage.get(mountpoint), True)
+                continue
+            except PermissionError as e:
+                logger.warning(f"权限错误，无法访问分区 {mountpoint}: {e}")
+                usage = None
+            except Exception as e:
+                logger.error(f"获取分区信息失败: {e}")
+                usage = None
+            del self._pending[mountpoint]
+            if usage is not None:
+                self._last_usage[mountpoint] = usage
+            results[mountpoint] = (usage, False)
+        # 已卸载的挂载点
+        for mountpoint in list(self._last_usage):
+            if mountpoint not in futures:
+                del self._last_usage[mountpoint]
+        for mountpoint in [m for m, future in self._pending.items() if m not in futures and future.done()]:
+            del self._pending[mountpoint]
+        return results
+
+    def get_partitions(self) -> List[Dict[str, Any]]:
+        """获取各分区的容量和使用率"""
+        mounts = self.get_mounts()
+        with self.usage_lock:
+            usages = self._statvfs(mounts)
+        partitions = []
+        for mount in mounts:
+            usage, stale = usages.get(mount['mountpoint'], (None, False))
+            if usage is None:
+                continue
+            partition = {
+                'device': mount['device'],
+                'mountpoint': mount['mountpoint'],
+                'fstype': mount['fstype'],
+                'total': usage['total'],
+                'used': usage['used'],
+                'free': usage['free'],
+                'percent': (usage['used'] / usage['total']) * 100 if usage['total'] > 0 else 0
+            }
+            if stale:
+                partition['stale'] = True
+            partitions.append(partition)
+        return partitions
+
+    def get_stats(self) -> Dict[str, Any]:
+        """挂载表缓存和 statvfs 统计信息"""
+        return {
+            'mounts': len(self._mounts or []),
+            'reloads': self.reloads,
+            'watching': self._poller is not None,
+            'statvfs_timeouts': self.timeouts,
+            'statvfs_pending': len(self._pending)
+        }
+
+    def close(self):
+        """关闭挂载表文件描述符"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
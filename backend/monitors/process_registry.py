@@ -0,0 +1,336 @@
+import os
+import time
+import heapq
+import datetime
+import threading
+import psutil
+from typing import Dict, Any, List, Optional, Callable, Iterable
+
+# 按 uid 查询用户名，返回 None 时使用 psutil 的结果
+UserLookup = Callable[[int], Optional[str]]
+# 读取PID当前对应进程的启动时间，用于识别PID复用；进程不存在或无法读取时返回 None
+StartTimeReader = Callable[[int], Optional[float]]
+
+# 进程快照中返回的字段
+PROCESS_FIELDS = (
+    'pid', 'name', 'username', 'status', 'cpu_percent', 'memory_percent',
+    'memory_mb', 'create_time', 'create_time_str'
+)
+# 扫描时不读取、只在进程浏览接口用到时才读取的列
+PROCESS_DETAIL_COLUMNS = ('num_threads', 'num_fds', 'io_read_bytes', 'io_write_bytes')
+# 进程列表中返回、可以排序的列
+PROCESS_COLUMNS = PROCESS_FIELDS + ('ppid',) + PROCESS_DETAIL_COLUMNS
+
+
+class ProcessEntry:
+    """进程表中的一项，保存复用的 psutil.Process 对象和只需解析一次的静态字段"""
+
+    __slots__ = (
+        'proc', 'pid', 'name', 'username', 'create_time', 'create_time_str',
+        'status', 'cpu_percent', 'memory_percent', 'memory_mb',
+        'ppid', 'start_time'
+    )
+
+    def __init__(self, proc: psutil.Process, user_lookup: Optional[UserLookup] = None,
+                 start_time: Optional[float] = None):
+        self.proc = proc
+        self.pid = proc.pid
+        # 建立表项时读取的启动时间，与之后每轮读取的值不同时说明PID已被复用
+        self.start_time = start_time
+        self.cpu_percent = 0.0
+        self.memory_percent = 0.0
+        self.memory_mb = 0.0
+        self.status = 'unknown'
+
+        with proc.oneshot():
+            try:
+                self.create_time = proc.create_time()
+            except psutil.AccessDenied:
+                self.create_time = None
+            try:
+                self.name = proc.name()
+            except psutil.AccessDenied:
+                self.name = 'N/A'
+            try:
+                username = user_lookup(proc.uids().real) if user_lookup is not None else None
+                self.username = username or proc.username() or 'N/A'
+            except (psutil.AccessDenied, KeyError):
+                self.username = 'N/A'
+            try:
+                self.ppid = proc.ppid()
+            except psutil.AccessDenied:
+                self.ppid = None
+        if self.create_time:
+            self.create_time_str = datetime.datetime.fromtimestamp(self.create_time).strftime('%H:%M:%S')
+        else:
+            self.create_time_str = 'N/A'
+        # 第一次调用只建立基准，返回值为0
+        proc.cpu_percent(interval=None)
+
+    def update(self, total_memory: int):
+        """刷新动态字段"""
+        proc = self.proc
+        with proc.oneshot():
+            try:
+                self.cpu_percent = proc.cpu_percent(interval=None)
+            except psutil.AccessDenied:
+                self.cpu_percent = 0.0
+            try:
+                rss = proc.memory_info().rss
+                self.memory_mb = rss / 1024 / 1024
+                self.memory_percent = rss / total_memory * 100 if total_memory else 0.0
+            except psutil.AccessDenied:
+                self.memory_mb = 0.0
+                self.memory_percent = 0.0
+            try:
+                self.status = proc.status()
+            except psutil.AccessDenied:
+                self.status = 'unknown'
+
+    def to_dict(self, fields: Iterable[str] = PROCESS_FIELDS) -> Dict[str, Any]:
+        """转换为字典，默认为快照中使用的字段"""
+        return {field: getattr(self, field) for field in fields}
+
+
+def proc_stat_start_time(proc_root: str) -> StartTimeReader:
+    """返回从 <proc_root>/<pid>/stat 第22个字段读取启动时间（开机以来的时钟滴答数）的函数
+
+    stat 文件对所有用户可读，不需要创建 Process 对象，其他用户的进程也能识别PID复用。
+    """
+    def read(pid: int) -> Optional[float]:
+        try:
+            with open(os.path.join(proc_root, str(pid), 'stat'), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        # 进程名可能包含空格和括号，从最后一个 ')' 之后的第3个字段（state）开始计数
+        fields = data[data.rfind(b')') + 2:].split()
+        try:
+            return float(fields[19])
+        except (IndexError, ValueError):
+            return None
+    return read
+
+
+def psutil_start_time(pid: int) -> Optional[float]:
+    """通过 psutil 读取进程的启动时间，用于没有 procfs 的平台"""
+    try:
+        return psutil.Process(pid).create_time()
+    except psutil.Error:
+        return None
+
+
+def read_details(proc: psutil.Process, cmdline: bool = False) -> Dict[str, Any]:
+    """读取线程数、文件描述符数和IO计数（可选命令行），无权限或平台不支持的项为 None"""
+    details = dict.fromkeys(PROCESS_DETAIL_COLUMNS + ('io_read_count', 'io_write_count'))
+    try:
+        with proc.oneshot():
+            try:
+                details['num_threads'] = proc.num_threads()
+            except psutil.AccessDenied:
+                pass
+            # 文件描述符数和IO计数并非所有平台都支持
+            if hasattr(proc, 'num_fds'):
+                try:
+                    details['num_fds'] = proc.num_fds()
+                except psutil.AccessDenied:
+                    pass
+            if hasattr(proc, 'io_counters'):
+                try:
+                    io = proc.io_counters()
+                    details['io_read_bytes'] = io.read_bytes
+                    details['io_write_bytes'] = io.write_bytes
+                    details['io_read_count'] = io.read_count
+                    details['io_write_count'] = io.write_count
+                except psutil.AccessDenied:
+                    pass
+            if cmdline:
+                try:
+                    details['cmdline'] = ' '.join(proc.cmdline())
+                except psutil.AccessDenied:
+                    details['cmdline'] = ''
+    except (psutil.NoSuchProcess, psutil.ZombieProcess):
+        # 进程在扫描后已退出
+        if cmdline:
+            details['cmdline'] = ''
+    return details
+
+
+class ProcessTable:
+    """一轮扫描后的进程表，发布后不再修改
+
+    查询直接读取该表，不需要重新扫描 /proc；按列排序的结果在首次使用时计算并缓存，
+    同一轮内的后续查询只需过滤和分页。线程数、文件描述符数和IO计数不在扫描时读取：
+    只为返回的行读取，按这些列排序时才为整张表读取一次，结果在本轮内缓存。
+    读取 /proc 和排序都在锁外进行，锁只保护缓存，并发的查询不会排在一次全表读取之后；
+    同时按同一列首次排序的请求可能各自计算一次，先完成的结果被缓存。
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]], procs: Optional[Dict[int, psutil.Process]] = None,
+                 generation: int = 0, updated_at: Optional[float] = None):
+        self.rows = rows
+        self.by_pid = {row['pid']: row for row in rows}
+        self.procs = procs or {}
+        self.generation = generation
+        self.updated_at = updated_at
+        self.lock = threading.Lock()
+        self._orders: Dict[str, List[Dict[str, Any]]] = {}
+        self._details: Dict[int, Dict[str, Any]] = {}
+
+    def _row_details(self, pid: int) -> Dict[str, Any]:
+        """某个进程的线程数、文件描述符数和IO计数，本轮内只读取一次"""
+        with self.lock:
+            details = self._details.get(pid)
+        if details is None:
+            proc = self.procs.get(pid)
+            details = read_details(proc) if proc is not None else dict.fromkeys(PROCESS_DETAIL_COLUMNS)
+            with self.lock:
+                details = self._details.setdefault(pid, details)
+        return details
+
+    def _value(self, row: Dict[str, Any], column: str) -> Any:
+        """行中某一列的值"""
+        if column in PROCESS_DETAIL_COLUMNS:
+            return self._row_details(row['pid'])[column]
+        return row[column]
+
+    def sorted_by(self, column: str) -> List[Dict[str, Any]]:
+        """按列升序排列的进程（缺失值在前）"""
+        with self.lock:
+            order = self._orders.get(column)
+        if order is None:
+            def key(row):
+                value = self._value(row, column)
+                return value is not None, value
+            order = sorted(self.rows, key=key)
+            with self.lock:
+                order = self._orders.setdefault(column, order)
+        return order
+
+    def _item(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """列表中返回的一行"""
+        return {column: self._value(row, column) for column in PROCESS_COLUMNS}
+
+    def query(self, sort: str = 'cpu_percent', descending: bool = True,
+              users: Optional[Iterable[str]] = None, name: Optional[str] = None,
+              statuses: Optional[Iterable[str]] = None, offset: int = 0, limit: int = 50) -> Dict[str, Any]:
+        """排序、按用户/名称（子串，不区分大小写）/状态过滤并分页"""
+        if sort not in PROCESS_COLUMNS:
+            raise ValueError(f"不支持的排序列: {sort}")
+        order = self.sorted_by(sort)
+        if descending:
+            order = reversed(order)
+        users = set(users) if users else None
+        statuses = set(statuses) if statuses else None
+        name = name.lower() if name else None
+
+        total = 0
+        items = []
+        for row in order:
+            if users is not None and row['username'] not in users:
+                continue
+            if statuses is not None and row['status'] not in statuses:
+                continue
+            if name is not None and name not in row['name'].lower():
+                continue
+            if offset <= total < offset + limit:
+                items.append(self._item(row))
+            total += 1
+        return {
+            'generation': self.generation,
+            'updated_at': self.updated_at,
+            'total': total,
+            'offset': offset,
+            'limit': limit,
+            'sort': sort,
+            'order': 'desc' if descending else 'asc',
+            'items': items
+        }
+
+    def get(self, pid: int) -> Optional[Dict[str, Any]]:
+        """单个进程的详情，线程数、文件描述符数、IO计数和命令行在调用时读取；进程已退出或PID已被复用时返回 None"""
+        row = self.by_pid.get(pid)
+        proc = self.procs.get(pid)
+        if row is None or proc is None or not proc.is_running():
+            return None
+        return dict(row, **read_details(proc, cmdline=True), generation=self.generation, updated_at=self.updated_at)
+
+
+class ProcessRegistry:
+    """增量维护的进程表
+
+    按PID缓存 psutil.Process 对象，进程名、用户名和启动时间只在进程首次出现时解析，
+    之后每轮只刷新CPU、内存和状态。复用 Process 对象也使 cpu_percent 能够基于上一轮的差值计算。
+    每轮通过 start_time_reader 读取各PID的启动时间（Linux 上直接读取 /proc/<pid>/stat），
+    与表项记录的不同或无法读取时按新进程建立表项，被复用的PID不会沿用旧进程的CPU基准。
+    每轮扫描结束后发布一个不可变的 ProcessTable，进程浏览接口从中查询。
+    """
+
+    def __init__(self, top_n: int = 5, user_lookup: Optional[UserLookup] = None,
+                 start_time_reader: Optional[StartTimeReader] = None):
+        self.top_n = top_n
+        # 容器中监控宿主机时，用户名按宿主机的用户数据库解析
+        self.user_lookup = user_lookup
+        self.start_time_reader = start_time_reader or psutil_start_time
+        # 同一时间只允许一次扫描；发布的进程表整体替换，读取方无需加锁
+        self.lock = threading.Lock()
+        self.table = ProcessTable([])
+        self.entries: Dict[int, ProcessEntry] = {}
+
+    def refresh(self):
+        """扫描一次进程列表，增量更新进程表"""
+        with self.lock:
+            self._refresh()
+
+    def _refresh(self):
+        """扫描进程列表并发布新的进程表（需持有锁）"""
+        total_memory = psutil.virtual_memory().total
+        entries = {}
+        for pid in psutil.pids():
+            start_time = self.start_time_reader(pid)
+            entry = self.entries.get(pid)
+            try:
+                if entry is None or start_time is None or entry.start_time != start_time:
+                    # 新进程、PID被复用或无法确认是同一进程时，按新进程建立表项
+                    entry = ProcessEntry(psutil.Process(pid), self.user_lookup, start_time)
+                entry.update(total_memory)
+            except (psutil.NoSuchProcess, psutil.ZombieProcess, psutil.AccessDenied):
+                continue
+            entries[pid] = entry
+        # 已退出和PID已被复用的旧进程随旧表一起丢弃
+        self.entries = entries
+        self.table = ProcessTable(
+            [entry.to_dict(PROCESS_FIELDS + ('ppid',)) for entry in entries.values()],
+            {entry.pid: entry.proc for entry in entries.values()},
+            self.table.generation + 1,
+            time.time()
+        )
+
+    def top(self, field: str, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """按指定字段取前N个进程"""
+        n = self.top_n if n is None else n
+        return [
+            {column: row[column] for column in PROCESS_FIELDS}
+            for row in heapq.nlargest(n, self.table.rows, key=lambda row: row[field] or 0)
+        ]
+
+    def query(self, **kwargs) -> Dict[str, Any]:
+        """查询最近一轮的进程表，参数见 ProcessTable.query"""
+        return self.table.query(**kwargs)
+
+    def get(self, pid: int) -> Optional[Dict[str, Any]]:
+        """获取最近一轮扫描中某个进程的详情"""
+        return self.table.get(pid)
+
+    def get_process_info(self) -> Dict[str, Any]:
+        """刷新进程表并返回进程数量和CPU/内存占用最高的进程"""
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"获取进程信息时出错: {e}")
+
+        return {
+            'count': len(self.table.rows),
+            'top_cpu': self.top('cpu_percent'),
+            'top_memory': self.top('memory_percent')
+        }
@@ -0,0 +1,230 @@
+import os
+import threading
+import logging
+from collections import namedtuple
+from typing import Dict, Any, List, Optional, Tuple
+from .host_paths import HostPaths, host_paths
+
+logger = logging.getLogger(__name__)
+
+# 与 psutil.cpu_times() 字段一致，CpuTimesSampler 可以直接使用
+CpuTimes = namedtuple('CpuTimes', ['user', 'nice', 'system', 'idle', 'iowait', 'irq', 'softirq',
+                                   'steal', 'guest', 'guest_nice'])
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+SECTOR_SIZE = 512
+SWAP_PAGE_SIZE = 4096  # /proc/vmstat 中 pswpin/pswpout 以 4KB 页为单位
+
+
+class ProcFile:
+    """保持打开的 /proc 文件
+
+    文件描述符只打开一次，每次采集用 preadv 从偏移0重新读入可复用的缓冲区，
+    内容超过缓冲区大小时扩容。
+    """
+
+    def __init__(self, path: str, size: int = 4096):
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY | getattr(os, 'O_CLOEXEC', 0))
+        self.buffer = bytearray(size)
+        self.lock = threading.Lock()
+
+    def read(self) -> bytes:
+        """读取完整内容"""
+        with self.lock:
+            while True:
+                length = os.preadv(self.fd, [self.buffer], 0)
+                if length < len(self.buffer):
+                    return bytes(memoryview(self.buffer)[:length])
+                self.buffer = bytearray(len(self.buffer) * 2)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class KeyedProcFile(ProcFile):
+    """"键 值" 格式的文件（meminfo、vmstat），首次解析时记录各键所在的行号，之后按行号直接取值"""
+
+    def __init__(self, path: str, keys: Tuple[bytes, ...], size: int = 8192):
+        super().__init__(path, size)
+        self.keys = keys
+        self.offsets: Dict[bytes, int] = {}
+
+    def _index(self, lines: List[bytes]):
+        """重新计算各键所在的行号"""
+        self.offsets = {}
+        for number, line in enumerate(lines):
+            key = line.split(b':', 1)[0].split(b' ', 1)[0]
+            if key in self.keys:
+                self.offsets[key] = number
+
+    def values(self) -> Dict[str, int]:
+        """读取各键的数值（第一列）"""
+        lines = self.read().split(b'\n')
+        result = {}
+        for attempt in range(2):
+            result = {}
+            stale = False
+            for key, number in self.offsets.items():
+                line = lines[number] if number < len(lines) else b''
+                if not line.startswith(key):
+                    stale = True
+                    break
+                result[key.decode()] = int(line[len(key):].lstrip(b': \t').split(None, 1)[0])
+            if not stale and len(result) == len(self.offsets) and self.offsets:
+                return result
+            self._index(lines)
+        return result
+
+
+MEMINFO_KEYS = (b'MemTotal', b'MemFree', b'MemAvailable', b'Buffers', b'Cached', b'SReclaimable',
+                b'Shmem', b'Active', b'Inactive', b'Slab', b'SwapTotal', b'SwapFree')
+VMSTAT_KEYS = (b'pswpin', b'pswpout')
+
+
+def parse_net_dev(data: bytes) -> Dict[str, Tuple[int, ...]]:
+    """解析 /proc/net/dev，返回 接口名 -> (接收字节, 接收包, 接收错误, 接收丢弃, 发送字节, 发送包, 发送错误, 发送丢弃)"""
+    interfaces = {}
+    for line in data.split(b'\n')[2:]:
+        name, sep, rest = line.partition(b':')
+        if not sep:
+            continue
+        fields = rest.split()
+        interfaces[name.strip().decode()] = (
+            int(fields[0]), int(fields[1]), int(fields[2]), int(fields[3]),
+            int(fields[8]), int(fields[9]), int(fields[10]), int(fields[11])
+        )
+    return interfaces
+
+
+class ProcFsReader:
+    """Linux 采集热路径上的 /proc 快速读取层
+
+    持久打开 /proc/stat、/proc/meminfo、/proc/vmstat、/proc/diskstats、/proc/net/dev（宿主机 procfs 中为
+    /proc/1/net/dev）、/proc/loadavg 和 /proc/uptime，直接解析字节内容，不再每次打开文件并构造 psutil 的命名元组。
+    路径取自 HostPaths（容器中挂载的宿主机 /proc 和 /sys），读取失败时由调用方回退到 psutil。
+    """
+
+    def __init__(self, paths: HostPaths = host_paths):
+        self.paths = paths
+        self.files: Dict[str, ProcFile] = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def create(cls) -> Optional['ProcFsReader']:
+        """根据环境变量创建，MONITOR_FAST_PROC=0 或 /proc 不可用时返回 None"""
+        if os.getenv('MONITOR_FAST_PROC', '1') == '0' or not hasattr(os, 'preadv'):
+            return None
+        if not os.path.exists(host_paths.proc_path('stat')):
+            return None
+        return cls(host_paths)
+
+    def _file(self, name: str, factory=ProcFile, *args) -> ProcFile:
+        """获取（首次访问时打开）某个文件"""
+        proc_file = self.files.get(name)
+        if proc_file is None:
+            with self.lock:
+                proc_file = self.files.get(name)
+                if proc_file is None:
+                    # /proc/net 随网络命名空间而变，需要读取宿主机的网络统计
+                    path = self.paths.net_path(name[len('net/'):]) if name.startswith('net/') else \
+                        self.paths.proc_path(name)
+                    proc_file = self.files[name] = factory(path, *args)
+        return proc_file
+
+    def cpu_times(self) -> Tuple[CpuTimes, List[CpuTimes]]:
+        """读取 /proc/stat，返回 (总体, 每个CPU) 的CPU时间（秒）"""
+        total = None
+        per_cpu = []
+        for line in self._file('stat').read().split(b'\n'):
+            if not line.startswith(b'cpu'):
+                break
+            fields = line.split()
+            values = [int(value) / CLOCK_TICKS for value in fields[1:11]]
+            values.extend([0.0] * (10 - len(values)))
+            times = CpuTimes(*values)
+            if fields[0] == b'cpu':
+                total = times
+            else:
+                per_cpu.append(times)
+        if total is None:
+            raise OSError('/proc/stat 中没有CPU时间')
+        return total, per_cpu
+
+    def memory(self) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """读取 /proc/meminfo 和 /proc/vmstat，按 psutil 的口径计算内存和交换分区（字节）"""
+        info = self._file('meminfo', KeyedProcFile, MEMINFO_KEYS).values()
+        if 'MemTotal' not in info or 'MemAvailable' not in info:
+            raise OSError('/proc/meminfo 缺少必要字段')
+        kb = {key: value * 1024 for key, value in info.items()}
+        total = kb['MemTotal']
+        free = kb.get('MemFree', 0)
+        buffers = kb.get('Buffers', 0)
+        cached = kb.get('Cached', 0) + kb.get('SReclaimable', 0)
+        used = total - free - cached - buffers
+        if used < 0:
+            used = total - free
+        available = kb['MemAvailable']
+        virtual = {
+            'total': total,
+            'available': available,
+            'used': used,
+            'free': free,
+            'percent': round((total - available) / total * 100, 1) if total else 0.0,
+            'active': kb.get('Active', 0),
+            'inactive': kb.get('Inactive', 0),
+            'buffers': buffers,
+            'cached': cached
+        }
+
+        vmstat = self._file('vmstat', KeyedProcFile, VMSTAT_KEYS).values()
+        swap_total = kb.get('SwapTotal', 0)
+        swap_free = kb.get('SwapFree', 0)
+        swap_used = swap_total - swap_free
+        swap = {
+            'total': swap_total,
+            'used': swap_used,
+            'free': swap_free,
+            'percent': round(swap_used / swap_total * 100, 1) if swap_total else 0.0,
+            'sin': vmstat.get('pswpin', 0) * SWAP_PAGE_SIZE,
+            'sout': vmstat.get('pswpout', 0) * SWAP_PAGE_SIZE
+        }
+        return virtual, swap
+
+    def diskstats(self) -> Dict[str, Tuple[int, ...]]:
+        """读取 /proc/diskstats，返回 设备名 -> (读次数, 写次数, 读字节, 写字节, 读耗时ms, 写耗时ms, 忙碌ms)"""
+        disks = {}
+        for line in self._file('diskstats').read().split(b'\n'):
+            fields = line.split()
+            if len(fields) < 14:
+                continue
+            name = fields[2].decode()
+            disks[name] = (
+                int(fields[3]), int(fields[7]),
+                int(fields[5]) * SECTOR_SIZE, int(fields[9]) * SECTOR_SIZE,
+                int(fields[6]), int(fields[10]), int(fields[12])
+            )
+        return disks
+
+    def net_dev(self) -> Dict[str, Tuple[int, ...]]:
+        """读取宿主机的 /proc/net/dev，各列见 parse_net_dev"""
+        return parse_net_dev(self._file('net/dev').read())
+
+    def loadavg(self) -> Tuple[float, float, float]:
+        """读取 /proc/loadavg"""
+        fields = self._file('loadavg').read().split()
+        return float(fields[0]), float(fields[1]), float(fields[2])
+
+    def uptime(self) -> float:
+        """读取 /proc/uptime"""
+        return float(self._file('uptime').read().split()[0])
+
+    def close(self):
+        """关闭所有文件"""
+        with self.lock:
+            for proc_file in self.files.values():
+                try:
+                    proc_file.close()
+                except OSError:
+                    pass
+            self.files.clear()
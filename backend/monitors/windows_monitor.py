@@ -1,25 +1,43 @@
 import psutil
 from typing import Dict, Any
 from .base_monitor import BaseSystemMonitor
+from .process_registry import ProcessRegistry
+from .cpu_sampler import CpuTimesSampler
 
 class WindowsSystemMonitor(BaseSystemMonitor):
     """Windows系统监控器"""
+
+    def __init__(self):
+        # 增量维护的进程表，复用Process对象
+        self.process_registry = ProcessRegistry()
+        # 基于CPU时间差值的非阻塞采样，避免 cpu_percent(interval=1) 阻塞采集线程
+        self.cpu_sampler = CpuTimesSampler()
+        # 负载采集项使用独立的基准，与CPU采集项互不影响各自的差值区间
+        self.load_sampler = CpuTimesSampler(lambda: (psutil.cpu_times(), []))
     
     def get_cpu_info(self) -> Dict[str, Any]:
         """获取CPU信息"""
+        cpu_sample = self.cpu_sampler.sample()
         cpu_info = {
-            'percent': psutil.cpu_percent(interval=1),
+            'percent': cpu_sample['percent'],
             'count_logical': psutil.cpu_count(logical=True),
             'count_physical': psutil.cpu_count(logical=False),
-            'per_cpu': psutil.cpu_percent(interval=1, percpu=True)
+            'per_cpu': cpu_sample['per_cpu']
         }
         
+        return cpu_info
+    
+    def get_static_cpu_info(self) -> Dict[str, Any]:
+        """获取静态CPU信息"""
+        cpu_info = super().get_static_cpu_info()
+        
         # Windows特有的CPU信息
         try:
             import wmi
             c = wmi.WMI()
             for processor in c.Win32_Processor():
                 cpu_info['name'] = processor.Name
+                cpu_info['brand'] = processor.Name  # 为了兼容前端显示
                 cpu_info['manufacturer'] = processor.Manufacturer
                 break
         except ImportError:
@@ -118,60 +136,7 @@ class WindowsSystemMonitor(BaseSystemMonitor):
     
     def get_process_info(self) -> Dict[str, Any]:
         """获取进程信息"""
-        processes = []
-        try:
-            for proc in psutil.process_iter([
-                'pid', 'name', 'cpu_percent', 'memory_percent', 
-                'memory_info', 'create_time', 'status', 'username'
-            ]):
-                try:
-                    proc_info = proc.info
-                    
-                    if proc_info.get('cpu_percent') is None:
-                        proc_info['cpu_percent'] = 0.0
-                    if proc_info.get('memory_percent') is None:
-                        proc_info['memory_percent'] = 0.0
-                    
-                    memory_info = proc_info.get('memory_info')
-                    if memory_info:
-                        proc_info['memory_mb'] = memory_info.rss / 1024 / 1024
-                    else:
-                        proc_info['memory_mb'] = 0.0
-                    
-                    create_time = proc_info.get('create_time')
-                    if create_time:
-                        import datetime
-                        proc_info['create_time_str'] = datetime.datetime.fromtimestamp(create_time).strftime('%H:%M:%S')
-                    else:
-                        proc_info['create_time_str'] = 'N/A'
-                    
-                    if not proc_info.get('username'):
-                        proc_info['username'] = 'N/A'
-                    
-                    processes.append(proc_info)
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    pass
-        except Exception as e:
-            print(f"获取进程信息时出错: {e}")
-            pass
-        
-        try:
-            top_cpu = sorted(processes, 
-                           key=lambda x: x.get('cpu_percent') or 0, 
-                           reverse=True)[:5]
-            top_memory = sorted(processes, 
-                          key=lambda x: x.get('memory_percent') or 0, 
-                          reverse=True)[:5]
-        except Exception as e:
-            print(f"排序进程信息时出错: {e}")
-            top_cpu = []
-            top_memory = []
-        
-        return {
-            'count': len(processes),
-            'top_cpu': top_cpu,
-            'top_memory': top_memory
-        }
+        return self.process_registry.get_process_info()
     
     def get_system_load(self) -> Dict[str, Any]:
         """获取系统负载"""
@@ -179,7 +144,7 @@ class WindowsSystemMonitor(BaseSystemMonitor):
         
         # Windows没有传统的load average概念，使用CPU使用率代替
         try:
-            load_info['cpu_usage'] = psutil.cpu_percent(interval=1)
+            load_info['cpu_usage'] = self.load_sampler.sample()['percent']
         except:
             pass
         
@@ -0,0 +1,243 @@
+import math
+from typing import Dict, Any, List, Optional, Tuple
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+PREFIX = 'pv'
+
+Labels = Dict[str, Any]
+
+# 每个网络接口的速率：(快照中的键, 指标名, 说明)
+NIC_RATE_METRICS = (
+    ('bytes_sent_per_sec', 'network_transmit_bytes_per_second', '每个网络接口的发送速率'),
+    ('bytes_recv_per_sec', 'network_receive_bytes_per_second', '每个网络接口的接收速率'),
+    ('packets_sent_per_sec', 'network_transmit_packets_per_second', '每个网络接口的每秒发送包数'),
+    ('packets_recv_per_sec', 'network_receive_packets_per_second', '每个网络接口的每秒接收包数'),
+    ('errout_per_sec', 'network_transmit_errors_per_second', '每个网络接口的每秒发送错误数'),
+    ('errin_per_sec', 'network_receive_errors_per_second', '每个网络接口的每秒接收错误数'),
+    ('dropout_per_sec', 'network_transmit_drops_per_second', '每个网络接口的每秒发送丢包数'),
+    ('dropin_per_sec', 'network_receive_drops_per_second', '每个网络接口的每秒接收丢包数'),
+)
+
+
+def _escape(value) -> str:
+    """转义标签值"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value) -> Optional[str]:
+    """格式化样本值，无效值返回 None"""
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(number):
+        return 'NaN'
+    if math.isinf(number):
+        return '+Inf' if number > 0 else '-Inf'
+    return repr(int(number)) if number.is_integer() and abs(number) < 1e15 else repr(number)
+
+
+class MetricFamily:
+    """一个指标族：类型、说明和若干带标签的样本"""
+
+    def __init__(self, name: str, metric_type: str, help_text: str, unit: str = ''):
+        self.name = f"{PREFIX}_{name}"
+        self.type = metric_type
+        self.help = help_text
+        self.unit = unit
+        self.samples: List[Tuple[Labels, str]] = []
+
+    def add(self, value, /, **labels):
+        """添加一个样本，值无效时忽略"""
+        formatted = _format_value(value)
+        if formatted is not None:
+            self.samples.append((labels, formatted))
+
+    def render(self) -> List[str]:
+        """输出为文本行"""
+        lines = [f"# TYPE {self.name} {self.type}", f"# HELP {self.name} {self.help}"]
+        if self.unit:
+            lines.append(f"# UNIT {self.name} {self.unit}")
+        sample_name = f"{self.name}_total" if self.type == 'counter' else self.name
+        for labels, value in self.samples:
+            if labels:
+                label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                lines.append(f"{sample_name}{{{label_text}}} {value}")
+            else:
+                lines.append(f"{sample_name} {value}")
+        return lines
+
+
+class MetricsBuilder:
+    """按名称收集指标族，保持首次出现的顺序"""
+
+    def __init__(self):
+        self.families: Dict[str, MetricFamily] = {}
+
+    def family(self, name: str, metric_type: str, help_text: str, unit: str = '') -> MetricFamily:
+        family = self.families.get(name)
+        if family is None:
+            family = self.families[name] = MetricFamily(name, metric_type, help_text, unit)
+        return family
+
+    def gauge(self, name: str, help_text: str, value, unit: str = '', /, **labels):
+        self.family(name, 'gauge', help_text, unit).add(value, **labels)
+
+    def counter(self, name: str, help_text: str, value, unit: str = '', /, **labels):
+        self.family(name, 'counter', help_text, unit).add(value, **labels)
+
+    def render(self) -> bytes:
+        lines = []
+        for family in self.families.values():
+            if family.samples:
+                lines.extend(family.render())
+        lines.append('# EOF')
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def _add_cpu(builder: MetricsBuilder, cpu: Dict[str, Any]):
+    builder.gauge('cpu_usage_ratio', 'CPU使用率', _ratio(cpu.get('percent')), 'ratio')
+    for mode, value in (cpu.get('times_percent') or {}).items():
+        builder.gauge('cpu_mode_ratio', '各模式CPU时间占比', _ratio(value), 'ratio', mode=mode)
+    for index, value in enumerate(cpu.get('per_cpu') or []):
+        builder.gauge('cpu_core_usage_ratio', '每核心CPU使用率', _ratio(value), 'ratio', core=index)
+    for core in cpu.get('cores_detail') or []:
+        for mode in ('user', 'system', 'iowait', 'steal'):
+            if mode in core:
+                builder.gauge('cpu_core_mode_ratio', '每核心各模式CPU时间占比', _ratio(core[mode]), 'ratio',
+                              core=core.get('core_id'), mode=mode)
+    frequency = cpu.get('frequency') or {}
+    if frequency.get('current'):
+        builder.gauge('cpu_frequency_hertz', '当前CPU频率', frequency['current'] * 1e6, 'hertz')
+    for sensor, readings in (cpu.get('temperature') or {}).items():
+        for reading in readings if isinstance(readings, list) else []:
+            builder.gauge('temperature_celsius', '传感器温度', reading.get('current'), 'celsius',
+                          sensor=sensor, label=reading.get('label') or '')
+
+
+def _add_memory(builder: MetricsBuilder, memory: Dict[str, Any]):
+    virtual = memory.get('virtual') or memory
+    for key in ('total', 'available', 'used', 'free', 'active', 'inactive', 'buffers', 'cached', 'wired'):
+        if key in virtual:
+            builder.gauge('memory_bytes', '内存用量', virtual[key], 'bytes', type=key)
+    builder.gauge('memory_usage_ratio', '内存使用率', _ratio(virtual.get('percent')), 'ratio')
+    swap = memory.get('swap') or {}
+    for key in ('total', 'used', 'free'):
+        if key in swap:
+            builder.gauge('swap_bytes', '交换分区用量', swap[key], 'bytes', type=key)
+    builder.gauge('swap_usage_ratio', '交换分区使用率', _ratio(swap.get('percent')), 'ratio')
+    for key, name in (('sin', 'swap_in_bytes'), ('sout', 'swap_out_bytes')):
+        if key in swap:
+            builder.counter(name, '交换分区换入/换出字节数', swap[key], 'bytes')
+
+
+def _add_disk(builder: MetricsBuilder, disk: Dict[str, Any]):
+    for partition in disk.get('partitions') or []:
+        labels = {
+            'mountpoint': partition.get('mountpoint'),
+            'device': partition.get('device'),
+            'fstype': partition.get('fstype')
+        }
+        builder.gauge('filesystem_size_bytes', '文件系统总容量', partition.get('total'), 'bytes', **labels)
+        builder.gauge('filesystem_used_bytes', '文件系统已用容量', partition.get('used'), 'bytes', **labels)
+        builder.gauge('filesystem_free_bytes', '文件系统可用容量', partition.get('free'), 'bytes', **labels)
+        builder.gauge('filesystem_usage_ratio', '文件系统使用率', _ratio(partition.get('percent')), 'ratio', **labels)
+    io = disk.get('io') or {}
+    builder.counter('disk_read_bytes', '磁盘累计读取字节数', io.get('read_bytes'), 'bytes')
+    builder.counter('disk_written_bytes', '磁盘累计写入字节数', io.get('write_bytes'), 'bytes')
+    builder.counter('disk_reads_completed', '磁盘累计读操作次数', io.get('read_count'))
+    builder.counter('disk_writes_completed', '磁盘累计写操作次数', io.get('write_count'))
+    for device, rates in (io.get('per_disk') or {}).items():
+        builder.gauge('disk_read_bytes_per_second', '每块磁盘的读取速率', rates.get('read_bytes_per_sec'),
+                      device=device)
+        builder.gauge('disk_write_bytes_per_second', '每块磁盘的写入速率', rates.get('write_bytes_per_sec'),
+                      device=device)
+        builder.gauge('disk_read_iops', '每块磁盘的每秒读操作数', rates.get('read_iops'), device=device)
+        builder.gauge('disk_write_iops', '每块磁盘的每秒写操作数', rates.get('write_iops'), device=device)
+        builder.gauge('disk_busy_ratio', '每块磁盘的繁忙时间占比', _ratio(rates.get('busy_percent')), 'ratio',
+                      device=device)
+        await_ms = rates.get('await_ms')
+        builder.gauge('disk_await_seconds', '每块磁盘IO的平均等待时间',
+                      await_ms / 1000 if await_ms is not None else None, 'seconds', device=device)
+
+
+def _add_network(builder: MetricsBuilder, network: Dict[str, Any]):
+    io = network.get('io') or {}
+    builder.counter('network_transmit_bytes', '网络累计发送字节数', io.get('bytes_sent'), 'bytes')
+    builder.counter('network_receive_bytes', '网络累计接收字节数', io.get('bytes_recv'), 'bytes')
+    builder.counter('network_transmit_packets', '网络累计发送包数', io.get('packets_sent'))
+    builder.counter('network_receive_packets', '网络累计接收包数', io.get('packets_recv'))
+    for interface, rates in (io.get('per_nic') or {}).items():
+        for key, name, help_text in NIC_RATE_METRICS:
+            builder.gauge(name, help_text, rates.get(key), interface=interface)
+    for interface, link in (network.get('link') or {}).items():
+        builder.gauge('network_up', '网络接口是否启用', bool(link.get('isup')), interface=interface)
+        builder.gauge('network_mtu_bytes', '网络接口MTU', link.get('mtu'), 'bytes', interface=interface)
+        if link.get('speed'):
+            builder.gauge('network_speed_bytes', '网络接口速率（每秒字节数）', link['speed'] * 1000000 / 8, 'bytes',
+                          interface=interface)
+
+
+def _add_interfaces(builder: MetricsBuilder, interfaces: Dict[str, Any]):
+    for interface, entry in interfaces.items():
+        for address in entry.get('addresses') or []:
+            builder.gauge('network_address_info', '网络接口地址', 1,
+                          interface=interface, family=address.get('family'), address=address.get('address'))
+
+
+def _add_processes(builder: MetricsBuilder, processes: Dict[str, Any]):
+    builder.gauge('processes', '进程总数', processes.get('count'))
+    seen = set()
+    for entry in (processes.get('top_cpu') or []) + (processes.get('top_memory') or []):
+        pid = entry.get('pid')
+        if pid in seen:
+            continue
+        seen.add(pid)
+        labels = {'pid': pid, 'name': entry.get('name') or '', 'user': entry.get('username') or ''}
+        builder.gauge('process_cpu_ratio', 'CPU/内存占用最高的进程的CPU使用率', _ratio(entry.get('cpu_percent')),
+                      'ratio', **labels)
+        memory_mb = entry.get('memory_mb')
+        builder.gauge('process_resident_memory_bytes', 'CPU/内存占用最高的进程的常驻内存',
+                      memory_mb * 1024 * 1024 if memory_mb is not None else None, 'bytes', **labels)
+
+
+def _ratio(percent) -> Optional[float]:
+    """百分比转换为 0~1 的比例"""
+    try:
+        return float(percent) / 100
+    except (TypeError, ValueError):
+        return None
+
+
+def render_snapshot(snapshot: Dict[str, Any], version: int,
+                    interfaces: Optional[Dict[str, Any]] = None) -> bytes:
+    """将快照渲染为 OpenMetrics 文本，interfaces 为单独缓存的网络接口清单"""
+    builder = MetricsBuilder()
+    if snapshot.get('cpu'):
+        _add_cpu(builder, snapshot['cpu'])
+    if snapshot.get('memory'):
+        _add_memory(builder, snapshot['memory'])
+    if snapshot.get('disk'):
+        _add_disk(builder, snapshot['disk'])
+    if snapshot.get('network'):
+        _add_network(builder, snapshot['network'])
+    if interfaces:
+        _add_interfaces(builder, interfaces)
+    if snapshot.get('processes'):
+        _add_processes(builder, snapshot['processes'])
+
+    load = snapshot.get('load') or {}
+    for period, value in (load.get('load_avg') or {}).items():
+        builder.gauge(f"load{period.replace('min', '')}", f"{period}平均负载", value)
+    builder.gauge('uptime_seconds', '系统运行时间', load.get('uptime'), 'seconds')
+
+    for collector, age in (snapshot.get('stale') or {}).items():
+        builder.gauge('collector_stale_seconds', '采集项沿用上一次结果的时长', age, 'seconds', collector=collector)
+    for collector, interval in (snapshot.get('degraded') or {}).items():
+        builder.gauge('collector_effective_interval_seconds', '超出预算后放大的采集周期', interval, 'seconds', collector=collector)
+    builder.gauge('snapshot_timestamp_seconds', '快照采集时间', snapshot.get('timestamp_unix'), 'seconds')
+    builder.gauge('snapshot_version', '快照版本号', version)
+    return builder.render()
@@ -0,0 +1,150 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Dict, Any, Callable
+import bcrypt
+
+
+class AuthBusyError(Exception):
+    """认证繁忙（密码计算队列已满或登录尝试过于频繁），调用方应返回 429"""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """在有界线程池中执行 bcrypt 计算
+
+    bcrypt 在计算时会释放 GIL，放到专用线程池中后并发的登录最多占用 workers 个核心，
+    不会阻塞处理状态查询的请求线程；排队（含执行中）的任务超过 queue_limit 时直接拒绝。
+    """
+
+    def __init__(self, workers: int = 2, queue_limit: int = 16, rounds: int = 12, timeout: float = 10.0):
+        self.workers = max(1, workers)
+        self.queue_limit = max(self.workers, queue_limit)
+        self.rounds = rounds
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+        self.slots = threading.BoundedSemaphore(self.queue_limit)
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    @classmethod
+    def from_env(cls) -> 'PasswordHasher':
+        """根据环境变量创建"""
+        return cls(
+            workers=int(os.getenv('BCRYPT_WORKERS', min(2, os.cpu_count() or 1))),
+            queue_limit=int(os.getenv('BCRYPT_QUEUE_LIMIT', 16)),
+            rounds=int(os.getenv('BCRYPT_ROUNDS', 12)),
+            timeout=float(os.getenv('BCRYPT_TIMEOUT', 10))
+        )
+
+    def _run(self, func: Callable, *args):
+        """提交到线程池并等待结果"""
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            raise AuthBusyError('密码计算队列已满，请稍后重试')
+        with self.lock:
+            self.pending += 1
+
+        def task():
+            try:
+                return func(*args)
+            finally:
+                with self.lock:
+                    self.pending -= 1
+                    self.completed += 1
+                self.slots.release()
+
+        future = self.executor.submit(task)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # 已提交的任务仍会执行完并释放名额，这里只是不再等待
+            with self.lock:
+                self.timeouts += 1
+            raise AuthBusyError('密码计算超时，请稍后重试')
+
+    def hash(self, password: str) -> str:
+        """计算密码哈希"""
+        hashed = self._run(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt(self.rounds))
+        return hashed.decode('utf-8')
+
+    def verify(self, password: str, hashed: str) -> bool:
+        """验证密码"""
+        return self._run(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """统计信息"""
+        with self.lock:
+            return {
+                'workers': self.workers,
+                'queue_limit': self.queue_limit,
+                'rounds': self.rounds,
+                'pending': self.pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts
+            }
+
+
+class AttemptLimiter:
+    """限制同一用户、同一IP同时进行的认证尝试数量"""
+
+    def __init__(self, per_user: int = 2, per_ip: int = 4):
+        self.per_user = per_user
+        self.per_ip = per_ip
+        self.lock = threading.Lock()
+        self.active: Dict[tuple, int] = {}
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls) -> 'AttemptLimiter':
+        """根据环境变量创建"""
+        return cls(
+            per_user=int(os.getenv('LOGIN_MAX_CONCURRENT_PER_USER', 2)),
+            per_ip=int(os.getenv('LOGIN_MAX_CONCURRENT_PER_IP', 4))
+        )
+
+    @contextmanager
+    def attempt(self, username: str, ip: str):
+        """占用一次尝试名额，超出限制时抛出 AuthBusyError"""
+        keys = [(('user', username), self.per_user), (('ip', ip), self.per_ip)]
+        keys = [(key, limit) for key, limit in keys if key[1] and limit > 0]
+        with self.lock:
+            if any(self.active.get(key, 0) >= limit for key, limit in keys):
+                self.rejected += 1
+                raise AuthBusyError('登录尝试过于频繁，请稍后重试')
+            for key, _ in keys:
+                self.active[key] = self.active.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            with self.lock:
+                for key, _ in keys:
+                    count = self.active.get(key, 0) - 1
+                    if count > 0:
+                        self.active[key] = count
+                    else:
+                        self.active.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """统计信息"""
+        with self.lock:
+            return {
+                'per_user': self.per_user,
+                'per_ip': self.per_ip,
+                'active': sum(count for (kind, _), count in self.active.items() if kind == 'ip'),
+                'rejected': self.rejected
+            }
+
+
+# 全局实例
+password_hasher = PasswordHasher.from_env()
+attempt_limiter = AttemptLimiter.from_env()
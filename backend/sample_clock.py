@@ -0,0 +1,108 @@
+import os
+import math
+import time
+import logging
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 超出一个周期时的处理方式：skip 跳到下一个未来的节拍；catchup 立即对最近一个已过期的节拍采样，
+# 并用这次采样补齐之前错过的节拍（有上限）
+OVERRUN_POLICIES = ('skip', 'catchup')
+
+
+class SampleClock:
+    """固定频率的采样节拍
+
+    第一个节拍对齐到墙上时钟的周期边界（如整秒），之后第 k 个节拍的计划时间为
+    起点 + k×周期，按单调时钟等待，不受采集耗时和系统时间调整的影响，也不会累积漂移。
+    每个节拍对应一个对齐的墙上时间戳，墙上时钟与单调时钟偏离超过半个周期时（如NTP校时）重新对齐。
+    """
+
+    def __init__(self, period: float = 1.0, overrun: str = 'skip', max_catchup: int = 5):
+        if period <= 0:
+            raise ValueError('采样周期必须大于0')
+        if overrun not in OVERRUN_POLICIES:
+            logger.warning(f"未知的超时处理方式 {overrun}，使用 skip")
+            overrun = 'skip'
+        self.period = period
+        self.overrun = overrun
+        self.max_catchup = max_catchup
+        self.origin_mono = 0.0
+        self.origin_wall = 0.0
+        self.index = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.caught_up = 0
+        self.resyncs = 0
+
+    @classmethod
+    def from_env(cls) -> 'SampleClock':
+        """根据环境变量创建：MONITOR_PERIOD、MONITOR_OVERRUN、MONITOR_MAX_CATCHUP"""
+        return cls(
+            period=float(os.getenv('MONITOR_PERIOD', 1.0)),
+            overrun=os.getenv('MONITOR_OVERRUN', 'skip'),
+            max_catchup=int(os.getenv('MONITOR_MAX_CATCHUP', 5))
+        )
+
+    def start(self):
+        """以下一个墙上时钟周期边界作为第一个节拍"""
+        wall = time.time()
+        mono = time.monotonic()
+        self.origin_wall = math.ceil(wall / self.period) * self.period
+        self.origin_mono = mono + (self.origin_wall - wall)
+        self.index = 0
+
+    def current(self) -> Tuple[float, float]:
+        """当前节拍的计划时间 (单调时钟, 墙上时钟)"""
+        offset = self.index * self.period
+        return self.origin_mono + offset, self.origin_wall + offset
+
+    def advance(self, now: Optional[float] = None) -> Tuple[bool, int, int]:
+        """前进到下一个节拍，返回 (是否超时, 跳过的节拍数, 需要补齐的节拍数)；下一个节拍的计划时间已经过去时计为一次超时
+
+        catchup 模式下不会在过去的时刻连续补采（间隔只有几毫秒，速率会接近0）：当前节拍移到最近一个已过期的节拍，
+        立即采样一次，速率按真实经过的时间计算；它之前错过的节拍（至多 max_catchup 个）由调用方用这次采样补齐
+        并标记为补齐的行，超出上限的部分跳过。
+        """
+        now = time.monotonic() if now is None else now
+        self.index += 1
+        # 从新的当前节拍算起，计划时间已经过去的节拍数
+        behind = math.floor((now - self.origin_mono) / self.period) - self.index + 1
+        if behind <= 0:
+            return False, 0, 0
+        self.overruns += 1
+        if self.overrun == 'catchup':
+            backfill = min(behind - 1, self.max_catchup)
+            skipped = behind - 1 - backfill
+            self.index += behind - 1
+            self.caught_up += backfill
+        else:
+            backfill = 0
+            skipped = behind
+            self.index += skipped
+        self.skipped += skipped
+        return True, skipped, backfill
+
+    def check_wall_clock(self, now_mono: Optional[float] = None, now_wall: Optional[float] = None) -> bool:
+        """墙上时钟相对单调时钟偏离超过半个周期时重新对齐，返回是否重新对齐"""
+        now_mono = time.monotonic() if now_mono is None else now_mono
+        now_wall = time.time() if now_wall is None else now_wall
+        expected = self.origin_wall + (now_mono - self.origin_mono)
+        if abs(now_wall - expected) <= self.period / 2:
+            return False
+        logger.warning(f"系统时间偏移 {now_wall - expected:+.3f}s，采样节拍重新对齐")
+        self.resyncs += 1
+        self.start()
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """节拍统计信息"""
+        return {
+            'period': self.period,
+            'overrun_policy': self.overrun,
+            'overruns': self.overruns,
+            'skipped_ticks': self.skipped,
+            'caught_up_ticks': self.caught_up,
+            'resyncs': self.resyncs
+        }
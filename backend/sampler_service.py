@@ -0,0 +1,224 @@
+import os
+import sys
+import time
+import signal
+import threading
+from multiprocessing.connection import Listener, Client
+from typing import Optional, Tuple, Union
+
+# 通过本地套接字对外提供的 SystemMonitor 只读方法
+REMOTE_METHODS = (
+    'get_current_status',
+    'get_delta',
+    'wait_for_update',
+    'get_stream_frame',
+    'get_status_body',
+    'get_metrics_text',
+    'get_liveness',
+    'get_history_data',
+    'get_history_range',
+    'query_history',
+    'get_collector_stats',
+    'get_self_metrics',
+    'get_host_facts',
+    'get_network_inventory',
+    'query_processes',
+    'get_process',
+    'get_system_detection_info'
+)
+
+# 采样进程中运行的健康探测，所有工作进程共享同一份结果：远程方法名 -> HealthProber 的方法名
+HEALTH_METHODS = {
+    'get_health': 'get',
+    'deep_health_check': 'deep_check'
+}
+
+# 采样进程中登记的推送票据，同一张票据在所有工作进程中只能使用一次：远程方法名 -> TicketLedger 的方法名
+TICKET_METHODS = {
+    'claim_stream_ticket': 'claim'
+}
+
+DEFAULT_SOCKET_PATH = '/tmp/pv_resource_sampler.sock'
+DEFAULT_TCP_ADDRESS = ('127.0.0.1', 5002)
+
+
+def get_address() -> Union[str, Tuple[str, int]]:
+    """采样进程的监听地址：MONITOR_ADDRESS 为 host:port 时使用TCP，否则为Unix套接字路径"""
+    address = os.getenv('MONITOR_ADDRESS')
+    if not address:
+        return DEFAULT_SOCKET_PATH if hasattr(os, 'fork') else DEFAULT_TCP_ADDRESS
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit():
+        return host or '127.0.0.1', int(port)
+    return address
+
+
+def get_authkey() -> bytes:
+    """连接认证密钥，来自环境变量 MONITOR_AUTHKEY"""
+    authkey = os.getenv('MONITOR_AUTHKEY')
+    if not authkey:
+        raise RuntimeError('未设置 MONITOR_AUTHKEY，无法连接采样进程')
+    return authkey.encode('utf-8')
+
+
+class SamplerServer:
+    """在采样进程中通过本地套接字对外提供快照
+
+    整个部署只运行一个 SystemMonitor、一个 HealthProber 和一个推送票据登记表，所有 Web 工作进程通过
+    RemoteSystemMonitor 访问，采集和健康探测的开销不随工作进程数增加。
+    每个客户端连接由一个线程处理，请求为 (方法名, 参数, 关键字参数)。
+    """
+
+    def __init__(self, monitor, address=None, authkey: Optional[bytes] = None, prober=None, ledger=None):
+        self.monitor = monitor
+        self.prober = prober
+        self.ledger = ledger
+        self.address = address or get_address()
+        self.authkey = authkey or get_authkey()
+        self.listener: Optional[Listener] = None
+        self.running = False
+
+    def _handle(self, conn):
+        """处理一个客户端连接上的所有请求"""
+        try:
+            while self.running:
+                try:
+                    method, args, kwargs = conn.recv()
+                except (EOFError, OSError):
+                    break
+                if method in REMOTE_METHODS:
+                    func = getattr(self.monitor, method)
+                elif method in HEALTH_METHODS and self.prober is not None:
+                    func = getattr(self.prober, HEALTH_METHODS[method])
+                elif method in TICKET_METHODS and self.ledger is not None:
+                    func = getattr(self.ledger, TICKET_METHODS[method])
+                else:
+                    conn.send(('error', f"不支持的方法: {method}"))
+                    continue
+                try:
+                    conn.send(('ok', func(*args, **kwargs)))
+                except (EOFError, OSError):
+                    break
+                except Exception as e:
+                    conn.send(('error', str(e)))
+        finally:
+            conn.close()
+
+    def serve_forever(self):
+        """监听并接受客户端连接"""
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+        self.listener = Listener(self.address, authkey=self.authkey)
+        if isinstance(self.address, str):
+            os.chmod(self.address, 0o600)
+        self.running = True
+        print(f"采样服务监听于 {self.address}")
+        while self.running:
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                if not self.running:
+                    break
+                continue
+            except Exception as e:
+                # 认证失败等错误只影响当前连接
+                print(f"采样服务拒绝连接: {e}")
+                continue
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def close(self):
+        """停止接受连接"""
+        self.running = False
+        if self.listener is not None:
+            self.listener.close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+
+class RemoteSystemMonitor:
+    """采样进程中 SystemMonitor 的代理
+
+    接口与 SystemMonitor 的只读方法一致。Connection 对象不是线程安全的，每个线程持有自己的连接，
+    因此推送接口长时间阻塞的 get_stream_frame 不会影响其他请求；连接断开时自动重连一次。
+    """
+
+    def __init__(self, address=None, authkey: Optional[bytes] = None, connect_timeout: float = 10.0):
+        self.address = address or get_address()
+        self.authkey = authkey or get_authkey()
+        self.connect_timeout = connect_timeout
+        self.local = threading.local()
+
+    def _connect(self):
+        """建立到采样进程的连接，采样进程尚未就绪时在 connect_timeout 内重试"""
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            try:
+                return Client(self.address, authkey=self.authkey)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() >= deadline:
+                    raise ConnectionError(f"无法连接采样进程 {self.address}")
+                time.sleep(0.2)
+
+    def _call(self, method: str, *args, **kwargs):
+        """调用采样进程中的方法"""
+        for attempt in range(2):
+            conn = getattr(self.local, 'conn', None)
+            if conn is None:
+                conn = self.local.conn = self._connect()
+            try:
+                conn.send((method, args, kwargs))
+                status, value = conn.recv()
+                break
+            except (EOFError, OSError):
+                conn.close()
+                self.local.conn = None
+                if attempt:
+                    raise ConnectionError('与采样进程的连接已断开')
+        if status != 'ok':
+            raise RuntimeError(value)
+        return value
+
+    def __getattr__(self, name: str):
+        if name not in REMOTE_METHODS and name not in HEALTH_METHODS and name not in TICKET_METHODS:
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self._call(name, *args, **kwargs)
+
+    def is_alive(self) -> bool:
+        """采样进程是否可以连接"""
+        try:
+            self._call('get_liveness')
+            return True
+        except Exception:
+            return False
+
+    def stop_monitoring(self):
+        """采样由独立进程负责，工作进程退出时无需停止"""
+
+
+def run_sampler(address=None, authkey: Optional[bytes] = None):
+    """采样进程入口：启动 SystemMonitor 和健康探测，并对外提供快照、探测结果和推送票据登记"""
+    from system_monitor import SystemMonitor
+    from health_prober import HealthProber
+    from stream_tickets import TicketLedger
+    from database import db_config
+
+    monitor = SystemMonitor()
+    monitoring_thread = threading.Thread(target=monitor.start_monitoring, daemon=True)
+    prober = HealthProber.from_env(db_config, monitor, monitoring_thread.is_alive)
+    server = SamplerServer(monitor, address, authkey, prober, TicketLedger())
+
+    def shutdown(signum, frame):
+        server.close()
+        prober.stop()
+        monitor.stop_monitoring()
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    monitoring_thread.start()
+    prober.start()
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    run_sampler()
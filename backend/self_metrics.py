@@ -0,0 +1,119 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Tuple
+
+# 延迟直方图的桶上限（秒）
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class LatencyHistogram:
+    """固定桶的延迟直方图，记录一次观测只需一次二分查找"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个桶为 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def observe(self, value: float):
+        """记录一次观测（调用方负责加锁）"""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.last = value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """按桶上限估算分位数，落在 +Inf 桶时返回最大值"""
+        if not self.count:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出为字典，时间单位为毫秒"""
+        def ms(value):
+            return None if value is None else round(value * 1000, 3)
+
+        return {
+            'count': self.count,
+            'avg_ms': ms(self.sum / self.count) if self.count else None,
+            'last_ms': ms(self.last),
+            'max_ms': ms(self.max),
+            'p50_ms': ms(self.quantile(0.5)),
+            'p95_ms': ms(self.quantile(0.95)),
+            'p99_ms': ms(self.quantile(0.99)),
+            'buckets': {
+                ('+Inf' if i == len(self.buckets) else f"{self.buckets[i] * 1000:g}ms"): count
+                for i, count in enumerate(self.counts)
+            }
+        }
+
+
+class SelfMetrics:
+    """监控程序自身的运行指标：各环节耗时直方图、计数器和瞬时值"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.counters: Dict[str, int] = {}
+        self.gauges: Dict[str, float] = {}
+        self.started_at = time.time()
+
+    def observe(self, name: str, value: float):
+        """记录一次耗时（秒）"""
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.observe(value)
+
+    def increment(self, name: str, amount: int = 1):
+        """计数器加一"""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_gauge(self, name: str, value: float):
+        """设置瞬时值"""
+        with self.lock:
+            self.gauges[name] = value
+
+    @contextmanager
+    def timer(self, name: str):
+        """记录代码块的耗时"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    @contextmanager
+    def acquire(self, lock, name: str = 'lock_wait'):
+        """获取锁并记录等待时间"""
+        started = time.perf_counter()
+        lock.acquire()
+        self.observe(name, time.perf_counter() - started)
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出所有指标"""
+        with self.lock:
+            return {
+                'uptime': round(time.time() - self.started_at, 1),
+                'histograms': {name: h.to_dict() for name, h in sorted(self.histograms.items())},
+                'counters': dict(sorted(self.counters.items())),
+                'gauges': dict(sorted(self.gauges.items()))
+            }
@@ -0,0 +1,47 @@
+from typing import Dict, Any, List
+
+
+def _escape(key) -> str:
+    """按 JSON Pointer 规则转义路径片段"""
+    return str(key).replace('~', '~0').replace('/', '~1')
+
+
+def diff_snapshots(old: Any, new: Any, path: str = '') -> List[Dict[str, Any]]:
+    """计算两个快照之间的差异，返回 JSON Patch 风格的操作列表
+
+    字典逐键递归比较；列表和标量整体比较，变化时整体替换。
+    """
+    if old is new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in old:
+                ops.append({'op': 'add', 'path': child, 'value': value})
+            else:
+                ops.extend(diff_snapshots(old[key], value, child))
+        for key in old:
+            if key not in new:
+                ops.append({'op': 'remove', 'path': f"{path}/{_escape(key)}"})
+        return ops
+    if old == new:
+        return []
+    return [{'op': 'replace', 'path': path, 'value': new}]
+
+
+def compact_ops(ops: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """合并多个版本的增量：同一路径或其父路径之后又被修改时，丢弃较早的操作
+
+    合并后的结果按"设置/删除"语义应用（replace 与 add 等价，删除不存在的路径忽略）。
+    """
+    kept = []
+    kept_paths = set()
+    for op in reversed(ops):
+        parts = op['path'].split('/')
+        if any('/'.join(parts[:i]) in kept_paths for i in range(1, len(parts) + 1)):
+            continue
+        kept.append(op)
+        kept_paths.add(op['path'])
+    kept.reverse()
+    return kept
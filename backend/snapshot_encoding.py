@@ -0,0 +1,51 @@
+import json
+import gzip
+from typing import Any, Optional
+
+# 可选的快速 JSON 库和 brotli 压缩，未安装时使用标准库
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+JSON_BACKEND = 'orjson' if orjson is not None else 'json'
+
+# 支持的预压缩编码，按优先级排列
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def dumps(obj: Any) -> bytes:
+    """序列化为紧凑的 UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8')
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """按指定编码压缩"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=5)
+    return body
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """根据 Accept-Encoding 选择预压缩编码，不接受压缩时返回 None"""
+    if not accept_encoding:
+        return None
+    accepted = set()
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        if params.strip().replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(name.strip().lower())
+    for encoding in ENCODINGS:
+        if encoding in accepted or '*' in accepted:
+            return encoding
+    return None
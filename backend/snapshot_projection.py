@@ -0,0 +1,89 @@
+from typing import Dict, Any, List, Optional
+
+# 字段树：键 -> 子树，空字典表示选中（或排除）该键下的全部内容
+FieldTree = Dict[str, Any]
+
+
+def parse_fields(value: Optional[str]) -> Optional[FieldTree]:
+    """解析逗号分隔的字段列表（如 "cpu.percent,memory"），返回字段树，为空时返回 None"""
+    if not value:
+        return None
+    tree: FieldTree = {}
+    for item in value.split(','):
+        keys = [key for key in item.strip().split('.') if key]
+        if not keys:
+            continue
+        node = tree
+        for key in keys[:-1]:
+            child = node.get(key)
+            if child == {}:
+                break  # 已选中更短的前缀
+            node = node.setdefault(key, {})
+        else:
+            node[keys[-1]] = {}
+    return tree or None
+
+
+def include(value: Any, tree: FieldTree) -> Any:
+    """只保留字段树中的字段；未选中的部分不会被复制"""
+    if not tree or not isinstance(value, dict):
+        return value
+    return {key: include(value[key], sub) for key, sub in tree.items() if key in value}
+
+
+def exclude(value: Any, tree: FieldTree) -> Any:
+    """去掉字段树中的字段；不受影响的部分按引用共享"""
+    if not isinstance(value, dict):
+        return value
+    result = {}
+    for key, item in value.items():
+        sub = tree.get(key)
+        if sub is None:
+            result[key] = item
+        elif sub:
+            result[key] = exclude(item, sub)
+    return result
+
+
+def project(value: Any, fields: Optional[FieldTree] = None, excluded: Optional[FieldTree] = None) -> Any:
+    """按 fields/exclude 投影"""
+    if fields:
+        value = include(value, fields)
+    if excluded:
+        value = exclude(value, excluded)
+    return value
+
+
+def _pointer_keys(path: str) -> List[str]:
+    """JSON Pointer 路径转换为键列表"""
+    return [key.replace('~1', '/').replace('~0', '~') for key in path.split('/')[1:]]
+
+
+def _project_op(op: Dict[str, Any], tree: FieldTree, keep_listed: bool) -> Optional[Dict[str, Any]]:
+    """按字段树投影单个增量操作；keep_listed 为 True 表示 fields 语义，否则为 exclude 语义"""
+    node = tree
+    for key in _pointer_keys(op['path']):
+        if key not in node:
+            return None if keep_listed else op
+        node = node[key]
+        if not node:
+            return op if keep_listed else None
+    # 操作作用于被投影字段的上层，需要对其值做同样的投影
+    if 'value' not in op:
+        return op
+    value = include(op['value'], node) if keep_listed else exclude(op['value'], node)
+    return dict(op, value=value)
+
+
+def project_ops(ops: List[Dict[str, Any]], fields: Optional[FieldTree] = None,
+                excluded: Optional[FieldTree] = None) -> List[Dict[str, Any]]:
+    """按 fields/exclude 过滤增量操作"""
+    result = []
+    for op in ops:
+        if fields:
+            op = _project_op(op, fields, True)
+        if op is not None and excluded:
+            op = _project_op(op, excluded, False)
+        if op is not None:
+            result.append(op)
+    return result
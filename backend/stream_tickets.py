@@ -0,0 +1,106 @@
+import os
+import time
+import secrets
+import logging
+import threading
+from typing import Dict, Any, Optional, Callable
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+
+logger = logging.getLogger(__name__)
+
+# 登记票据ID（有效期秒数），票据此前未被使用时返回 True
+ClaimTicket = Callable[[str, float], bool]
+
+
+class TicketLedger:
+    """已使用的推送票据登记表
+
+    gunicorn 部署时只在采样进程中保存一份（通过 claim_stream_ticket 远程方法访问），
+    同一张票据在所有工作进程中都只能使用一次；单进程运行时在本进程内保存。
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # 已使用的票据ID -> 过期时间
+        self._used: Dict[str, float] = {}
+
+    def claim(self, jti: str, ttl: float) -> bool:
+        """登记票据ID，已登记过时返回 False；过期的票据已无法通过签名校验，登记随之清除"""
+        now = time.time()
+        with self.lock:
+            self._used = {key: expires for key, expires in self._used.items() if expires > now}
+            if jti in self._used:
+                return False
+            self._used[jti] = now + ttl
+            return True
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self._used)
+
+
+class StreamTickets:
+    """推送接口的一次性连接票据
+
+    EventSource 无法设置请求头，认证信息只能放在URL中，而URL会出现在访问日志和代理日志里。
+    因此推送接口不接受24小时有效的JWT，改为先用JWT换取一张短时有效（默认30秒）的签名票据，
+    票据只能在建立连接时使用一次，连接建立后即使被日志记录也无法再用。
+    票据的使用通过 claim 登记，多个工作进程时由采样进程中唯一的 TicketLedger 判定是否已使用。
+    """
+
+    def __init__(self, secret_key: str, ttl: int = 30, claim: Optional[ClaimTicket] = None):
+        self.ttl = ttl
+        # 独立的 salt，票据不能当作其他用途的签名数据使用
+        self.serializer = URLSafeTimedSerializer(secret_key, salt='system-stream-ticket')
+        self.claim = claim or TicketLedger().claim
+        self.lock = threading.Lock()
+        self.issued = 0
+        self.redeemed = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls, secret_key: str, claim: Optional[ClaimTicket] = None) -> 'StreamTickets':
+        """根据环境变量 STREAM_TICKET_TTL（秒）创建"""
+        return cls(secret_key, ttl=int(os.getenv('STREAM_TICKET_TTL', 30)), claim=claim)
+
+    def issue(self, identity: Any) -> str:
+        """为已认证的用户签发票据"""
+        with self.lock:
+            self.issued += 1
+        return self.serializer.dumps({'sub': identity, 'jti': secrets.token_urlsafe(12)})
+
+    def _claim(self, data: Optional[Dict[str, Any]]) -> bool:
+        """登记签名有效的票据，登记失败（如采样进程不可达）时按无效处理"""
+        if data is None or not data.get('jti'):
+            return False
+        try:
+            return self.claim(data['jti'], self.ttl)
+        except Exception as e:
+            logger.error(f"无法登记推送票据: {e}")
+            return False
+
+    def redeem(self, ticket: Optional[str]) -> Optional[Any]:
+        """校验并作废票据，返回用户标识；票据无效、过期或已使用时返回 None"""
+        if not ticket:
+            return None
+        try:
+            data = self.serializer.loads(ticket, max_age=self.ttl)
+        except BadSignature:
+            data = None
+        accepted = self._claim(data)
+        with self.lock:
+            if not accepted:
+                self.rejected += 1
+                return None
+            self.redeemed += 1
+        return data.get('sub')
+
+    def get_stats(self) -> Dict[str, Any]:
+        """票据签发和使用统计信息"""
+        with self.lock:
+            return {
+                'ttl': self.ttl,
+                'issued': self.issued,
+                'redeemed': self.redeemed,
+                'rejected': self.rejected
+            }
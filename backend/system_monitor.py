@@ -1,32 +1,101 @@
 import time
+import secrets
 import threading
 from collections import deque
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from monitor_factory import MonitorFactory
-from system_detector import SystemDetector
+from host_facts import HostFactsCache
+from collection_scheduler import CollectionScheduler
+from snapshot_diff import diff_snapshots, compact_ops
+from snapshot_encoding import dumps, compress
+from snapshot_projection import parse_fields, project, project_ops
+from openmetrics import render_snapshot
+from metrics_history import MetricsRingBuffer, extract_metrics, select_columns
+from metrics_rollup import MetricsRollups, rollup_raw
+from metrics_store import MetricsStore
+from self_metrics import SelfMetrics
+from sample_clock import SampleClock
 
 class SystemMonitor:
-    def __init__(self, max_history=100):
+    def __init__(self, max_history=86400, collector_intervals: Optional[Dict[str, float]] = None,
+                 collector_budgets: Optional[Dict[str, float]] = None, max_patches=60):
         self.max_history = max_history
-        self.history_data = deque(maxlen=max_history)
+        # 历史数据以定宽数值列保存在预分配的环形缓冲区中，默认保留一天的秒级采样
+        self.history_data = MetricsRingBuffer(max_history)
+        # 10秒/1分钟/10分钟的 min/avg/max 汇总，随样本到达增量维护
+        self.rollups = MetricsRollups()
+        # 历史数据持久化到本地SQLite，重启后恢复最近的采样
+        self.store = MetricsStore.from_env()
+        self._restore_history()
         self.current_data = {}
         self.monitoring = False
+        # 自身运行指标：各采集项耗时、循环漂移、锁等待、快照大小等
+        self.metrics = SelfMetrics()
+        # 采集循环最近一次运行的单调时钟时间，用于健康检查判断采集线程是否卡住
+        self.last_cycle: Optional[float] = None
+        # 固定频率的采样节拍（MONITOR_PERIOD 秒），停止时通过事件立即唤醒等待中的采集循环
+        self.clock = SampleClock.from_env()
+        self._stop_event = threading.Event()
         self.lock = threading.Lock()
+        # 每发布一个新快照版本号加一，推送订阅者在条件变量上等待
+        self.version = 0
+        self.update_condition = threading.Condition(self.lock)
+        # 最近若干个版本的增量（从上一版本到该版本的变更操作），用于增量更新
+        self.patches = deque(maxlen=max_patches)
+        # 每个版本的推送帧（全量/增量）只序列化一次，由所有订阅者共享
+        self.stream_lock = threading.Lock()
+        self._stream_version = 0
+        self._stream_frames: Dict[str, bytes] = {}
+        # 每个版本的 /api/system-status 全量响应体（及其压缩版本）只序列化一次，配合 ETag 使用
+        # 实例ID区分重启前后相同的版本号：对外的版本号和 ETag 都是 <实例ID>-<序号>
+        self.instance_id = f"{int(time.time()):x}{secrets.token_hex(2)}"
+        self.body_lock = threading.Lock()
+        self._body_version = 0
+        self._bodies: Dict[tuple, bytes] = {}
+        self._sections_version = 0
+        self._sections: Dict[str, bytes] = {}
+        # 每个版本的 OpenMetrics 文本（及其压缩版本）只渲染一次，频繁抓取没有额外开销
+        self.metrics_text_lock = threading.Lock()
+        self._metrics_version = -1
+        self._metrics_texts: Dict[Optional[str], bytes] = {}
         
         # 检测系统并创建相应的监控器
-        self.system_info = SystemDetector.detect_system()
         self.monitor = MonitorFactory.create_monitor()
+        self.monitor.profiler = self.metrics
+        # 主机静态信息只采集一次，不再附加到每个采样中
+        self.host_facts = HostFactsCache(self.monitor)
+        self.system_info = self.host_facts.get()['platform']
+        # 每个采集项拥有独立的采集周期和耗时预算
+        self.scheduler = CollectionScheduler(
+            self.monitor,
+            intervals=collector_intervals,
+            budgets=collector_budgets
+        )
         
         print(f"检测到系统: {self.system_info['system']} - {self.system_info['platform']}")
         print(f"使用监控器: {self.monitor.__class__.__name__}")
     
+    def _restore_history(self):
+        """从持久化存储中恢复最近的采样到内存环形缓冲区和汇总层级"""
+        if self.store is None:
+            return
+        try:
+            rows = self.store.load_recent(self.max_history)
+        except Exception as e:
+            print(f"恢复历史数据失败: {e}")
+            return
+        for metrics, per_cpu in rows:
+            self.history_data.append(metrics, per_cpu)
+            self.rollups.add(metrics)
+        if rows:
+            print(f"已从 {self.store.path} 恢复 {len(rows)} 条历史采样")
+    
     def get_system_info(self) -> Optional[Dict[str, Any]]:
         """获取当前系统信息"""
         try:
             data = self.monitor.get_all_info()
             if data:  # 确保数据不为空
-                data['system_detection'] = self.system_info
                 data['timestamp'] = datetime.now().isoformat()
                 return data
             else:
@@ -43,37 +112,381 @@ class SystemMonitor:
         self.monitoring = True
         print(f"开始监控系统 ({self.system_info['system']})...")
         
+        # 按固定频率采样：每个节拍对齐到周期边界，按单调时钟等待，不随采集耗时漂移
+        self._stop_event.clear()
+        self.clock.start()
+        backfill = 0
         while self.monitoring:
+            tick_mono, tick_wall = self.clock.current()
+            wait = tick_mono - time.monotonic()
+            if wait > 0 and self._stop_event.wait(wait):
+                break
+            self.last_cycle = time.monotonic()
+            lag = max(0.0, self.last_cycle - tick_mono)
+            self.metrics.observe('loop.drift', lag)
+            self.metrics.set_gauge('loop.drift_ms', round(lag * 1000, 3))
             try:
-                data = self.get_system_info()
-                if data:
-                    with self.lock:
-                        self.current_data = data
-                        self.history_data.append(data)
-                time.sleep(5)  # 每5秒采集一次数据
+                with self.metrics.timer('loop.cycle'):
+                    self.host_facts.check_hotplug()
+                    self.scheduler.run_due(tick_mono)
+                    # 每个节拍发布一个快照：墙上时间戳取对齐的节拍时间，单调时间戳为实际采样时刻
+                    data = self.scheduler.snapshot()
+                    data['timestamp'] = datetime.fromtimestamp(tick_wall).isoformat()
+                    data['timestamp_unix'] = tick_wall
+                    data['timestamp_monotonic'] = self.last_cycle
+                    # catchup 模式下超时错过的节拍：用本次采样补齐历史数据（速率按真实经过的时间计算），
+                    # 只发布一个实时快照
+                    if backfill:
+                        self.record_catchup(data, [
+                            tick_wall - missed * self.clock.period for missed in range(backfill, 0, -1)
+                        ])
+                    self.publish(data)
             except Exception as e:
                 print(f"监控过程中出错: {e}")
-                time.sleep(5)
+                self.metrics.increment('loop.errors')
+            overrun, skipped, backfill = self.clock.advance()
+            if overrun:
+                self.metrics.increment('loop.overruns')
+                if skipped:
+                    self.metrics.increment('loop.skipped_ticks', skipped)
+                if backfill:
+                    self.metrics.increment('loop.catchup_ticks', backfill)
+            if self.clock.check_wall_clock():
+                self.metrics.increment('loop.clock_resyncs')
+                # 节拍已重新对齐，之前计算的补齐节拍不再对应
+                backfill = 0
+    
+    def publish(self, data: Dict[str, Any]):
+        """发布新快照并唤醒所有推送订阅者"""
+        # 增量在锁外计算，current_data 只由采集线程替换
+        with self.metrics.timer('publish.diff'):
+            ops = diff_snapshots(self.current_data, data) if self.current_data else None
+        metrics = extract_metrics(data, data.get('timestamp_unix', time.time()))
+        per_cpu = (data.get('cpu') or {}).get('per_cpu') or []
+        # 合并后的快照整体替换，读取方不会看到部分更新的数据
+        with self.metrics.acquire(self.lock):
+            self.current_data = data
+            self.history_data.append(metrics, per_cpu)
+            self.rollups.add(metrics)
+            self.version += 1
+            if ops is None:
+                self.patches.clear()
+            else:
+                self.patches.append((self.version, ops))
+            self.update_condition.notify_all()
+        # 全量响应体在发布时预先序列化，快照大小指标始终对应最新版本，与客户端是否只取增量无关
+        self.get_status_body()
+        if self.store is not None:
+            self.store.append(metrics, per_cpu)
+    
+    def record_catchup(self, data: Dict[str, Any], timestamps: List[float]):
+        """把错过的节拍作为 catchup 行写入历史数据、汇总层级和持久化存储
+
+        补齐的行取自同一次真实采样，只用于保持历史数据按节拍连续；不发布快照、不增加版本号，
+        推送订阅者不会收到重复的数据。
+        """
+        per_cpu = (data.get('cpu') or {}).get('per_cpu') or []
+        rows = [dict(extract_metrics(data, timestamp), catchup=1.0) for timestamp in timestamps]
+        with self.metrics.acquire(self.lock):
+            for metrics in rows:
+                self.history_data.append(metrics, per_cpu)
+                self.rollups.add(metrics)
+        if self.store is not None:
+            for metrics in rows:
+                self.store.append(metrics, per_cpu)
+    
+    def format_version(self, version: Optional[int] = None) -> str:
+        """对外的快照版本号 <实例ID>-<序号>（默认为当前版本）"""
+        return f"{self.instance_id}-{self.version if version is None else version}"
+    
+    def _parse_version(self, version: Optional[str]) -> Optional[int]:
+        """解析对外的版本号，格式错误或来自重启前的实例时返回 None"""
+        if version is None:
+            return None
+        instance, _, number = str(version).rpartition('-')
+        if instance != self.instance_id or not number.isdigit():
+            return None
+        return int(number)
+    
+    def _collect_patches(self, since: int, version: int) -> Optional[list]:
+        """拼接 since 之后到 version 的所有增量，窗口不足时返回 None（需调用方持有锁）"""
+        if since == version:
+            return []
+        if not self.patches or since > version or self.patches[0][0] > since + 1:
+            return None
+        ops = []
+        for patch_version, patch_ops in self.patches:
+            if patch_version > since:
+                ops.extend(patch_ops)
+        return compact_ops(ops) if version - since > 1 else ops
+    
+    def get_delta(self, since: Optional[str] = None, fields: Optional[str] = None,
+                  exclude: Optional[str] = None) -> Dict[str, Any]:
+        """获取相对于 since 版本的增量；since 为空、过旧、无效或来自重启前的实例时返回全量快照；
+        fields/exclude 用于字段投影"""
+        since = self._parse_version(since)
+        with self.metrics.acquire(self.lock):
+            version, data = self.version, self.current_data
+            ops = self._collect_patches(since, version) if since is not None else None
+        field_tree, exclude_tree = parse_fields(fields), parse_fields(exclude)
+        if ops is None:
+            data = project(data or {}, field_tree, exclude_tree)
+            return {'version': self.format_version(version), 'full': True, 'data': data.copy()}
+        return {'version': self.format_version(version), 'full': False,
+                'ops': project_ops(ops, field_tree, exclude_tree)}
+    
+    def wait_for_update(self, last_version: int, timeout: Optional[float] = None) -> int:
+        """阻塞等待比 last_version 更新的快照，返回当前版本号（超时时可能等于 last_version）"""
+        with self.update_condition:
+            self.update_condition.wait_for(lambda: self.version > last_version, timeout)
+            return self.version
+    
+    def get_stream_frame(self, last_version: Optional[str] = None,
+                         timeout: float = 15.0) -> Optional[Tuple[str, bytes]]:
+        """等待新快照并返回 (对外版本号, SSE帧)，超时返回 None
+
+        订阅者恰好落后一个版本时推送增量（patch事件），否则推送全量快照（status事件）；
+        last_version 来自重启前的实例（采样进程重启后重连）时从头推送全量快照。
+        """
+        last_version = self._parse_version(last_version) or 0
+        if self.wait_for_update(last_version, timeout) <= last_version:
+            return None
+        with self.stream_lock:
+            with self.metrics.acquire(self.lock):
+                version, data = self.version, self.current_data
+                ops = self._collect_patches(last_version, version) if last_version == version - 1 else None
+            if self._stream_version != version:
+                self._stream_version = version
+                self._stream_frames = {}
+            event = 'status' if ops is None else 'patch'
+            frame = self._stream_frames.get(event)
+            if frame is None:
+                with self.metrics.timer(f"serialize.{event}"):
+                    payload = dumps(data if ops is None else ops)
+                frame = f"id: {self.format_version(version)}\nevent: {event}\ndata: ".encode('utf-8') + \
+                    payload + b"\n\n"
+                self._stream_frames[event] = frame
+            return self.format_version(version), frame
+    
+    def get_etag(self, version: Optional[int] = None) -> str:
+        """快照版本（默认为当前版本）对应的 ETag，弱校验，各压缩编码共用"""
+        return f'W/"{self.format_version(version)}"'
+    
+    def _section_bytes(self, version: int, data: Dict[str, Any], key: str) -> bytes:
+        """快照中某个顶层部分序列化后的字节，每个版本只序列化一次（需持有 body_lock）"""
+        if self._sections_version != version:
+            self._sections_version = version
+            self._sections = {}
+        section = self._sections.get(key)
+        if section is None:
+            section = self._sections[key] = dumps(data[key])
+        return section
+    
+    def _render_data(self, version: int, data: Dict[str, Any], fields: Optional[str],
+                     exclude: Optional[str]) -> bytes:
+        """拼接快照 data 部分的字节；整体选中的顶层部分直接复用缓存，未选中的部分不会被复制或序列化"""
+        field_tree, exclude_tree = parse_fields(fields), parse_fields(exclude)
+        parts = []
+        for key in data:
+            if field_tree is not None and key not in field_tree:
+                continue
+            if exclude_tree is not None and exclude_tree.get(key) == {}:
+                continue
+            sub_fields = field_tree.get(key) if field_tree else None
+            sub_exclude = exclude_tree.get(key) if exclude_tree else None
+            if sub_fields or sub_exclude:
+                section = dumps(project(data[key], sub_fields, sub_exclude))
+            else:
+                section = self._section_bytes(version, data, key)
+            parts.append(dumps(key) + b':' + section)
+        return b'{' + b','.join(parts) + b'}'
+    
+    def get_status_body(self, encoding: Optional[str] = None, fields: Optional[str] = None,
+                        exclude: Optional[str] = None,
+                        if_none_match: Optional[str] = None) -> Tuple[int, str, Optional[bytes]]:
+        """获取当前快照的全量响应体，返回 (版本号, ETag, 响应体)
+
+        未投影的全量响应体在发布时预先拼接，其他字段投影在第一次请求时拼接一次，压缩版本同样按需生成一次，
+        之后的请求直接返回缓存的字节。fields/exclude 为逗号分隔的字段路径（如 cpu.percent）。
+        if_none_match 中含有当前版本的 ETag 时不取响应体，返回的响应体为 None（304），
+        远程模式下条件请求和全量请求都只需一次调用。
+        """
+        if if_none_match:
+            with self.metrics.acquire(self.lock):
+                version = self.version
+            etag = self.get_etag(version)
+            if etag in if_none_match:
+                return version, etag, None
+        key = (fields or None, exclude or None)
+        with self.body_lock:
+            with self.metrics.acquire(self.lock):
+                version, data = self.version, self.current_data
+            if self._body_version != version or len(self._bodies) > 64:
+                self._body_version = version
+                self._bodies = {}
+            body = self._bodies.get(key + (encoding,))
+            if body is None:
+                plain = self._bodies.get(key + (None,))
+                if plain is None:
+                    with self.metrics.timer('serialize.status'):
+                        plain = self._bodies[key + (None,)] = b'{"success":true,"version":' + \
+                            dumps(self.format_version(version)) + b',"full":true,"data":' + \
+                            self._render_data(version, data or {}, *key) + b'}'
+                    if key == (None, None):
+                        self.metrics.set_gauge('snapshot_bytes', len(plain))
+                body = self._bodies[key + (encoding,)] = compress(plain, encoding)
+            return version, self.get_etag(version), body
+    
+    def get_metrics_text(self, encoding: Optional[str] = None) -> Tuple[int, bytes]:
+        """获取当前快照的 OpenMetrics 文本，返回 (版本号, 文本)"""
+        with self.metrics_text_lock:
+            with self.metrics.acquire(self.lock):
+                version, data = self.version, self.current_data
+            if self._metrics_version != version:
+                with self.metrics.timer('serialize.openmetrics'):
+                    interfaces = self.monitor.get_network_inventory().get('interfaces')
+                    self._metrics_texts = {None: render_snapshot(data or {}, version, interfaces)}
+                self._metrics_version = version
+            text = self._metrics_texts.get(encoding)
+            if text is None:
+                text = self._metrics_texts[encoding] = compress(self._metrics_texts[None], encoding)
+            return version, text
     
     def stop_monitoring(self):
         """停止监控"""
         self.monitoring = False
+        self._stop_event.set()
+        self.scheduler.shutdown()
+        if self.store is not None:
+            self.store.flush()
         print("停止系统监控")
     
+    def get_liveness(self) -> Dict[str, Any]:
+        """采集循环的存活信息"""
+        last_cycle = self.last_cycle
+        return {
+            'running': self.monitoring,
+            'last_cycle_age': round(time.monotonic() - last_cycle, 3) if last_cycle is not None else None,
+            'version': self.version,
+            'clock': self.clock.get_stats()
+        }
+    
     def get_current_status(self) -> Dict[str, Any]:
         """获取当前状态"""
-        with self.lock:
+        with self.metrics.acquire(self.lock):
             return self.current_data.copy() if self.current_data else {}
     
-    def get_history_data(self, limit=50) -> list:
-        """获取历史数据"""
-        with self.lock:
-            return list(self.history_data)[-limit:]
+    def _history_kwargs(self, fields: Optional[str], exclude: Optional[str]) -> Dict[str, Any]:
+        """原始历史数据按 fields/exclude 只切出所需的列"""
+        if not fields and not exclude:
+            return {}
+        names = select_columns(self.history_data.column_names + ('per_cpu',), fields, exclude)
+        return {
+            'columns': [name for name in names if name != 'per_cpu'],
+            'include_per_cpu': 'per_cpu' in names
+        }
+    
+    def get_history_data(self, limit=50, fields: Optional[str] = None,
+                         exclude: Optional[str] = None) -> Dict[str, Any]:
+        """获取最近 limit 个采样的历史数据，按列返回（列名 -> 数值列表）"""
+        with self.metrics.acquire(self.lock):
+            return self.history_data.tail(limit, **self._history_kwargs(fields, exclude))
+    
+    def get_history_range(self, start_time: Optional[float] = None,
+                          end_time: Optional[float] = None) -> Dict[str, Any]:
+        """获取时间区间内的历史数据，按列返回"""
+        with self.metrics.acquire(self.lock):
+            return self.history_data.range(start_time, end_time)
+    
+    def query_history(self, start_time: Optional[float] = None, end_time: Optional[float] = None,
+                      step: Optional[float] = None, fields: Optional[str] = None,
+                      exclude: Optional[str] = None) -> Dict[str, Any]:
+        """按时间区间和步长查询历史数据，自动选择满足步长的最粗汇总层级，超出内存保留范围时查询持久化存储
+
+        step 小于最细的汇总层级（10秒）时由原始样本按 step 汇总；返回的 resolution 为实际使用的步长。
+        """
+        raw = None
+        with self.metrics.acquire(self.lock):
+            tier = self.rollups.select_tier(step) if step else None
+            oldest = (tier or self.history_data).oldest_timestamp()
+            # 查询起点早于内存中保留的数据时，由持久化存储回答
+            use_store = self.store is not None and start_time is not None and \
+                (oldest is None or start_time < oldest)
+            if not use_store and tier is None:
+                if not step or step <= 1:
+                    return {
+                        'tier': 'raw',
+                        'resolution': 1,
+                        'columns': self.history_data.range(start_time, end_time,
+                                                           **self._history_kwargs(fields, exclude))
+                    }
+                raw = self.history_data.range(start_time, end_time, include_per_cpu=False)
+            elif not use_store:
+                result = self.rollups.query(tier, start_time, end_time, step)
+        if raw is not None:
+            # 在锁外汇总，不阻塞采样线程
+            result = {'tier': 'raw', 'resolution': step, 'columns': rollup_raw(raw, step)}
+        elif use_store:
+            result = self.store.query(start_time, end_time, step)
+        # 汇总层级和持久化存储的点数较少，查询后再选择列
+        if fields or exclude:
+            columns = result['columns']
+            result['columns'] = {name: columns[name] for name in select_columns(columns, fields, exclude)}
+        return result
+    
+    def get_self_metrics(self) -> Dict[str, Any]:
+        """获取监控程序自身的运行指标"""
+        metrics = self.metrics.to_dict()
+        with self.metrics.acquire(self.lock):
+            metrics['version'] = self.version
+            metrics['history'] = {
+                'rows': len(self.history_data),
+                'capacity': self.history_data.capacity,
+                'bytes': self.history_data.memory_bytes(),
+                'rollup_bytes': sum(tier.buffer.memory_bytes() for tier in self.rollups.tiers)
+            }
+        if self.store is not None:
+            metrics['history']['store_pending'] = len(self.store.pending)
+        metrics['collectors'] = self.scheduler.get_stats()
+        metrics['clock'] = self.clock.get_stats()
+        partitions = getattr(self.monitor, 'partitions', None)
+        if partitions is not None:
+            metrics['partitions'] = partitions.get_stats()
+        nic_inventory = getattr(self.monitor, 'nic_inventory', None)
+        if nic_inventory is not None:
+            metrics['nic_inventory'] = nic_inventory.get_stats()
+        return metrics
+    
+    def get_collector_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取各采集项的调度统计信息"""
+        return self.scheduler.get_stats()
+    
+    def get_host_facts(self, refresh: bool = False) -> Dict[str, Any]:
+        """获取主机静态信息（CPU型号、核心数、平台信息等）"""
+        if refresh:
+            self.host_facts.invalidate()
+        return self.host_facts.get()
+    
+    def get_network_inventory(self) -> Dict[str, Any]:
+        """获取网络接口清单（地址、MAC等），只在接口变化时重新读取，快照中的 network.inventory_version 为其版本号"""
+        return self.monitor.get_network_inventory()
+    
+    def query_processes(self, **kwargs) -> Dict[str, Any]:
+        """从最近一轮扫描的进程表中排序、过滤并分页，不重新扫描进程，参数见 ProcessTable.query"""
+        registry = getattr(self.monitor, 'process_registry', None)
+        if registry is None:
+            raise RuntimeError('当前系统不支持进程列表')
+        return registry.query(**kwargs)
+    
+    def get_process(self, pid: int) -> Optional[Dict[str, Any]]:
+        """获取最近一轮扫描中某个进程的详情（线程数、文件描述符数、IO计数、命令行），不存在时返回 None"""
+        registry = getattr(self.monitor, 'process_registry', None)
+        return registry.get(pid) if registry is not None else None
     
     def get_system_detection_info(self) -> Dict[str, Any]:
         """获取系统检测信息"""
         return {
-            'detected_system': self.system_info,
+            'detected_system': self.host_facts.get()['platform'],
             'monitor_class': self.monitor.__class__.__name__,
             'supported_systems': MonitorFactory.get_supported_systems()
         }
\ No newline at end of file
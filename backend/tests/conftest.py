@@ -0,0 +1,15 @@
+import os
+import sys
+
+# 后端模块为扁平布局，测试直接从 backend 目录导入
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture
+def system_monitor(monkeypatch):
+    """不持久化、不启动采集循环的 SystemMonitor，快照由测试通过 publish 发布"""
+    monkeypatch.setenv('METRICS_DB_PATH', '')
+    from system_monitor import SystemMonitor
+    return SystemMonitor(max_history=100)
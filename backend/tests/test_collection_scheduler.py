@@ -0,0 +1,77 @@
+import time
+from collection_scheduler import CollectionScheduler, MAX_BACKOFF
+from monitors.base_monitor import BaseSystemMonitor
+
+
+class FakeMonitor(BaseSystemMonitor):
+    """不读取系统数据的监控器，只提供 cpu、memory、processes 三个采集项"""
+
+    collector_budgets = {'memory': 0.5}
+
+    def _collect(self):
+        return {}
+
+    get_cpu_info = get_memory_info = get_disk_info = _collect
+    get_network_info = get_process_info = get_system_load = _collect
+
+    def get_collectors(self):
+        return {'cpu': self.get_cpu_info, 'memory': self.get_memory_info, 'processes': self.get_process_info}
+
+
+def _scheduler(monitor, **kwargs):
+    return CollectionScheduler(monitor, intervals={'cpu': 1, 'memory': 1, 'processes': 10},
+                               budgets={'cpu': 0.05, 'processes': 1.0},
+                               execution_mode='sequential', **kwargs)
+
+
+def _over_budget(scheduler, name, times):
+    task = scheduler.tasks[name]
+    for _ in range(times):
+        task.last_duration = task.budget * 4
+        task.adjust_interval()
+
+
+def test_monitor_budgets_override_defaults():
+    scheduler = _scheduler(FakeMonitor())
+    assert scheduler.tasks['memory'].budget == 0.5
+    assert scheduler.tasks['cpu'].budget == 0.05
+
+
+def test_over_budget_collector_backs_off_and_is_reported():
+    scheduler = _scheduler(FakeMonitor())
+    _over_budget(scheduler, 'processes', 10)
+    assert scheduler.tasks['processes'].effective_interval == 10 * MAX_BACKOFF
+
+    assert scheduler.snapshot()['degraded'] == {'processes': 10 * MAX_BACKOFF}
+    assert scheduler.get_stats()['processes']['degraded'] is True
+
+
+def test_backoff_recovers_when_fast_again():
+    scheduler = _scheduler(FakeMonitor())
+    _over_budget(scheduler, 'processes', 2)
+    task = scheduler.tasks['processes']
+    for _ in range(2):
+        task.last_duration = 0.0
+        task.adjust_interval()
+    assert task.effective_interval == 10
+    assert 'degraded' not in scheduler.snapshot()
+
+
+def test_pinned_cpu_collector_never_backs_off():
+    scheduler = _scheduler(FakeMonitor())
+    _over_budget(scheduler, 'cpu', 5)
+    task = scheduler.tasks['cpu']
+    assert task.effective_interval == 1
+    assert task.over_budget_count == 5
+    assert 'degraded' not in scheduler.snapshot()
+
+
+def test_parallel_deadline_counts_from_submission():
+    """采集循环落后于节拍时，采集项仍有完整的期限"""
+    scheduler = CollectionScheduler(FakeMonitor(), execution_mode='parallel', timeouts={'cpu': 1.0})
+    try:
+        scheduler.run_due(now=time.monotonic() - 5)
+        assert scheduler.tasks['cpu'].timeout_count == 0
+        assert 'stale' not in scheduler.snapshot()
+    finally:
+        scheduler.shutdown()
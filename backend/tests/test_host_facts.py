@@ -0,0 +1,55 @@
+from host_facts import HostFactsCache
+from monitors.host_paths import HostPaths
+
+
+def make_host(tmp_path, online=None, stat_cpus=0):
+    cpu_dir = tmp_path / 'sys' / 'devices' / 'system' / 'cpu'
+    cpu_dir.mkdir(parents=True)
+    (tmp_path / 'proc').mkdir()
+    if online is not None:
+        (cpu_dir / 'online').write_text(online + '\n')
+    lines = ['cpu  1 2 3 4'] + [f'cpu{i} 1 2 3 4' for i in range(stat_cpus)] + ['intr 0', 'cpu_time 1']
+    (tmp_path / 'proc' / 'stat').write_text('\n'.join(lines) + '\n')
+    return HostPaths(proc=str(tmp_path / 'proc'), sys=str(tmp_path / 'sys'), root=str(tmp_path))
+
+
+def test_online_cpu_count_parses_sysfs_ranges(tmp_path):
+    assert make_host(tmp_path, online='0-3,6,8-9').online_cpu_count() == 7
+
+
+def test_online_cpu_count_falls_back_to_proc_stat(tmp_path):
+    assert make_host(tmp_path, stat_cpus=3).online_cpu_count() == 3
+
+
+def test_online_cpu_count_unavailable(tmp_path):
+    assert HostPaths(proc=str(tmp_path), sys=str(tmp_path)).online_cpu_count() is None
+
+
+class HostMonitor:
+    """主机信息缓存只需要在线CPU数量和静态CPU信息"""
+
+    def __init__(self, paths):
+        self.paths = paths
+        self.collected = 0
+
+    def online_cpu_count(self):
+        return self.paths.online_cpu_count()
+
+    def get_static_cpu_info(self):
+        self.collected += 1
+        return {'count_logical': self.paths.online_cpu_count()}
+
+
+def test_hotplug_follows_host_cpu_count(tmp_path):
+    paths = make_host(tmp_path, online='0-3')
+    monitor = HostMonitor(paths)
+    facts = HostFactsCache(monitor)
+    assert facts.get()['cpu']['count_logical'] == 4
+    assert not facts.check_hotplug()
+    assert monitor.collected == 1
+
+    (tmp_path / 'sys' / 'devices' / 'system' / 'cpu' / 'online').write_text('0-7\n')
+    assert facts.check_hotplug()
+    assert not facts.check_hotplug()
+    assert facts.get()['cpu']['count_logical'] == 8
+    assert monitor.collected == 2
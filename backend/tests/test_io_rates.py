@@ -0,0 +1,37 @@
+from monitors.io_rates import counter_delta, CounterRates, WRAP_32, WRAP_64
+
+
+def test_counter_delta_increasing():
+    assert counter_delta(150, 100) == 50
+    assert counter_delta(100, 100) == 0
+
+
+def test_counter_delta_wraps_32_bit():
+    assert counter_delta(5, WRAP_32 - 10) == 15
+
+
+def test_counter_delta_wraps_64_bit():
+    assert counter_delta(5, WRAP_64 - 10) == 15
+
+
+def test_counter_delta_reset_returns_none():
+    """回绕后增量超过回绕范围的一半视为计数器重置"""
+    assert counter_delta(10, 2 ** 30) is None
+    assert counter_delta(0, 2 ** 40) is None
+
+
+def test_counter_rates_baseline_and_hotplug():
+    """新设备第一次只建立基准，消失的设备被丢弃"""
+    rates = CounterRates(('read', 'write'))
+    assert rates.update({'sda': (100, 200)}, now=10.0) == {}
+    deltas = rates.update({'sda': (150, 260), 'sdb': (1, 1)}, now=12.0)
+    assert deltas == {'sda': {'read': 50, 'write': 60, 'interval': 2.0}}
+    assert rates.update({'sdb': (3, 5)}, now=13.0) == {'sdb': {'read': 2, 'write': 4, 'interval': 1.0}}
+    assert rates.update({'sda': (200, 300)}, now=14.0) == {}
+
+
+def test_counter_rates_skips_reset_device():
+    rates = CounterRates(('bytes',))
+    rates.update({'eth0': (2 ** 40,)}, now=1.0)
+    assert rates.update({'eth0': (10,)}, now=2.0) == {}
+    assert rates.update({'eth0': (30,)}, now=3.0) == {'eth0': {'bytes': 20, 'interval': 1.0}}
@@ -0,0 +1,100 @@
+import pytest
+from metrics_rollup import ROLLUP_METRICS, COUNTER_METRICS, MetricsRollups, rollup_columns, rollup_raw, _rebucket
+
+
+def _tier(rows, lasts=None):
+    """构造一个层级的列数据，rows 为 (时间戳, 样本数, min, avg, max)，所有指标取相同的值，计数器取 lasts"""
+    data = {'timestamp': [row[0] for row in rows], 'count': [row[1] for row in rows]}
+    for metric in ROLLUP_METRICS:
+        data[f"{metric}_min"] = [row[2] for row in rows]
+        data[f"{metric}_avg"] = [row[3] for row in rows]
+        data[f"{metric}_max"] = [row[4] for row in rows]
+    for metric in COUNTER_METRICS:
+        data[f"{metric}_last"] = list(lasts or [None] * len(rows))
+    return data
+
+
+def test_rebucket_merges_weighted_by_count():
+    data = _tier([
+        (0, 10, 1.0, 2.0, 3.0),
+        (10, 30, 0.5, 4.0, 9.0),
+        (60, 10, 5.0, 5.0, 5.0)
+    ])
+    merged = _rebucket(data, 10, 60)
+    assert merged['timestamp'] == [0, 60]
+    assert merged['count'] == [40, 10]
+    metric = ROLLUP_METRICS[0]
+    assert merged[f"{metric}_min"] == [0.5, 5.0]
+    assert merged[f"{metric}_max"] == [9.0, 5.0]
+    assert merged[f"{metric}_avg"][0] == pytest.approx((2.0 * 10 + 4.0 * 30) / 40)
+
+
+def test_rebucket_ignores_missing_values():
+    data = _tier([
+        (0, 5, None, None, None),
+        (10, 5, 1.0, 1.0, 1.0)
+    ])
+    merged = _rebucket(data, 10, 60)
+    metric = ROLLUP_METRICS[0]
+    assert merged[f"{metric}_min"] == [1.0]
+    assert merged[f"{metric}_avg"] == [1.0]
+    assert merged[f"{metric}_max"] == [1.0]
+
+    empty = _rebucket(_tier([(0, 5, None, None, None)]), 10, 60)
+    assert empty[f"{metric}_avg"] == [None]
+
+
+def test_rebucket_returns_input_when_step_not_coarser():
+    data = _tier([(0, 1, 1.0, 1.0, 1.0)])
+    assert _rebucket(data, 10, 10) is data
+    assert _rebucket(data, 60, 10) is data
+
+
+def test_counters_are_not_min_avg_max_aggregated():
+    assert not set(COUNTER_METRICS) & set(ROLLUP_METRICS)
+    assert 'net_bytes_sent_last' in rollup_columns()
+    assert 'net_bytes_sent_avg' not in rollup_columns()
+
+
+def test_rebucket_keeps_last_counter_value():
+    data = _tier([(0, 1, 1.0, 1.0, 1.0), (10, 1, 1.0, 1.0, 1.0), (20, 1, 1.0, 1.0, 1.0)], lasts=[100, 250, None])
+    merged = _rebucket(data, 10, 60)
+    assert merged['disk_read_bytes_last'] == [250]
+
+
+def _raw(samples):
+    """原始样本的列数据，samples 为 (时间戳, cpu_percent, net_bytes_sent)"""
+    return {
+        'timestamp': [t for t, _, _ in samples],
+        'cpu_percent': [cpu for _, cpu, _ in samples],
+        'net_bytes_sent': [sent for _, _, sent in samples]
+    }
+
+
+def test_rollup_raw_buckets_by_step():
+    data = _raw([(100, 10.0, 1000), (101, 20.0, 1500), (102, None, 1800), (105, 40.0, None)])
+    result = rollup_raw(data, 5)
+    assert set(result) == set(rollup_columns())
+    assert result['timestamp'] == [100, 105]
+    assert result['count'] == [3.0, 1.0]
+    assert result['cpu_percent_avg'] == [15.0, 40.0]
+    assert (result['cpu_percent_min'], result['cpu_percent_max']) == ([10.0, 40.0], [20.0, 40.0])
+    assert result['net_bytes_sent_last'] == [1800, None]
+    assert result['memory_percent_avg'] == [None, None]
+
+
+def test_fine_steps_have_no_tier():
+    """比最细层级更细的步长不选择层级，由调用方从原始样本汇总"""
+    rollups = MetricsRollups()
+    assert rollups.select_tier(5) is None
+    assert rollups.select_tier(10).resolution == 10
+    assert rollups.select_tier(3600).resolution == 600
+
+
+def test_tier_keeps_last_counter_value():
+    rollups = MetricsRollups()
+    for t, sent in ((0, 10.0), (5, 20.0), (12, 30.0)):
+        rollups.add({'timestamp': float(t), 'cpu_percent': 1.0, 'net_bytes_sent': sent})
+    result = rollups.query(rollups.select_tier(10), None, None)
+    assert result['columns']['net_bytes_sent_last'] == [20.0, 30.0]
+    assert result['resolution'] == 10
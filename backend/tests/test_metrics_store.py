@@ -0,0 +1,97 @@
+import time
+import pytest
+from metrics_history import HISTORY_COLUMNS
+from metrics_store import MetricsStore
+
+
+# 测试数据的时间起点，对齐到分段和聚合步长的边界；写入时会按当前时间删除过期分段，因此取最近的时间
+BASE = int(time.time()) // 600 * 600 - 1200
+
+
+@pytest.fixture
+def store(tmp_path):
+    """分段长度100秒的存储，便于构造跨分段的数据"""
+    store = MetricsStore(str(tmp_path / 'metrics.db'), batch_size=1000, flush_interval=3600,
+                         retention_days=1, segment_seconds=100, max_points=50)
+    yield store
+    store.close()
+
+
+def _fill(store, start, stop):
+    """写入相对 BASE 的 [start, stop) 秒的采样"""
+    for t in range(start, stop):
+        store.append({'timestamp': float(BASE + t), 'cpu_percent': float(t % 10),
+                      'disk_read_bytes': float(BASE + t)}, [1.0, 2.0])
+    store.flush()
+
+
+def _times(result):
+    """结果中相对 BASE 的时间戳"""
+    return [t - BASE for t in result['columns']['timestamp']]
+
+
+def test_rows_are_split_into_segments(store):
+    _fill(store, 150, 360)
+    assert [segment - BASE for segment in store.segments] == [100, 200, 300]
+
+
+def test_raw_query_spans_segments(store):
+    _fill(store, 190, 215)
+    result = store.query(BASE + 195, BASE + 204)
+    assert result['resolution'] == 1
+    assert _times(result) == list(range(195, 205))
+    assert set(result['columns']) == set(HISTORY_COLUMNS)
+    # 缺失的列以 None 返回
+    assert result['columns']['load_1min'][0] is None
+
+
+def test_step_query_merges_bucket_split_by_segment(store):
+    """桶 [180, 240) 跨越分段边界200，合并后样本数和加权平均正确"""
+    _fill(store, 180, 240)
+    result = store.query(BASE + 180, BASE + 239, step=60)
+    columns = result['columns']
+    assert [t - BASE for t in columns['timestamp']] == [180]
+    assert columns['count'] == [60]
+    assert columns['cpu_percent_avg'] == [pytest.approx(4.5)]
+    assert (columns['cpu_percent_min'], columns['cpu_percent_max']) == ([0.0], [9.0])
+    # 计数器取桶内最后一个值（位于后一个分段中）
+    assert columns['disk_read_bytes_last'] == [float(BASE + 239)]
+
+
+def test_long_range_raises_step_to_cap_points(store):
+    _fill(store, 0, 300)
+    result = store.query(BASE, BASE + 299)
+    assert result['resolution'] == 6
+    assert len(result['columns']['timestamp']) == 50
+    # 请求的步长更粗时保持不变
+    assert store.query(BASE, BASE + 299, step=60)['resolution'] == 60
+
+
+def test_unbounded_raw_query_is_truncated(store):
+    _fill(store, 0, 120)
+    result = store.query(None, None)
+    assert result['truncated'] is True
+    assert len(result['columns']['timestamp']) == 50
+    assert 'truncated' not in store.query(None, BASE + 10)
+
+
+def test_query_reads_only_committed_rows(store):
+    _fill(store, 0, 10)
+    store.append({'timestamp': BASE + 10.0, 'cpu_percent': 1.0})
+    assert _times(store.query(BASE, BASE + 20))[-1] == 9
+    assert len(store.pending) == 1
+
+
+def test_compact_drops_expired_segments(store):
+    _fill(store, 0, 250)
+    store.retention = 150
+    store.compact(now=BASE + 440)
+    assert [segment - BASE for segment in store.segments] == [200]
+    assert _times(store.query(BASE, BASE + 240))[0] == 200
+
+
+def test_load_recent_returns_latest_rows_in_order(store):
+    _fill(store, 190, 210)
+    rows = store.load_recent(5)
+    assert [row['timestamp'] - BASE for row, _ in rows] == [205, 206, 207, 208, 209]
+    assert rows[0][1] == [1.0, 2.0]
@@ -0,0 +1,38 @@
+from monitors.partitions import parse_mountinfo
+
+
+def test_parse_mountinfo_fields():
+    text = '36 35 98:0 / /mnt1 rw,noatime master:1 - ext3 /dev/root rw,errors=continue\n'
+    assert parse_mountinfo(text) == [{
+        'dev': '98:0',
+        'root': '/',
+        'mountpoint': '/mnt1',
+        'opts': 'rw,noatime',
+        'fstype': 'ext3',
+        'device': '/dev/root'
+    }]
+
+
+def test_parse_mountinfo_without_optional_fields():
+    mounts = parse_mountinfo('22 1 8:1 / / rw,relatime - ext4 /dev/sda1 rw\n')
+    assert mounts[0]['mountpoint'] == '/'
+    assert mounts[0]['fstype'] == 'ext4'
+
+
+def test_parse_mountinfo_multiple_optional_fields():
+    mounts = parse_mountinfo('40 22 0:35 / /srv rw shared:7 master:3 propagate_from:2 - xfs /dev/sdb rw\n')
+    assert (mounts[0]['fstype'], mounts[0]['device']) == ('xfs', '/dev/sdb')
+
+
+def test_parse_mountinfo_unescapes_octal():
+    """挂载点和设备中的空格、制表符、换行和反斜杠以八进制转义"""
+    text = '50 22 8:17 /sub\\040dir /mnt/my\\040disk\\011x rw - ext4 /dev/disk\\134a rw\n'
+    mount = parse_mountinfo(text)[0]
+    assert mount['root'] == '/sub dir'
+    assert mount['mountpoint'] == '/mnt/my disk\tx'
+    assert mount['device'] == '/dev/disk\\a'
+
+
+def test_parse_mountinfo_skips_malformed_lines():
+    text = 'garbage\n\n36 35 98:0 / /mnt1 rw - ext3\n23 1 8:2 / /data rw - ext4 /dev/sda2 rw\n'
+    assert [m['mountpoint'] for m in parse_mountinfo(text)] == ['/data']
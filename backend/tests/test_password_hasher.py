@@ -0,0 +1,82 @@
+import threading
+import pytest
+from password_hasher import PasswordHasher, AttemptLimiter, AuthBusyError
+
+
+def test_hash_and_verify_on_pool():
+    hasher = PasswordHasher(workers=1, queue_limit=2, rounds=4)
+    hashed = hasher.hash('secret')
+    assert hasher.verify('secret', hashed)
+    assert not hasher.verify('wrong', hashed)
+    stats = hasher.get_stats()
+    assert stats['completed'] == 3 and stats['pending'] == 0 and stats['rejected'] == 0
+
+
+def test_full_queue_rejects():
+    hasher = PasswordHasher(workers=1, queue_limit=1, rounds=4)
+    release = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+        return True
+
+    holder = threading.Thread(target=hasher._run, args=(block,))
+    holder.start()
+    try:
+        assert started.wait(5)
+        with pytest.raises(AuthBusyError):
+            hasher.hash('secret')
+    finally:
+        release.set()
+        holder.join()
+    assert hasher.get_stats()['rejected'] == 1
+    # 名额释放后可以继续计算
+    assert hasher.verify('secret', hasher.hash('secret'))
+
+
+def test_timeout_raises_busy_and_frees_slot():
+    hasher = PasswordHasher(workers=1, queue_limit=1, rounds=4, timeout=0.05)
+    release = threading.Event()
+    with pytest.raises(AuthBusyError):
+        hasher._run(release.wait, 5)
+    assert hasher.get_stats()['timeouts'] == 1
+    release.set()
+    hasher.executor.shutdown(wait=True)
+    assert hasher.get_stats()['pending'] == 0
+    assert hasher.slots.acquire(blocking=False)
+
+
+def test_limiter_caps_concurrent_attempts_per_user_and_ip():
+    limiter = AttemptLimiter(per_user=1, per_ip=2)
+    with limiter.attempt('alice', '10.0.0.1'):
+        with pytest.raises(AuthBusyError):
+            with limiter.attempt('alice', '10.0.0.2'):
+                pass
+        with limiter.attempt('bob', '10.0.0.1'):
+            with pytest.raises(AuthBusyError):
+                with limiter.attempt('carol', '10.0.0.1'):
+                    pass
+        assert limiter.get_stats()['active'] == 1
+    stats = limiter.get_stats()
+    assert stats['active'] == 0 and stats['rejected'] == 2
+    assert limiter.active == {}
+
+
+def test_limiter_releases_on_error():
+    limiter = AttemptLimiter(per_user=1, per_ip=1)
+    with pytest.raises(ValueError):
+        with limiter.attempt('alice', '10.0.0.1'):
+            raise ValueError()
+    with limiter.attempt('alice', '10.0.0.1'):
+        pass
+    assert limiter.active == {}
+
+
+def test_limiter_ignores_missing_keys_and_zero_limits():
+    limiter = AttemptLimiter(per_user=0, per_ip=1)
+    with limiter.attempt('alice', None):
+        with limiter.attempt('alice', None):
+            pass
+    assert limiter.get_stats()['rejected'] == 0
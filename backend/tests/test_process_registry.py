@@ -0,0 +1,71 @@
+import os
+import psutil
+import pytest
+from monitors import process_registry
+from monitors.process_registry import ProcessRegistry, proc_stat_start_time
+
+PID = os.getpid()
+
+
+@pytest.fixture
+def scan(monkeypatch):
+    """只扫描当前进程，启动时间由测试控制"""
+    monkeypatch.setattr(process_registry.psutil, 'pids', lambda: [PID])
+    start_times = {PID: 100.0}
+    registry = ProcessRegistry(start_time_reader=start_times.get)
+    return registry, start_times
+
+
+def test_same_process_reuses_entry(scan):
+    registry, _ = scan
+    registry.refresh()
+    entry = registry.entries[PID]
+    registry.refresh()
+    assert registry.entries[PID] is entry
+    assert registry.table.generation == 2
+
+
+def test_reused_pid_gets_new_entry(scan):
+    """PID被复用（启动时间不同）时不沿用旧表项和CPU基准"""
+    registry, start_times = scan
+    registry.refresh()
+    entry = registry.entries[PID]
+    start_times[PID] = 200.0
+    registry.refresh()
+    assert registry.entries[PID] is not entry
+    assert registry.entries[PID].start_time == 200.0
+
+
+def test_unknown_start_time_is_never_matched(scan):
+    registry, start_times = scan
+    del start_times[PID]
+    registry.refresh()
+    entry = registry.entries[PID]
+    registry.refresh()
+    assert registry.entries[PID] is not entry
+
+
+def test_exited_process_is_dropped(scan, monkeypatch):
+    registry, _ = scan
+    registry.refresh()
+    monkeypatch.setattr(process_registry.psutil, 'pids', lambda: [])
+    registry.refresh()
+    assert registry.entries == {}
+    assert registry.table.rows == []
+
+
+def test_proc_stat_start_time_handles_spaces_in_name(tmp_path):
+    stat = '42 (my (odd) proc) S 1 42 42 0 -1 4194560 100 0 0 0 5 3 0 0 20 0 1 0 987654 1000 50'
+    (tmp_path / '42').mkdir()
+    (tmp_path / '42' / 'stat').write_text(stat)
+    read = proc_stat_start_time(str(tmp_path))
+    assert read(42) == 987654.0
+    assert read(43) is None
+
+
+@pytest.mark.skipif(not psutil.LINUX, reason='需要 procfs')
+def test_proc_stat_start_time_matches_psutil():
+    """读取的时钟滴答数换算后与 psutil 的启动时间一致"""
+    ticks = proc_stat_start_time('/proc')(PID)
+    boot_time = psutil.boot_time()
+    assert abs(boot_time + ticks / os.sysconf('SC_CLK_TCK') - psutil.Process(PID).create_time()) < 1
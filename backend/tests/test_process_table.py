@@ -0,0 +1,88 @@
+import threading
+import pytest
+from monitors import process_registry
+from monitors.process_registry import ProcessTable, PROCESS_COLUMNS
+
+
+def _row(pid, name, username='root', status='sleeping', cpu=0.0, memory=0.0):
+    return {
+        'pid': pid, 'name': name, 'username': username, 'status': status,
+        'cpu_percent': cpu, 'memory_percent': memory, 'memory_mb': memory,
+        'create_time': None, 'create_time_str': 'N/A', 'ppid': 1
+    }
+
+
+@pytest.fixture
+def table():
+    return ProcessTable([
+        _row(1, 'systemd', cpu=0.5, memory=1.0),
+        _row(10, 'nginx', 'www', cpu=3.0, memory=2.0),
+        _row(11, 'nginx', 'www', 'running', cpu=7.0, memory=2.5),
+        _row(20, 'Python3', 'app', 'running', cpu=12.0, memory=8.0),
+        _row(21, 'bash', 'app', cpu=None, memory=0.1)
+    ], generation=3, updated_at=1000.0)
+
+
+def _pids(result):
+    return [item['pid'] for item in result['items']]
+
+
+def test_sort_desc_puts_missing_values_last(table):
+    result = table.query(sort='cpu_percent')
+    assert _pids(result) == [20, 11, 10, 1, 21]
+    assert (result['total'], result['order'], result['generation']) == (5, 'desc', 3)
+
+
+def test_sort_asc(table):
+    assert _pids(table.query(sort='memory_percent', descending=False)) == [21, 1, 10, 11, 20]
+
+
+def test_filters_combine(table):
+    assert _pids(table.query(users=['www', 'app'], statuses=['running'])) == [20, 11]
+    assert _pids(table.query(name='PYTHON')) == [20]
+    assert table.query(users=['nobody'])['items'] == []
+
+
+def test_pagination_counts_all_matches(table):
+    result = table.query(sort='pid', descending=False, offset=1, limit=2)
+    assert _pids(result) == [10, 11]
+    assert result['total'] == 5
+    assert _pids(table.query(offset=10)) == []
+
+
+def test_items_include_detail_columns(table):
+    item = table.query(limit=1)['items'][0]
+    assert set(item) == set(PROCESS_COLUMNS)
+    # 没有 Process 对象的行，详情列为 None
+    assert item['num_threads'] is None
+
+
+def test_unknown_sort_column(table):
+    with pytest.raises(ValueError):
+        table.query(sort='cmdline')
+
+
+def test_detail_sort_reads_outside_lock(table, monkeypatch):
+    """按详情列排序读取 /proc 时，其他查询不被阻塞"""
+    reading = threading.Event()
+    release = threading.Event()
+
+    def slow_details(proc, cmdline=False):
+        # 只有排序线程的读取很慢，查询线程为返回的行读取详情时立即返回
+        if threading.current_thread() is sorter:
+            reading.set()
+            release.wait(5)
+        return {'num_threads': proc, 'num_fds': None, 'io_read_bytes': None, 'io_write_bytes': None}
+
+    monkeypatch.setattr(process_registry, 'read_details', slow_details)
+    table.procs = {row['pid']: row['pid'] for row in table.rows}
+    sorter = threading.Thread(target=table.sorted_by, args=('num_threads',))
+    sorter.start()
+    assert reading.wait(5)
+    # 其他列的排序、过滤和分页不需要等待正在进行的全表读取
+    assert table.lock.acquire(timeout=1)
+    table.lock.release()
+    assert _pids(table.query(sort='cpu_percent', users=['www'])) == [11, 10]
+    release.set()
+    sorter.join(5)
+    assert [row['pid'] for row in table.sorted_by('num_threads')] == [1, 10, 11, 20, 21]
@@ -0,0 +1,57 @@
+from sample_clock import SampleClock
+
+
+def _clock(overrun='skip', max_catchup=5):
+    """起点固定的时钟：单调时钟100对应墙上时间1000，周期1秒"""
+    clock = SampleClock(1.0, overrun, max_catchup)
+    clock.origin_mono = 100.0
+    clock.origin_wall = 1000.0
+    return clock
+
+
+def test_advance_on_time():
+    clock = _clock()
+    assert clock.advance(100.4) == (False, 0, 0)
+    assert clock.current() == (101.0, 1001.0)
+    assert clock.get_stats()['overruns'] == 0
+
+
+def test_skip_jumps_to_next_future_tick():
+    clock = _clock('skip')
+    # 节拍1、2、3的计划时间都已过去
+    assert clock.advance(103.5) == (True, 3, 0)
+    assert clock.current() == (104.0, 1004.0)
+    stats = clock.get_stats()
+    assert (stats['overruns'], stats['skipped_ticks'], stats['caught_up_ticks']) == (1, 3, 0)
+
+
+def test_catchup_samples_latest_due_tick_and_backfills():
+    """catchup 立即采样最近一个已过期的节拍，之前错过的节拍由它补齐"""
+    clock = _clock('catchup')
+    assert clock.advance(103.5) == (True, 0, 2)
+    assert clock.current() == (103.0, 1003.0)
+    stats = clock.get_stats()
+    assert (stats['overruns'], stats['skipped_ticks'], stats['caught_up_ticks']) == (1, 0, 2)
+
+
+def test_catchup_limit_skips_the_rest():
+    clock = _clock('catchup', max_catchup=2)
+    # 节拍1到6已过期：6立即采样，4、5补齐，1到3跳过
+    assert clock.advance(106.2) == (True, 3, 2)
+    assert clock.current() == (106.0, 1006.0)
+    assert clock.advance(106.5) == (False, 0, 0)
+    stats = clock.get_stats()
+    assert (stats['overruns'], stats['skipped_ticks'], stats['caught_up_ticks']) == (1, 3, 2)
+
+
+def test_catchup_single_late_tick_needs_no_backfill():
+    clock = _clock('catchup')
+    assert clock.advance(101.2) == (True, 0, 0)
+    assert clock.current() == (101.0, 1001.0)
+
+
+def test_wall_clock_resync():
+    clock = _clock()
+    assert not clock.check_wall_clock(now_mono=100.5, now_wall=1000.6)
+    assert clock.check_wall_clock(now_mono=100.5, now_wall=1010.0)
+    assert clock.get_stats()['resyncs'] == 1
@@ -0,0 +1,64 @@
+from snapshot_diff import diff_snapshots, compact_ops
+
+
+def test_compact_ops_keeps_latest_per_path():
+    ops = [
+        {'op': 'replace', 'path': '/cpu/percent', 'value': 1},
+        {'op': 'replace', 'path': '/memory/percent', 'value': 2},
+        {'op': 'replace', 'path': '/cpu/percent', 'value': 3}
+    ]
+    assert compact_ops(ops) == [
+        {'op': 'replace', 'path': '/memory/percent', 'value': 2},
+        {'op': 'replace', 'path': '/cpu/percent', 'value': 3}
+    ]
+
+
+def test_compact_ops_parent_supersedes_children():
+    """父路径之后被整体替换或删除时，丢弃其下较早的操作"""
+    ops = [
+        {'op': 'replace', 'path': '/disk/io/read', 'value': 1},
+        {'op': 'add', 'path': '/disk/io/write', 'value': 2},
+        {'op': 'remove', 'path': '/disk/io'}
+    ]
+    assert compact_ops(ops) == [{'op': 'remove', 'path': '/disk/io'}]
+
+
+def test_compact_ops_child_after_parent_is_kept():
+    ops = [
+        {'op': 'add', 'path': '/network', 'value': {'io': {}}},
+        {'op': 'add', 'path': '/network/io/bytes_sent', 'value': 5}
+    ]
+    assert compact_ops(ops) == ops
+
+
+def test_compact_ops_does_not_match_sibling_prefix():
+    """/cpu 不是 /cpu_count 的父路径"""
+    ops = [
+        {'op': 'replace', 'path': '/cpu_count', 'value': 4},
+        {'op': 'replace', 'path': '/cpu', 'value': {}}
+    ]
+    assert compact_ops(ops) == ops
+
+
+def test_compact_ops_applies_like_sequential_diffs():
+    """合并后的增量与依次应用各版本增量的结果一致"""
+    versions = [
+        {'cpu': {'percent': 1}, 'load': {'1min': 0.5}},
+        {'cpu': {'percent': 2}, 'load': {'1min': 0.5}, 'swap': {'percent': 1}},
+        {'cpu': {'percent': 3}, 'load': {'1min': 0.7}}
+    ]
+    ops = []
+    for old, new in zip(versions, versions[1:]):
+        ops.extend(diff_snapshots(old, new))
+
+    result = {'cpu': {'percent': 1}, 'load': {'1min': 0.5}}
+    for op in compact_ops(ops):
+        *parents, key = op['path'].split('/')[1:]
+        target = result
+        for part in parents:
+            target = target.setdefault(part, {})
+        if op['op'] == 'remove':
+            target.pop(key, None)
+        else:
+            target[key] = op['value']
+    assert result == versions[-1]
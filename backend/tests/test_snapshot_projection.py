@@ -0,0 +1,90 @@
+from metrics_history import select_columns
+from snapshot_projection import parse_fields, project, project_ops
+
+SNAPSHOT = {
+    'cpu': {'percent': 12.5, 'per_cpu': [10.0, 15.0]},
+    'memory': {'virtual': {'percent': 40.0, 'total': 1024}, 'swap': {'percent': 1.0}},
+    'processes': {'count': 3, 'top_cpu': []}
+}
+
+
+def test_parse_fields_builds_tree():
+    assert parse_fields('cpu.percent, memory.virtual.percent') == {
+        'cpu': {'percent': {}}, 'memory': {'virtual': {'percent': {}}}
+    }
+    assert parse_fields('') is None
+    assert parse_fields(' , ') is None
+
+
+def test_parse_fields_shorter_prefix_wins():
+    assert parse_fields('cpu,cpu.percent') == {'cpu': {}}
+    assert parse_fields('cpu.percent,cpu') == {'cpu': {}}
+
+
+def test_project_fields_and_exclude():
+    assert project(SNAPSHOT, parse_fields('cpu.percent,memory.virtual.percent')) == {
+        'cpu': {'percent': 12.5}, 'memory': {'virtual': {'percent': 40.0}}
+    }
+    assert project(SNAPSHOT, excluded=parse_fields('processes,memory.swap')) == {
+        'cpu': SNAPSHOT['cpu'], 'memory': {'virtual': SNAPSHOT['memory']['virtual']}
+    }
+    # 不存在的字段被忽略
+    assert project(SNAPSHOT, parse_fields('gpu,cpu.percent')) == {'cpu': {'percent': 12.5}}
+
+
+def test_project_does_not_mutate_or_copy_untouched_parts():
+    result = project(SNAPSHOT, excluded=parse_fields('processes'))
+    assert result['cpu'] is SNAPSHOT['cpu']
+    assert 'processes' in SNAPSHOT
+
+
+def test_project_ops_with_fields():
+    ops = [
+        {'op': 'replace', 'path': '/cpu/percent', 'value': 20.0},
+        {'op': 'replace', 'path': '/cpu/per_cpu/0', 'value': 30.0},
+        {'op': 'replace', 'path': '/processes/count', 'value': 4},
+        {'op': 'add', 'path': '/memory', 'value': {'virtual': {'percent': 41.0, 'total': 1024}}}
+    ]
+    assert project_ops(ops, parse_fields('cpu.percent,memory.virtual.percent')) == [
+        {'op': 'replace', 'path': '/cpu/percent', 'value': 20.0},
+        {'op': 'add', 'path': '/memory', 'value': {'virtual': {'percent': 41.0}}}
+    ]
+
+
+def test_project_ops_with_exclude():
+    ops = [
+        {'op': 'replace', 'path': '/cpu/percent', 'value': 20.0},
+        {'op': 'remove', 'path': '/processes/top_cpu'},
+        {'op': 'add', 'path': '/memory', 'value': {'virtual': {'percent': 41.0}, 'swap': {'percent': 2.0}}}
+    ]
+    assert project_ops(ops, excluded=parse_fields('processes,memory.swap')) == [
+        {'op': 'replace', 'path': '/cpu/percent', 'value': 20.0},
+        {'op': 'add', 'path': '/memory', 'value': {'virtual': {'percent': 41.0}}}
+    ]
+
+
+def test_project_ops_unescapes_pointer_keys():
+    ops = [{'op': 'replace', 'path': '/disk/io~1sda', 'value': 1}]
+    assert project_ops(ops, parse_fields('disk.io/sda')) == ops
+
+
+def test_select_history_columns():
+    names = ('timestamp', 'count', 'cpu_percent_min', 'cpu_percent_avg', 'cpu_percent_max',
+             'memory_percent_avg', 'net_bytes_sent_last', 'per_cpu')
+    assert select_columns(names, 'cpu_percent,net_bytes_sent') == [
+        'timestamp', 'count', 'cpu_percent_min', 'cpu_percent_avg', 'cpu_percent_max', 'net_bytes_sent_last'
+    ]
+    assert select_columns(names, exclude='cpu_percent,per_cpu') == [
+        'timestamp', 'count', 'memory_percent_avg', 'net_bytes_sent_last'
+    ]
+
+
+def test_delta_ops_follow_projection(system_monitor):
+    system_monitor.publish({'cpu': {'percent': 1.0}, 'memory': {'percent': 2.0}})
+    since = system_monitor.format_version()
+    system_monitor.publish({'cpu': {'percent': 3.0}, 'memory': {'percent': 4.0}})
+    delta = system_monitor.get_delta(since, fields='cpu')
+    assert delta['full'] is False
+    assert delta['ops'] == [{'op': 'replace', 'path': '/cpu/percent', 'value': 3.0}]
+    full = system_monitor.get_delta(None, exclude='cpu')
+    assert full['full'] is True and full['data'] == {'memory': {'percent': 4.0}}
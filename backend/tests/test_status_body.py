@@ -0,0 +1,50 @@
+import gzip
+import json
+
+SNAPSHOT = {
+    'cpu': {'percent': 12.5, 'per_cpu': [10.0, 15.0]},
+    'memory': {'virtual': {'percent': 40.0, 'total': 1024}},
+    'processes': {'count': 3}
+}
+
+
+def test_body_carries_version_and_etag(system_monitor):
+    system_monitor.publish(dict(SNAPSHOT))
+    version, etag, body = system_monitor.get_status_body()
+    payload = json.loads(body)
+    assert payload['version'] == system_monitor.format_version(version)
+    assert payload['full'] is True
+    assert payload['data']['cpu']['percent'] == 12.5
+    assert etag == f'W/"{payload["version"]}"'
+
+
+def test_matching_etag_returns_no_body(system_monitor):
+    """If-None-Match 命中当前版本时不取响应体（304）"""
+    system_monitor.publish(dict(SNAPSHOT))
+    _, etag, _ = system_monitor.get_status_body()
+    assert system_monitor.get_status_body(if_none_match=etag) == (1, etag, None)
+    assert system_monitor.get_status_body(if_none_match=f'W/"other", {etag}')[2] is None
+
+
+def test_new_version_invalidates_etag(system_monitor):
+    system_monitor.publish(dict(SNAPSHOT))
+    _, old_etag, _ = system_monitor.get_status_body()
+    system_monitor.publish(dict(SNAPSHOT, processes={'count': 4}))
+    version, etag, body = system_monitor.get_status_body(if_none_match=old_etag)
+    assert etag != old_etag
+    assert json.loads(body)['data']['processes'] == {'count': 4}
+
+
+def test_body_is_serialised_once_per_version(system_monitor):
+    system_monitor.publish(dict(SNAPSHOT))
+    first = system_monitor.get_status_body()[2]
+    assert system_monitor.get_status_body()[2] is first
+
+
+def test_compressed_and_projected_bodies(system_monitor):
+    system_monitor.publish(dict(SNAPSHOT))
+    _, _, plain = system_monitor.get_status_body()
+    _, _, compressed = system_monitor.get_status_body('gzip')
+    assert gzip.decompress(compressed) == plain
+    _, _, projected = system_monitor.get_status_body(fields='cpu.percent')
+    assert json.loads(projected)['data'] == {'cpu': {'percent': 12.5}}
@@ -0,0 +1,60 @@
+import threading
+from sampler_service import SamplerServer, RemoteSystemMonitor
+from stream_tickets import StreamTickets, TicketLedger
+
+SECRET = 'test-secret'
+
+
+def test_ticket_is_single_use():
+    tickets = StreamTickets(SECRET)
+    ticket = tickets.issue('admin')
+    assert tickets.redeem(ticket) == 'admin'
+    assert tickets.redeem(ticket) is None
+    assert tickets.get_stats() == {'ttl': 30, 'issued': 1, 'redeemed': 1, 'rejected': 1}
+
+
+def test_invalid_and_expired_tickets_are_rejected():
+    tickets = StreamTickets(SECRET)
+    assert tickets.redeem(None) is None
+    assert tickets.redeem('not-a-ticket') is None
+    assert StreamTickets('other-secret').redeem(tickets.issue('admin')) is None
+    assert StreamTickets(SECRET, ttl=-1).redeem(tickets.issue('admin')) is None
+
+
+def test_workers_sharing_a_ledger_redeem_once():
+    """多个工作进程共用采样进程中的登记表，同一张票据只能在其中一个进程使用"""
+    ledger = TicketLedger()
+    worker_a = StreamTickets(SECRET, claim=ledger.claim)
+    worker_b = StreamTickets(SECRET, claim=ledger.claim)
+    ticket = worker_a.issue('admin')
+    assert worker_b.redeem(ticket) == 'admin'
+    assert worker_a.redeem(ticket) is None
+    assert len(ledger) == 1
+
+
+def test_unreachable_ledger_rejects():
+    def claim(jti, ttl):
+        raise ConnectionError('无法连接采样进程')
+
+    tickets = StreamTickets(SECRET, claim=claim)
+    assert tickets.redeem(tickets.issue('admin')) is None
+
+
+def test_ledger_forgets_expired_entries():
+    ledger = TicketLedger()
+    assert ledger.claim('a', -1)
+    assert ledger.claim('a', 30)
+    assert not ledger.claim('a', 30)
+
+
+def test_claim_through_sampler_socket(tmp_path):
+    address = str(tmp_path / 'sampler.sock')
+    server = SamplerServer(object(), address, b'key', ledger=TicketLedger())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        remote = RemoteSystemMonitor(address, b'key', connect_timeout=5)
+        assert remote.claim_stream_ticket('jti-1', 30) is True
+        assert remote.claim_stream_ticket('jti-1', 30) is False
+    finally:
+        server.close()
@@ -0,0 +1,54 @@
+import time
+from auth import UserCache
+
+USER = {'id': 1, 'username': 'admin', 'role': 'admin'}
+
+
+def test_hit_and_miss():
+    cache = UserCache(max_size=4, ttl=60)
+    assert cache.get(1) is None
+    assert cache.put(1, USER)
+    assert cache.get('1') == USER
+    stats = cache.get_stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1 and stats['size'] == 1
+
+
+def test_entries_expire_after_ttl():
+    cache = UserCache(max_size=4, ttl=0.01)
+    cache.put(1, USER)
+    time.sleep(0.02)
+    assert cache.get(1) is None
+    assert cache.get_stats()['size'] == 0
+
+
+def test_lru_eviction():
+    cache = UserCache(max_size=2, ttl=60)
+    cache.put(1, USER)
+    cache.put(2, dict(USER, id=2, username='bob'))
+    cache.get(1)
+    cache.put(3, dict(USER, id=3, username='carol'))
+    assert cache.get(2) is None
+    assert cache.get(1) == USER
+    assert cache.get_stats()['evictions'] == 1
+
+
+def test_invalidate_by_id_and_username():
+    cache = UserCache(max_size=4, ttl=60)
+    cache.put(1, USER)
+    cache.invalidate(1)
+    assert cache.get(1) is None
+    cache.put(1, USER)
+    cache.invalidate_username('admin')
+    assert cache.get(1) is None
+
+
+def test_read_started_before_invalidation_is_not_cached():
+    """查询数据库期间发生失效时，旧数据不能被重新放回缓存"""
+    cache = UserCache(max_size=4, ttl=60)
+    generation = cache.current_generation()
+    cache.invalidate_username('admin')
+    assert not cache.put(1, USER, generation)
+    assert cache.get(1) is None
+    assert cache.get_stats()['stale_puts'] == 1
+    assert cache.put(1, USER, cache.current_generation())
+    assert cache.get(1) == USER
@@ -0,0 +1,6 @@
+# WSGI 入口。监控模式由 MONITOR_MODE 决定：gunicorn.conf.py 在启动采样进程时设置为 remote，
+# 其他服务器（flask run、单进程 uwsgi、测试）导入时默认在本进程内采集
+from app import app
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=5001)
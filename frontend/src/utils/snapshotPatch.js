@@ -0,0 +1,32 @@
+// 应用后端返回的快照增量（JSON Patch 风格的 add/replace/remove 操作）
+// 采用写时复制：被修改路径上的对象都会生成新的引用，便于Vue检测到变化
+
+const unescapePointer = (segment) => segment.replace(/~1/g, '/').replace(/~0/g, '~')
+
+export const applySnapshotPatch = (snapshot, ops) => {
+  let root = { ...snapshot }
+
+  ops.forEach((op) => {
+    const keys = op.path.split('/').slice(1).map(unescapePointer)
+    if (keys.length === 0) {
+      root = op.op === 'remove' ? {} : { ...op.value }
+      return
+    }
+
+    let target = root
+    for (let i = 0; i < keys.length - 1; i++) {
+      const child = target[keys[i]]
+      target[keys[i]] = Array.isArray(child) ? [...child] : { ...(child || {}) }
+      target = target[keys[i]]
+    }
+
+    const lastKey = keys[keys.length - 1]
+    if (op.op === 'remove') {
+      delete target[lastKey]
+    } else {
+      target[lastKey] = op.value
+    }
+  })
+
+  return root
+}